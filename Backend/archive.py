@@ -0,0 +1,228 @@
+"""
+Tiered retention for assessments.
+
+Assessments older than the retention horizon are moved into per-user
+compressed NDJSON chunks (zstd when the optional `zstandard` package is
+installed, gzip otherwise; each chunk records its codec). Chunks live in the
+Mongo `archive` collection or in local files. The original assessment is
+reduced to a stub (user_id, timestamp, archived) so counts, ETags and
+timestamps keep working, and `InnovateHerDB.get_user_assessments` pages into
+the archive when older history is requested.
+
+CLI:
+    python archive.py --horizon-days 180 [--dry-run]
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bson import Binary, json_util
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Assessments per archive chunk
+ARCHIVE_CHUNK = 200
+# Fields dropped from the live document once it is archived
+ARCHIVED_FIELDS = ("emotional_answers", "answers", "questionnaire_version", "answer_keys", "life_questions")
+
+
+def compress(data: bytes) -> Tuple[bytes, str]:
+    """Compress with the best available codec; returns (blob, codec)"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), "zstd"
+    return gzip.compress(data, compresslevel=9), "gzip"
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed data")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def encode_chunk(docs: List[Dict]) -> Tuple[bytes, str]:
+    """NDJSON-encode and compress documents; returns (blob, codec)"""
+    return compress("\n".join(json_util.dumps(doc) for doc in docs).encode("utf-8"))
+
+
+def decode_chunk(blob: bytes, codec: str) -> List[Dict]:
+    ndjson = decompress(blob, codec)
+    return [json_util.loads(line) for line in ndjson.decode("utf-8").splitlines() if line]
+
+
+def chunk_id(user_id: str, docs: List[Dict]) -> str:
+    """Deterministic id, so re-running after a crash overwrites instead of duplicating"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(user_id.encode("utf-8"))
+    for doc in docs:
+        digest.update(str(doc["_id"]).encode("ascii"))
+    return digest.hexdigest()
+
+
+class MongoArchiveStore:
+    """Chunks as documents in the `archive` collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection.create_index("chunk_id", unique=True)
+        self.collection.create_index([("user_id", 1), ("last_ts", -1)])
+
+    def put(self, meta: Dict, blob: bytes):
+        self.collection.update_one(
+            {"chunk_id": meta["chunk_id"]},
+            {"$set": {**meta, "data": Binary(blob)}},
+            upsert=True
+        )
+
+    def chunks(self, user_id: str, before: datetime = None) -> Iterator[Dict]:
+        """Chunk metadata for a user, newest first, optionally only chunks starting before `before`"""
+        query = {"user_id": user_id}
+        if before is not None:
+            query["first_ts"] = {"$lt": before}
+        yield from self.collection.find(query, {"data": 0}, sort=[("last_ts", -1)])
+
+    def read(self, meta: Dict) -> bytes:
+        return bytes(self.collection.find_one({"chunk_id": meta["chunk_id"]}, {"data": 1})["data"])
+
+
+class LocalArchiveStore:
+    """Chunks as files: <root>/<user>/<last_ts>_<first_ts>_<chunk_id>.ndjson.<codec>"""
+
+    TS_FORMAT = "%Y%m%dT%H%M%S%f"
+    NAME = re.compile(r"^(\d{8}T\d{12})_(\d{8}T\d{12})_([0-9a-f]+)\.ndjson\.(zstd|gzip)$")
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _user_dir(self, user_id: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.@-]", "_", user_id)
+        return os.path.join(self.root, safe)
+
+    def put(self, meta: Dict, blob: bytes):
+        directory = self._user_dir(meta["user_id"])
+        os.makedirs(directory, exist_ok=True)
+        name = (f"{meta['last_ts'].strftime(self.TS_FORMAT)}_{meta['first_ts'].strftime(self.TS_FORMAT)}"
+                f"_{meta['chunk_id']}.ndjson.{meta['codec']}")
+        tmp = os.path.join(directory, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, os.path.join(directory, name))
+
+    def chunks(self, user_id: str, before: datetime = None) -> Iterator[Dict]:
+        directory = self._user_dir(user_id)
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory), reverse=True):
+            match = self.NAME.match(name)
+            if not match:
+                continue
+            meta = {
+                "user_id": user_id,
+                "last_ts": datetime.strptime(match.group(1), self.TS_FORMAT),
+                "first_ts": datetime.strptime(match.group(2), self.TS_FORMAT),
+                "chunk_id": match.group(3),
+                "codec": match.group(4),
+                "path": os.path.join(directory, name)
+            }
+            if before is None or meta["first_ts"] < before:
+                yield meta
+
+    def read(self, meta: Dict) -> bytes:
+        with open(meta["path"], "rb") as f:
+            return f.read()
+
+
+def read_archived(store, user_id: str, limit: int, before: datetime = None,
+                  exclude_ids=()) -> List[Dict]:
+    """Up to `limit` archived assessments older than `before`, newest first"""
+    results, seen = [], set(exclude_ids)
+    for meta in store.chunks(user_id, before):
+        if len(results) >= limit:
+            results.sort(key=lambda d: d["timestamp"], reverse=True)
+            # chunks come newest-last_ts first; stop once none can beat the current page
+            if meta["last_ts"] < results[limit - 1]["timestamp"]:
+                break
+        for doc in decode_chunk(store.read(meta), meta["codec"]):
+            if (before is None or doc["timestamp"] < before) and doc["_id"] not in seen:
+                seen.add(doc["_id"])
+                results.append(doc)
+    results.sort(key=lambda d: d["timestamp"], reverse=True)
+    return results[:limit]
+
+
+def run_retention(db, horizon_days: int, dry_run: bool = False) -> Dict[str, int]:
+    """Archive assessments older than `horizon_days` and stub them in place"""
+    cutoff = datetime.now() - timedelta(days=horizon_days)
+    cursor = db.assessment_collection.find(
+        {"timestamp": {"$lt": cutoff}, "archived": {"$ne": True}},
+        sort=[("user_id", 1), ("timestamp", 1)]
+    )
+    stats = {"users": 0, "chunks": 0, "assessments": 0, "raw_bytes": 0, "archived_bytes": 0}
+    batch: List[Dict] = []
+    current_user: Optional[str] = None
+
+    def flush():
+        if not batch:
+            return
+        blob, codec = encode_chunk(batch)
+        stats["chunks"] += 1
+        stats["assessments"] += len(batch)
+        stats["raw_bytes"] += sum(len(json_util.dumps(d)) for d in batch)
+        stats["archived_bytes"] += len(blob)
+        if not dry_run:
+            db.archive.put({
+                "chunk_id": chunk_id(current_user, batch),
+                "user_id": current_user,
+                "first_ts": batch[0]["timestamp"],
+                "last_ts": batch[-1]["timestamp"],
+                "count": len(batch),
+                "codec": codec
+            }, blob)
+            # the chunk is durable before the live documents are stripped
+            db.assessment_collection.update_many(
+                {"_id": {"$in": [d["_id"] for d in batch]}},
+                {"$set": {"archived": True}, "$unset": {field: "" for field in ARCHIVED_FIELDS}}
+            )
+        batch.clear()
+
+    for doc in cursor:
+        if doc.get("user_id") != current_user:
+            flush()
+            current_user = doc.get("user_id")
+            if current_user is not None:
+                stats["users"] += 1
+        if current_user is None:
+            continue
+        batch.append(doc)
+        if len(batch) >= ARCHIVE_CHUNK:
+            flush()
+    flush()
+    return stats
+
+
+def main(argv=None):
+    from config import ASSESSMENT_RETENTION_DAYS
+
+    parser = argparse.ArgumentParser(description="Archive old assessments into compressed chunks")
+    parser.add_argument("--horizon-days", type=int, default=ASSESSMENT_RETENTION_DAYS)
+    parser.add_argument("--dry-run", action="store_true", help="report sizes without writing")
+    args = parser.parse_args(argv)
+
+    from db_help import db
+    stats = run_retention(db, args.horizon_days, args.dry_run)
+    ratio = stats["raw_bytes"] / stats["archived_bytes"] if stats["archived_bytes"] else 0
+    print(f"{'🔎 Would archive' if args.dry_run else '✅ Archived'} {stats['assessments']} assessments "
+          f"for {stats['users']} users in {stats['chunks']} chunks "
+          f"({stats['raw_bytes']} -> {stats['archived_bytes']} bytes, {ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
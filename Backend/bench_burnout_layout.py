@@ -0,0 +1,119 @@
+"""
+Compare the plain and time-series layouts for burnout scores.
+
+    python bench_burnout_layout.py --records 3000000 --users 50000
+
+Loads the same synthetic scores into both layouts in a scratch database
+(InnovateHer_bench by default, dropped afterwards unless --keep), then prints
+insert time, storage + index size, and latency for the read paths:
+latest score, a 90-day range scan and the daily trend aggregation.
+Needs MongoDB 6.3+ and MONGO_URI (or --uri).
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+# Same options as InnovateHerDB.BURNOUT_SERIES_OPTIONS (importing db_help would
+# connect to the application database)
+SERIES_OPTIONS = {"timeField": "date", "metaField": "user_id", "granularity": "hours"}
+RISK_LEVELS = ["low", "moderate", "high", "critical"]
+
+
+def synthetic_batches(records: int, users: int, batch_size: int, seed: int = 7):
+    """Scores spread over two years, arriving in time order like real traffic"""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=730)
+    step = timedelta(days=730) / records
+    batch = []
+    for i in range(records):
+        score = round(rng.uniform(1, 5), 2)
+        batch.append({
+            "user_id": f"user{rng.randrange(users):06d}",
+            "assessment_id": f"{i:024x}",
+            "date": start + step * i,
+            "burnout_score": score,
+            "risk_level": RISK_LEVELS[min(3, int(score) - 1)]
+        })
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def storage_mb(collection) -> float:
+    stats = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+    return (stats.get("storageSize", 0) + stats.get("totalIndexSize", 0)) / 1e6
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        began = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - began) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark burnout score storage layouts")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI"))
+    parser.add_argument("--database", default="InnovateHer_bench")
+    parser.add_argument("--records", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args(argv)
+
+    client = MongoClient(args.uri)
+    client.drop_database(args.database)
+    database = client[args.database]
+    plain = database["burnout_scores"]
+    plain.create_index([("user_id", 1), ("date", -1)])
+    series = database.create_collection("burnout_series", timeseries=SERIES_OPTIONS)
+    series.create_index([("user_id", 1), ("date", -1)])
+
+    rng = random.Random(11)
+    users = [f"user{rng.randrange(args.users):06d}" for _ in range(args.queries)]
+    now = datetime.now()
+
+    try:
+        for collection in (plain, series):
+            began = time.perf_counter()
+            for batch in synthetic_batches(args.records, args.users, args.batch_size):
+                collection.insert_many(batch, ordered=False)
+            load_s = time.perf_counter() - began
+
+            picks = iter(users * 3)
+            latest = timed(lambda: collection.find_one(
+                {"user_id": next(picks)}, sort=[("date", -1)]), args.queries)
+            window = timed(lambda: list(collection.find(
+                {"user_id": next(picks), "date": {"$gte": now - timedelta(days=90)}})), args.queries)
+            trend = timed(lambda: list(collection.aggregate([
+                {"$match": {"user_id": next(picks), "date": {"$gte": now - timedelta(days=365)}}},
+                {"$group": {"_id": {"$dateTrunc": {"date": "$date", "unit": "day"}},
+                            "average": {"$avg": "$burnout_score"}}}
+            ])), args.queries)
+
+            print(f"{collection.name}: {args.records} records")
+            print(f"  load            {load_s:8.1f} s")
+            print(f"  storage+index   {storage_mb(collection):8.1f} MB")
+            for label, (p50, p95) in (("latest", latest), ("90-day range", window), ("daily trend", trend)):
+                print(f"  {label:<15} p50 {p50:6.2f} ms   p95 {p95:6.2f} ms")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Payload size with and without compression, and latency of 304 revalidations
+vs. full 200 responses.
+
+    python bench_http_cache.py --limits 10 50 200 --requests 500 --query-ms 5
+
+Serves synthetic therapist search results through CompressionMiddleware and
+conditional_json in a throwaway FastAPI app, called in-process over ASGI (no
+server, no database). --query-ms simulates the MongoDB query a 200 has to run
+and a 304 skips.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from fastapi import FastAPI, Request
+
+import http_cache
+from http_cache import CACHE_SHARED, CompressionMiddleware, conditional_json, make_etag
+
+CATEGORIES = ["Psychiatrist", "Psychologist", "Social Worker", "Counselor", "Marriage Therapist"]
+CITIES = ["Indianapolis", "Fort Wayne", "Evansville", "South Bend", "Carmel", "Bloomington", "Lafayette"]
+STREETS = ["Meridian St", "Washington St", "College Ave", "Main St", "Keystone Ave", "Michigan Rd"]
+
+
+def synthetic_therapists(count: int, seed: int = 5):
+    """Rows shaped like therapist_search documents"""
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": f"{rng.getrandbits(96):024x}",
+            "category": rng.choice(CATEGORIES),
+            "npi": str(1000000000 + rng.randrange(10 ** 9)),
+            "name": f"{rng.choice(['ANNA', 'MARIA', 'JOHN', 'SARAH', 'DAVID', 'EMILY'])} "
+                    f"{rng.choice(['SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'MILLER', 'DAVIS'])}",
+            "city": rng.choice(CITIES).upper(),
+            "state": "IN",
+            "zip_code": f"46{rng.randrange(1000):03d}",
+            "address": f"{rng.randrange(1, 9999)} {rng.choice(STREETS).upper()}",
+            "phone": f"317-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+            "verified": True,
+            "location": {"type": "Point", "coordinates": [round(-86 - rng.random(), 6), round(39 + rng.random(), 6)]},
+        }
+        for _ in range(count)
+    ]
+
+
+def make_app(rows, query_ms: float, minimum_size: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/therapists")
+    def therapists(request: Request, limit: int = 10):
+        etag = make_etag("therapists", 1, None, None, limit)
+
+        def build():
+            time.sleep(query_ms / 1000)
+            return {"count": limit, "filters": {"city": None, "category": None, "limit": limit},
+                    "therapists": rows[:limit]}
+
+        return conditional_json(request, etag, CACHE_SHARED, build)
+
+    return app
+
+
+async def call(app, path: str, query: str, headers: dict):
+    """One GET over ASGI: (status, response headers, body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+async def latency_ms(app, query: str, headers: dict, requests: int, expect: int):
+    samples = []
+    for _ in range(requests):
+        began = time.perf_counter()
+        status, _, _ = await call(app, "/therapists", query, headers)
+        samples.append((time.perf_counter() - began) * 1000)
+        assert status == expect, status
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def run(args):
+    rows = synthetic_therapists(max(args.limits))
+    app = make_app(rows, args.query_ms, args.minimum_size)
+    encodings = ["identity", "gzip"] + (["br"] if http_cache.brotli is not None else [])
+    if http_cache.brotli is None:
+        print("ℹ️ brotli not installed, comparing gzip only")
+
+    print(f"\n{'results':>7}  " + "  ".join(f"{e + ' B':>10}" for e in encodings) + "  "
+          + "  ".join(f"{e + ' ratio':>10}" for e in encodings[1:]))
+    for limit in args.limits:
+        sizes = []
+        for encoding in encodings:
+            _, headers, body = await call(app, "/therapists", f"limit={limit}", {"Accept-Encoding": encoding})
+            sizes.append(len(body))
+        ratios = [f"{size / sizes[0]:>10.1%}" for size in sizes[1:]]
+        print(f"{limit:>7}  " + "  ".join(f"{size:>10}" for size in sizes) + "  " + "  ".join(ratios))
+
+    print(f"\n{'results':>7}  {'200 p50 ms':>10}  {'200 p95 ms':>10}  {'304 p50 ms':>10}  {'304 p95 ms':>10}  "
+          f"(Accept-Encoding: {encodings[-1]}, {args.query_ms:g} ms query)")
+    for limit in args.limits:
+        query = f"limit={limit}"
+        _, headers, _ = await call(app, "/therapists", query, {})
+        full = await latency_ms(app, query, {"Accept-Encoding": encodings[-1]}, args.requests, 200)
+        revalidated = await latency_ms(app, query, {"Accept-Encoding": encodings[-1],
+                                                    "If-None-Match": headers["etag"]}, args.requests, 304)
+        print(f"{limit:>7}  {full[0]:>10.3f}  {full[1]:>10.3f}  {revalidated[0]:>10.3f}  {revalidated[1]:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark response compression and conditional GETs")
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 50, 200], help="therapists per response")
+    parser.add_argument("--requests", type=int, default=500, help="requests per latency measurement")
+    parser.add_argument("--query-ms", type=float, default=5.0, help="simulated database time of a 200")
+    parser.add_argument("--minimum-size", type=int, default=500, help="CompressionMiddleware threshold (bytes)")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Per-turn cost of conversation risk scoring vs. conversation length.
+
+    python -m chatbot.bench_risk
+
+Compares the incremental ConversationRisk.update (one scan of the new
+message) with naively rescanning the whole history every turn.
+"""
+import random
+import time
+
+from .safety import ConversationRisk, _SIGNAL_PATTERN
+
+MESSAGES = [
+    "work has been a lot this week and I feel overwhelmed",
+    "I had a nice walk today, it helped a bit",
+    "honestly I feel hopeless about the exam",
+    "my roommate and I argued again",
+    "I'm exhausted but I managed to cook dinner",
+    "sometimes it feels like there's no point in trying",
+]
+LENGTHS = [10, 100, 1000, 10000]
+MEASURED_TURNS = 200
+
+
+def naive_turn(history):
+    # what a non-incremental scorer would do: rescan every message each turn
+    return sum(len(_SIGNAL_PATTERN.findall(m.lower())) for m in history)
+
+
+def main():
+    rng = random.Random(3)
+    print(f"{'turns so far':>12}  {'incremental µs/turn':>20}  {'rescan µs/turn':>15}")
+    for length in LENGTHS:
+        history = [rng.choice(MESSAGES) for _ in range(length)]
+        state = ConversationRisk()
+        for message in history:
+            state.update(message)
+        new_messages = [rng.choice(MESSAGES) for _ in range(MEASURED_TURNS)]
+
+        began = time.perf_counter()
+        for message in new_messages:
+            state.update(message)
+        incremental = (time.perf_counter() - began) / MEASURED_TURNS * 1e6
+
+        began = time.perf_counter()
+        for message in new_messages[:20]:
+            history.append(message)
+            naive_turn(history)
+        rescan = (time.perf_counter() - began) / 20 * 1e6
+
+        print(f"{length:>12}  {incremental:>20.1f}  {rescan:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
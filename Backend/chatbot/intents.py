@@ -0,0 +1,175 @@
+"""
+Local intent router: answers greetings and resource lookups from templates
+instead of calling Gemini.
+
+A TF-IDF nearest-example classifier is built once at import from the example
+phrases below (no network, no model files). A message is routed only when the
+conversation risk is "low", the best intent clears CONFIDENCE_THRESHOLD and
+beats the runner-up by CONFIDENCE_MARGIN; everything else - including anything
+closer to the "chat" examples (feelings, situations) - goes to the LLM. Words
+the router has never seen count against a match, so "hi, I feel awful" is not
+taken for a greeting, and a word that only the "chat" examples use ("bad",
+"tired", "struggling") blocks routing outright: "my burnout score is bad"
+needs a real reply, not the assessment template.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from .resources import THERAPY_RESOURCES, WELLBEING_PLAN
+
+CONFIDENCE_THRESHOLD = 0.75
+CONFIDENCE_MARGIN = 0.2
+# Longer messages usually carry feelings worth a real reply
+MAX_ROUTED_WORDS = 12
+
+# Intent -> example phrases. "chat" is never answered locally.
+INTENT_EXAMPLES = {
+    "greeting": [
+        "hi", "hello", "hey", "hey there", "hi there", "hello there", "howdy",
+        "good morning", "good afternoon", "good evening", "hiya", "greetings",
+    ],
+    "therapy": [
+        "find a therapist", "therapy options", "online therapy", "therapy links",
+        "talk to a therapist", "where can i find a counselor", "recommend a therapist",
+        "how do i get therapy", "therapist near me", "therapists near me", "therapy resources",
+        "find a psychologist", "counseling services", "see a counselor",
+    ],
+    "plan": [
+        "make a wellbeing plan", "plan my week", "create a schedule", "calendar planning",
+        "wellbeing schedule", "wellness plan", "self care plan", "plan some breaks",
+        "schedule rest", "build a routine", "plan my day",
+    ],
+    "assessment": [
+        "burnout assessment", "take the burnout test", "burnout quiz", "check my burnout",
+        "how burned out am i", "measure my burnout", "burnout score", "take the assessment",
+    ],
+    "chat": [
+        "i feel sad", "i am stressed about work", "i feel overwhelmed", "i can't sleep",
+        "i had a bad day", "i am so tired", "nobody understands me", "i feel anxious",
+        "my friend and i had a fight", "i am worried about my exams", "i feel lonely",
+        "what should i do", "i feel awful", "i am not okay", "everything is too much",
+        "i had a good day", "i am angry", "my family is stressing me out",
+        "i am struggling", "i feel terrible", "this sucks", "i feel hopeless", "i feel worse",
+        "i hate everything", "i feel awful about it", "i feel empty", "i am scared", "i keep crying",
+    ],
+}
+
+TEMPLATES = {
+    "greeting": (
+        "Hi, I'm really glad you're here 🤍\n"
+        "I'm happy to just listen. I can also point you to the Burnout Assessment, "
+        "the Therapy Finder, or help you build a gentle Wellbeing Schedule 🌱\n"
+        "How are you feeling today?"
+    ),
+    "therapy": (
+        "Reaching out for support is a brave and caring step 🤍\n"
+        f"{THERAPY_RESOURCES.strip()}\n"
+        "You can also use the Therapy Finder on this site to find therapists near you ✨"
+    ),
+    "plan": (
+        f"{WELLBEING_PLAN.strip()}\n"
+        "Open the Wellbeing Schedule on this site, add your calendar and preferences, "
+        "and it will fit breaks and rest around your week ✨"
+    ),
+    "assessment": (
+        "The Burnout Assessment is a short check-in on your energy, focus and emotional "
+        "balance 🌱 You'll find it on the Assessment page, and your results help shape "
+        "your wellbeing plan. There are no wrong answers 🤍"
+    ),
+}
+
+_TOKEN = re.compile(r"[a-z']+")
+STOPWORDS = {
+    "a", "an", "the", "to", "i", "i'm", "me", "my", "can", "you", "do", "is", "for", "of",
+    "with", "please", "want", "need", "some", "any", "and", "or", "it", "on", "in", "be",
+    "help", "would", "like", "could", "just", "so", "am", "are", "what", "about", "this", "had",
+    "should", "keep",
+}
+
+
+def _tokens(text: str):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class IntentRouter:
+    """TF-IDF nearest-example intent classifier with offload counters"""
+
+    def __init__(self, examples: Dict[str, list] = INTENT_EXAMPLES):
+        documents = [(intent, _tokens(phrase)) for intent, phrases in examples.items() for phrase in phrases]
+        df = Counter(token for _, tokens in documents for token in set(tokens))
+        n = len(documents)
+        self.idf = {token: math.log((1 + n) / (1 + count)) + 1 for token, count in df.items()}
+        # unseen words get the weight of the rarest known word
+        self.unknown_idf = math.log(1 + n) + 1
+
+        # token -> [(example index, weight)], so a message only touches examples sharing a word
+        # words only the "chat" examples use signal feelings: never answer those from a template
+        routed_words = {token for intent, tokens in documents if intent != "chat" for token in tokens}
+        self.blockers = {token for intent, tokens in documents if intent == "chat" for token in tokens} - routed_words
+
+        self.intents = [intent for intent, _ in documents]
+        self.index: Dict[str, list] = {}
+        for i, (_, tokens) in enumerate(documents):
+            for token, weight in self._vector(tokens).items():
+                self.index.setdefault(token, []).append((i, weight))
+
+        self._lock = threading.Lock()
+        self.routed = Counter()
+        self.llm = 0
+
+    def _vector(self, tokens) -> Dict[str, float]:
+        counts = Counter(tokens)
+        return self._normalize({t: c * self.idf.get(t, self.unknown_idf) for t, c in counts.items()})
+
+    @staticmethod
+    def _normalize(vector) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def classify(self, message: str) -> Tuple[Optional[str], float]:
+        """(intent, confidence), or (None, best score) when no intent is confident"""
+        tokens = _tokens(message)
+        if not tokens or len(tokens) > MAX_ROUTED_WORDS or self.blockers.intersection(tokens):
+            return None, 0.0
+        similarity = Counter()
+        for token, weight in self._vector(tokens).items():
+            for i, example_weight in self.index.get(token, ()):
+                similarity[i] += weight * example_weight
+        # best score per intent (cosine similarity to its closest example)
+        scores = {}
+        for i, score in similarity.items():
+            intent = self.intents[i]
+            scores[intent] = max(scores.get(intent, 0.0), score)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True) + [(None, 0.0)] * 2
+        (intent, best), (_, runner_up) = ranked[0], ranked[1]
+        if intent in (None, "chat") or best < CONFIDENCE_THRESHOLD or best - runner_up < CONFIDENCE_MARGIN:
+            return None, best
+        return intent, best
+
+    def route(self, message: str, risk: str = "low") -> Optional[str]:
+        """Template reply for a confidently recognised intent, else None (ask the LLM)"""
+        intent = self.classify(message)[0] if risk == "low" else None
+        with self._lock:
+            if intent is None:
+                self.llm += 1
+            else:
+                self.routed[intent] += 1
+        return TEMPLATES[intent] if intent else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            routed = sum(self.routed.values())
+            total = routed + self.llm
+            return {
+                "messages": total,
+                "answered_locally": routed,
+                "sent_to_llm": self.llm,
+                "offload_rate": round(routed / total, 3) if total else None,
+                "by_intent": dict(self.routed),
+            }
+
+
+router = IntentRouter()
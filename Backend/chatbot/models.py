@@ -13,3 +13,5 @@ class ChatResponse(BaseModel):
 # In-memory conversation memory
 conversation_history = {}
 MAX_HISTORY = 10
+# Per-conversation ConversationRisk state, kept alongside the history
+conversation_risk = {}
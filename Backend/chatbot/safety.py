@@ -1,3 +1,5 @@
+import re
+
 HIGH_RISK_KEYWORDS = [
     "kill myself",
     "killing myself",
@@ -20,3 +22,97 @@ def assess_risk(user_message: str) -> str:
         if word in msg:
             return "high"
     return "low"
+
+
+# ---- Conversation-level risk ----
+# Softer signals that matter when they accumulate across turns: (phrase, weight)
+RISK_SIGNALS = [
+    ("hopeless", 0.5),
+    ("no way out", 0.6),
+    ("can't go on", 0.6),
+    ("cannot go on", 0.6),
+    ("no point", 0.4),
+    ("worthless", 0.4),
+    ("a burden", 0.4),
+    ("better off without me", 0.8),
+    ("give up", 0.3),
+    ("giving up", 0.3),
+    ("nobody cares", 0.3),
+    ("no one cares", 0.3),
+    ("all alone", 0.25),
+    ("can't cope", 0.3),
+    ("can't take it", 0.3),
+    ("trapped", 0.3),
+    ("empty inside", 0.3),
+    ("numb", 0.2),
+    ("exhausted", 0.15),
+    ("overwhelmed", 0.15),
+]
+CRISIS_WEIGHT = 2.0
+# Share of the accumulated signal carried into the next turn
+RISK_DECAY = 0.7
+# (minimum decayed score, level), checked from the top
+RISK_THRESHOLDS = [(CRISIS_WEIGHT, "high"), (0.9, "elevated"), (0.4, "moderate")]
+# A signal repeated this many times in one conversation is at least "elevated"
+REPEAT_ESCALATION = 3
+RISK_LEVELS = ["low", "moderate", "elevated", "high"]
+
+_WEIGHTS = {phrase: weight for phrase, weight in RISK_SIGNALS}
+_WEIGHTS.update({phrase: CRISIS_WEIGHT for phrase in HIGH_RISK_KEYWORDS})
+# one alternation each, longest phrases first, so each message is scanned once
+_SIGNAL_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p, _ in sorted(RISK_SIGNALS, key=lambda s: len(s[0]), reverse=True)) + r")\b"
+)
+# crisis phrases match as prefixes, so "self-harming" and "suicides" count too
+_CRISIS_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(HIGH_RISK_KEYWORDS, key=len, reverse=True)) + r")"
+)
+
+
+class ConversationRisk:
+    """
+    Risk state for one conversation, updated per message in O(message length):
+    a decaying weighted score plus counts of matched phrases. History is never
+    rescanned.
+    """
+
+    __slots__ = ("score", "turns", "phrase_counts", "level")
+
+    def __init__(self):
+        self.score = 0.0
+        self.turns = 0
+        self.phrase_counts = {}
+        self.level = "low"
+
+    def update(self, message: str) -> str:
+        text = message.lower().replace("’", "'")
+        crisis = _CRISIS_PATTERN.findall(text)
+        matches = _SIGNAL_PATTERN.findall(text) + crisis
+        self.score = self.score * RISK_DECAY + sum(_WEIGHTS[m] for m in matches)
+        self.turns += 1
+        for phrase in matches:
+            self.phrase_counts[phrase] = self.phrase_counts.get(phrase, 0) + 1
+
+        level = "low"
+        # assess_risk (plain substring check) stays as a backstop for crisis messages
+        if crisis or assess_risk(text) == "high":
+            level = "high"
+        else:
+            for threshold, name in RISK_THRESHOLDS:
+                if self.score >= threshold:
+                    level = name
+                    break
+            # the same worry coming back again and again escalates on its own
+            if level in ("low", "moderate") and any(
+                    self.phrase_counts[m] >= REPEAT_ESCALATION for m in matches):
+                level = "elevated"
+        self.level = level
+        return level
+
+    def to_dict(self) -> dict:
+        return {
+            "score": round(self.score, 3),
+            "turns": self.turns,
+            "phrase_counts": dict(self.phrase_counts),
+            "level": self.level
+        }
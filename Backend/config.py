@@ -28,6 +28,45 @@ class ProductionConfig(Config):
     DEBUG = False
 
 
+# Responses smaller than this (bytes) are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 500))
+
+# Per-user rate limits for expensive endpoints: burst size and refill per minute
+CHAT_RATE_CAPACITY = float(os.environ.get("CHAT_RATE_CAPACITY", 10))
+CHAT_RATE_PER_MINUTE = float(os.environ.get("CHAT_RATE_PER_MINUTE", 20))
+PLANNER_RATE_CAPACITY = float(os.environ.get("PLANNER_RATE_CAPACITY", 3))
+PLANNER_RATE_PER_MINUTE = float(os.environ.get("PLANNER_RATE_PER_MINUTE", 6))
+# Seconds to wait for Gemini in planner "gemini" mode before using the heuristic plan
+PLANNER_LLM_BUDGET_SECONDS = float(os.environ.get("PLANNER_LLM_BUDGET_SECONDS", 4.0))
+# Largest .ics upload accepted by /mental-planner/generate-schedule-from-ics (bytes)
+ICS_MAX_UPLOAD_BYTES = int(os.environ.get("ICS_MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+# Worker processes for batch plan generation
+PLANNER_BATCH_WORKERS = int(os.environ.get("PLANNER_BATCH_WORKERS", os.cpu_count() or 2))
+# "memory" (per process) or "mongo" (shared across workers)
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory")
+# Burnout score storage: "plain" (burnout_scores) or "timeseries" (burnout_series,
+# a MongoDB time-series collection; see migrate_burnout_timeseries.py)
+BURNOUT_LAYOUT = os.environ.get("BURNOUT_LAYOUT", "plain")
+# Assessments older than this many days are moved to compressed archive chunks
+ASSESSMENT_RETENTION_DAYS = int(os.environ.get("ASSESSMENT_RETENTION_DAYS", 180))
+# Archive chunks go to the Mongo "archive" collection ("mongo") or to files under ARCHIVE_DIR ("local")
+ARCHIVE_STORE = os.environ.get("ARCHIVE_STORE", "mongo")
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
+# Background job queue: "mongo" (the jobs collection) or "sqlite" (single-machine stand-in)
+JOB_STORE = os.environ.get("JOB_STORE", "mongo")
+JOB_SQLITE_PATH = os.environ.get("JOB_SQLITE_PATH", "jobs.db")
+# Seconds GET /dashboard waits for each data source before returning without it
+DASHBOARD_SOURCE_TIMEOUT = float(os.environ.get("DASHBOARD_SOURCE_TIMEOUT", 1.5))
+# Per-user read cache (latest burnout, todos): entries and seconds before a re-read
+READ_CACHE_SIZE = int(os.environ.get("READ_CACHE_SIZE", 10000))
+READ_CACHE_TTL = float(os.environ.get("READ_CACHE_TTL", 300))
+# Optional shared tier for several API workers (needs the redis package)
+READ_CACHE_REDIS_URL = os.environ.get("READ_CACHE_REDIS_URL")
+READ_CACHE_LOCAL_TTL = float(os.environ.get("READ_CACHE_LOCAL_TTL", 5))
+# Seconds between checks for bulk burnout changes made by other processes (rescoring jobs)
+READ_CACHE_EPOCH_CHECK = float(os.environ.get("READ_CACHE_EPOCH_CHECK", 5))
+
+
 # CORS origins (frontend URLs)
 CORS_ORIGINS = [
     "http://localhost:5173",
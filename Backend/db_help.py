@@ -3,11 +3,24 @@ All the helper functions that you can use to insert into the database
 """
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
+from pymongo import ReturnDocument, UpdateOne, GEOSPHERE
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure
+from bson import Binary, ObjectId, json_util
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict,Any,Tuple, List
 import requests
 import os
+import time
+import geo
+import archive
+import rollups
+import questionnaire
+from read_cache import ReadThroughCache
+from config import (
+    BURNOUT_LAYOUT, ARCHIVE_STORE, ARCHIVE_DIR,
+    READ_CACHE_SIZE, READ_CACHE_TTL, READ_CACHE_REDIS_URL, READ_CACHE_LOCAL_TTL, READ_CACHE_EPOCH_CHECK
+)
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 
@@ -20,6 +33,9 @@ class InnovateHerDB:
         "Counselor": "101Y00000X",
         "Marriage Therapist": "106H00000X"
     }
+    # Time-series layout for burnout scores (BURNOUT_LAYOUT=timeseries)
+    BURNOUT_SERIES = "burnout_series"
+    BURNOUT_SERIES_OPTIONS = {"timeField": "date", "metaField": "user_id", "granularity": "hours"}
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(InnovateHerDB, cls).__new__(cls)
@@ -38,44 +54,117 @@ class InnovateHerDB:
         # All collections (connection reused)
         self.user_collection = self.db['users']
         self.assessment_collection = self.db['assessments']
-        self.burnout_collection = self.db['burnout_scores']
+        if BURNOUT_LAYOUT == "timeseries":
+            self.burnout_collection = self.ensure_burnout_series()
+        else:
+            self.burnout_collection = self.db['burnout_scores']
         self.todo_collection = self.db['todo']
         self.therapist_collection = self.db['therapist_search']
+        self.meta_collection = self.db['meta']
+        self.plan_collection = self.db['wellness_plans']
+        self.rollup_collection = self.db['burnout_rollups']
+        self.transcript_collection = self.db['transcripts']
+        # latest burnout / todos per user, kept current by store_burnout / store_todo
+        self.cache = ReadThroughCache(READ_CACHE_SIZE, READ_CACHE_TTL, READ_CACHE_REDIS_URL, READ_CACHE_LOCAL_TTL)
+        # "burnout" version seen by this process; bumped by jobs that rewrite scores in bulk
+        self._burnout_epoch = None
+        self._burnout_epoch_checked = 0.0
+        if ARCHIVE_STORE == "local":
+            self.archive = archive.LocalArchiveStore(ARCHIVE_DIR)
+        else:
+            self.archive = archive.MongoArchiveStore(self.db['archive'])
         
         # Indexes (run once)
         self._setup_indexes()
-        self._populate_therapists()
+        # therapist seeding is slow (NPI API): it runs as a "reseed_therapists" job
+        self._backfill_therapist_locations()
+        self._geo_index = None
+        self._geo_index_version = None
+        self._geo_near_supported = True
         self._initialized = True
 
     def _setup_indexes(self):
         self.assessment_collection.create_index('user_id')
         self.assessment_collection.create_index("timestamp", background=True)
+        self.assessment_collection.create_index([("user_id", 1), ("timestamp", -1)])
         self.burnout_collection.create_index([("user_id", 1), ("date", -1)])
+        # rescore_assessments job updates burnout records by assessment
+        self.burnout_collection.create_index("assessment_id")
         self.todo_collection.create_index("user_id")
         self.therapist_collection.create_index("npi", unique=True, sparse=True)
         self.therapist_collection.create_index([("city", 1), ("category", 1)])
+        try:
+            self.therapist_collection.create_index([("location", GEOSPHERE), ("category", 1)])
+        except Exception as e:
+            print(f"⚠️ 2dsphere index unavailable, nearby search will use the in-memory index: {e}")
+        self.plan_collection.create_index("user_id", unique=True)
+        self.transcript_collection.create_index("user_id")
+
+    def ensure_burnout_series(self, name: str = None):
+        """Create the burnout time-series collection if it does not exist yet"""
+        name = name or self.BURNOUT_SERIES
+        if name not in self.db.list_collection_names():
+            try:
+                self.db.create_collection(name, timeseries=self.BURNOUT_SERIES_OPTIONS)
+                print(f"📈 Created time-series collection {name}")
+            except CollectionInvalid:
+                pass  # created concurrently by another worker
+        return self.db[name]
+
+    def bump_version(self, name: str) -> int:
+        """Increment and return the version counter for a collection (used for ETags)"""
+        doc = self.meta_collection.find_one_and_update(
+            {"_id": f"version:{name}"},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    def get_version(self, name: str) -> int:
+        doc = self.meta_collection.find_one({"_id": f"version:{name}"})
+        return doc["version"] if doc else 0
 
     def create_user(self, user_id: str):
         self.user_collection.update_one({"user_id": user_id}, 
                                       {"$set": {"user_id": user_id, "created_at": datetime.now()}}, 
                                       upsert=True)
     
-    def _populate_therapists(self):
-        """Populate 100 therapists per category from Indiana"""
-        current_count = self.therapist_collection.count_documents({})
-        if current_count >= 100:
+    def needs_therapist_seed(self) -> bool:
+        """True until the therapist directory has been seeded"""
+        return self.therapist_collection.count_documents({}) < 100
+
+    def server_version(self) -> Tuple[int, ...]:
+        """MongoDB server version, e.g. (7, 0)"""
+        return tuple(self.client.server_info()["versionArray"][:2])
+
+    def needs_rollup_backfill(self) -> bool:
+        """True when burnout scores exist but no daily rollups were built yet"""
+        return self.rollup_collection.count_documents({}, limit=1) == 0 and \
+            self.burnout_collection.count_documents({}, limit=1) > 0
+
+    def _populate_therapists(self, force: bool = False, progress=None):
+        """
+        Populate 100 therapists per category from Indiana.
+        progress(done, total, message) is called for each city and category.
+        """
+        if not force and not self.needs_therapist_seed():
             return
         
         # Major Indiana cities
         cities = ["Indianapolis", "Fort Wayne", "Evansville", "South Bend", "Carmel", 
                   "Bloomington", "Fishers", "Hammond", "Gary", "Lafayette"]
         
+        requests_done, requests_total = 0, len(self.CATEGORIES) * len(cities)
         for category, taxonomy in self.CATEGORIES.items():
             count = 0
             
             for city in cities:
+                requests_done += 1
+                if progress:
+                    progress(requests_done, requests_total, f"{category} in {city}")
                 if count >= 100:
-                    break
+                    continue
                     
                 url = f"https://npiregistry.cms.hhs.gov/api/?version=2.1&taxonomy_code={taxonomy}&state=IN&city={city}&limit=200"
                 
@@ -103,6 +192,9 @@ class InnovateHerDB:
                         }
                         if not doc['name']:
                             continue
+                        centroid = geo.zip_centroid(doc["zip_code"])
+                        if centroid:
+                            doc["location"] = geo.geojson_point(centroid[0], centroid[1])
                         
                         self.therapist_collection.update_one(
                             {"npi": doc["npi"]}, 
@@ -113,9 +205,26 @@ class InnovateHerDB:
                 except Exception as e:
                     print(f"Error fetching {category} from {city}: {e}")
                     continue
+        # Invalidate cached therapist searches (ETag version)
+        self.bump_version("therapists")
         final_count = self.therapist_collection.count_documents({})
         print(f"Total therapists: {final_count}")
 
+    def _backfill_therapist_locations(self):
+        """Add a GeoJSON `location` to therapists seeded before geo search existed"""
+        updates = []
+        for doc in self.therapist_collection.find({"location": {"$exists": False}}, {"zip_code": 1}):
+            centroid = geo.zip_centroid(doc.get("zip_code"))
+            if centroid:
+                updates.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"location": geo.geojson_point(centroid[0], centroid[1])}}
+                ))
+        if updates:
+            self.therapist_collection.bulk_write(updates, ordered=False)
+            self.bump_version("therapists")
+            print(f"📍 Backfilled locations for {len(updates)} therapists")
+
             
     
     def store_assessment(self, user_id: str, emotional: Dict, life: Dict):
@@ -126,16 +235,40 @@ class InnovateHerDB:
         :param user_id: user_id
         :type user_id: str
         :param emotional: This has answers to the ranking questions, key are the questions and values are numbers
+            (stored packed, one byte per question, when they match the questionnaire registry)
         :type emotional: Dict
         :param life: This has text after STT using eleven labs
         :type life: Dict
         """
 
-        doc = {"user_id": user_id, "timestamp": datetime.now(), 
-               "emotional_answers": emotional, "life_questions": life}
+        doc = {"_id": ObjectId(), "user_id": user_id, "timestamp": datetime.now()}
+        packed = questionnaire.encode_answers(emotional)
+        if packed is not None:
+            doc.update(packed)
+        else:
+            doc["emotional_answers"] = emotional
+        if life:
+            # transcripts live in a compressed side collection, keyed by the assessment _id
+            self.store_transcript(doc["_id"], user_id, life)
+            doc["transcript_id"] = doc["_id"]
         result = self.assessment_collection.insert_one(doc)
         return str(result.inserted_id)
 
+    def store_transcript(self, transcript_id: ObjectId, user_id: str, life: Dict):
+        blob, codec = archive.compress(json_util.dumps(life).encode("utf-8"))
+        self.transcript_collection.replace_one(
+            {"_id": transcript_id},
+            {"_id": transcript_id, "user_id": user_id, "codec": codec, "data": Binary(blob)},
+            upsert=True
+        )
+
+    def get_transcripts(self, transcript_ids: List[ObjectId]) -> Dict[ObjectId, Dict]:
+        """Decompressed life-question answers for the given transcript ids"""
+        return {
+            doc["_id"]: json_util.loads(archive.decompress(bytes(doc["data"]), doc["codec"]))
+            for doc in self.transcript_collection.find({"_id": {"$in": list(transcript_ids)}})
+        }
+
 
     
     def store_burnout(self, user_id: str, assessment_id: str, score: float, risk_level: str = None):
@@ -152,41 +285,381 @@ class InnovateHerDB:
             "risk_level": risk_level
         }
         self.burnout_collection.insert_one(doc)
+        self.cache.put(f"burnout:{user_id}", (doc["burnout_score"], risk_level))
+        try:
+            self.rollup_collection.update_one(
+                {"_id": doc["date"].strftime(rollups.DAY_FORMAT)},
+                {"$inc": rollups.rollup_increment(doc["burnout_score"], risk_level)},
+                upsert=True
+            )
+        except Exception as e:
+            # the score itself is stored; rebuild_burnout_rollups() can repair the day
+            print(f"⚠️ Burnout rollup update failed: {e}")
+
+    def _rollup_days(self, day: str = None) -> Dict[str, Dict]:
+        """Rollup documents computed from burnout_scores, for every day or just `day`"""
+        match = {"date": {"$type": "date"}, "burnout_score": {"$type": "number"}}
+        if day is not None:
+            start = datetime.strptime(day, rollups.DAY_FORMAT)
+            match["date"] = {"$gte": start, "$lt": start + timedelta(days=1)}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                    "bucket": {"$min": [rollups.BUCKETS - 1, {"$max": [0, {"$floor": {
+                        "$divide": ["$burnout_score", rollups.BUCKET_WIDTH]}}]}]},
+                    "risk": "$risk_level"
+                },
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$burnout_score"},
+                "sum_sq": {"$sum": {"$multiply": ["$burnout_score", "$burnout_score"]}}
+            }}
+        ]
+        days = {}
+        for group in self.burnout_collection.aggregate(pipeline, allowDiskUse=True):
+            key = group["_id"]
+            values = days.setdefault(key["day"], {"count": 0, "sum": 0.0, "sum_sq": 0.0, "histogram": {}, "risk": {}})
+            values["count"] += group["count"]
+            values["sum"] += group["sum"]
+            values["sum_sq"] += group["sum_sq"]
+            bucket = str(int(key["bucket"]))
+            values["histogram"][bucket] = values["histogram"].get(bucket, 0) + group["count"]
+            risk = rollups.risk_key(key["risk"])
+            values["risk"][risk] = values["risk"].get(risk, 0) + group["count"]
+        return days
+
+    def _write_rollup(self, day: str, seen_count, values) -> bool:
+        """
+        Replace one day's rollup, only if its count is still `seen_count` (None:
+        no document). False when a store_burnout write got in between.
+        """
+        if seen_count is None:
+            if values is None:
+                return True
+            try:
+                self.rollup_collection.insert_one({"_id": day, **values})
+                return True
+            except DuplicateKeyError:
+                return False
+        if values is None:
+            return self.rollup_collection.delete_one({"_id": day, "count": seen_count}).deleted_count == 1
+        return self.rollup_collection.replace_one({"_id": day, "count": seen_count}, values).matched_count == 1
+
+    def rebuild_burnout_rollups(self, attempts: int = 5, retry_delay: float = 0.1) -> int:
+        """
+        Recompute the daily rollups from burnout_scores (backfill / repair after
+        rescoring) while store_burnout keeps writing; returns the days written.
+
+        Every day is replaced only if its stored count hasn't moved since it was
+        read, so no concurrent $inc is lost. A day whose count doesn't match its
+        records yet (a score inserted, its $inc still in flight) is re-read and
+        retried; if it still differs on the last attempt the rollup is broken
+        and gets overwritten.
+        """
+        seen = {doc["_id"]: doc.get("count", 0) for doc in self.rollup_collection.find({}, {"count": 1})}
+        computed = self._rollup_days()
+        changed = 0
+        for day in sorted(set(seen) | set(computed)):
+            seen_count, values = seen.get(day), computed.get(day)
+            for attempt in range(attempts):
+                count = values["count"] if values else None
+                if count == seen_count or attempt == attempts - 1:
+                    if self._write_rollup(day, seen_count, values):
+                        changed += 1
+                        break
+                time.sleep(retry_delay)
+                current = self.rollup_collection.find_one({"_id": day}, {"count": 1})
+                seen_count = current.get("count", 0) if current else None
+                values = self._rollup_days(day).get(day)
+            else:
+                print(f"⚠️ Burnout rollup for {day} kept changing during the rebuild, left as is")
+        print(f"📊 Rebuilt burnout rollups for {changed} days")
+        return changed
+
+    def get_burnout_rollups(self, start: datetime, end: datetime) -> List[Dict]:
+        """Daily rollup documents for start..end inclusive (days are the _id, YYYY-MM-DD)"""
+        return list(self.rollup_collection.find(
+            {"_id": {"$gte": start.strftime(rollups.DAY_FORMAT), "$lte": end.strftime(rollups.DAY_FORMAT)}},
+            sort=[("_id", 1)]
+        ))
 
     
-    def store_todo(self, user_id: str, todos: List[Dict], burnout_score: float = 0):
-        doc = {
-            "user_id": user_id,
-            "burnout_score": burnout_score,
-            "todos": todos,
-            "created_at": datetime.now()
-        }
-        self.todo_collection.update_one(
-            {"user_id": user_id}, 
-            {"$set": doc}, 
-            upsert=True  # Latest todos override old
+    def store_todo(self, user_id: str, todos: List[Dict], burnout_score: float = 0) -> int:
+        """Replace the user's todo list (each item gets an id); returns the new version"""
+        todos = [todo if todo.get("id") else {**todo, "id": str(ObjectId())} for todo in todos]
+        doc = self.todo_collection.find_one_and_update(
+            {"user_id": user_id},
+            {"$set": {
+                "user_id": user_id,
+                "burnout_score": burnout_score,
+                "todos": todos,
+                "created_at": datetime.now()
+            }, "$inc": {"version": 1}},
+            upsert=True,  # Latest todos override old
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        self.cache.put(f"todos:{user_id}", {"todos": todos, "version": doc["version"]})
+        return doc["version"]
+
+    def update_todos(self, user_id: str, updates: Dict[str, Dict], version: int = None):
+        """
+        Set fields on individual todos in place ({todo_id: {field: value}}).
+        Applied only if every todo exists and, when given, the list is still
+        at `version`. Returns (changed todos, new version), or None if not applied.
+        """
+        query = {"user_id": user_id, "todos.id": {"$all": list(updates)}}
+        if version is not None:
+            query["version"] = version
+        fields, options = {}, {}
+        if len(updates) == 1:
+            # one item (the common checkbox tick): positional $ on the matched todo
+            (todo_id, changes), = updates.items()
+            query["todos.id"] = todo_id
+            fields = {f"todos.$.{field}": value for field, value in changes.items()}
+        else:
+            options["array_filters"] = []
+            for i, (todo_id, changes) in enumerate(updates.items()):
+                options["array_filters"].append({f"t{i}.id": todo_id})
+                for field, value in changes.items():
+                    fields[f"todos.$[t{i}].{field}"] = value
+        doc = self.todo_collection.find_one_and_update(
+            query,
+            {"$set": {**fields, "updated_at": datetime.now()}, "$inc": {"version": 1}},
+            projection={"todos": 1, "version": 1},
+            return_document=ReturnDocument.AFTER,
+            **options
+        )
+        if doc is None:
+            return None
+        self.cache.put(f"todos:{user_id}", {"todos": doc["todos"], "version": doc["version"]})
+        return [todo for todo in doc["todos"] if todo.get("id") in updates], doc["version"]
+
+    def _ensure_todo_ids(self, doc: Dict) -> Dict:
+        """Give todos stored before per-item ids existed an id (one-time, on read)"""
+        if all(todo.get("id") for todo in doc["todos"]):
+            return doc
+        todos = [todo if todo.get("id") else {**todo, "id": str(ObjectId())} for todo in doc["todos"]]
+        updated = self.todo_collection.find_one_and_update(
+            {"_id": doc["_id"], "version": doc.get("version")},
+            {"$set": {"todos": todos}, "$inc": {"version": 1}},
+            projection={"todos": 1, "version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        # lost a race with a writer: its version already has ids
+        return updated or self.todo_collection.find_one({"_id": doc["_id"]}, {"todos": 1, "version": 1})
+
+    def store_plans(self, plans: List[Dict]):
+        """Bulk upsert generated wellness plans, one document per user"""
+        if not plans:
+            return
+        now = datetime.now()
+        ops = [
+            UpdateOne(
+                {"user_id": plan["user_id"]},
+                {"$set": {**plan, "updated_at": now}, "$inc": {"version": 1}},
+                upsert=True
+            )
+            for plan in plans
+        ]
+        self.plan_collection.bulk_write(ops, ordered=False)
+
+    def save_plan(self, plan: Dict) -> int:
+        """Replace a user's wellness plan; returns the new plan version"""
+        doc = self.plan_collection.find_one_and_update(
+            {"user_id": plan["user_id"]},
+            {"$set": {**plan, "updated_at": datetime.now()}, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    def update_plan_days(self, user_id: str, version: int, day_updates: Dict[str, List[Dict]],
+                         calendar_events: List[Dict]) -> bool:
+        """
+        Rewrite only the changed days of a plan. Applied only if the stored
+        version still equals `version` (optimistic concurrency).
+        """
+        fields = {f"days.{day}": events for day, events in day_updates.items()}
+        fields["calendar_events"] = calendar_events
+        fields["updated_at"] = datetime.now()
+        result = self.plan_collection.update_one(
+            {"user_id": user_id, "version": version},
+            {"$set": fields, "$inc": {"version": 1}}
         )
+        return result.matched_count == 1
+
+    def _check_burnout_epoch(self):
+        """
+        Drop locally cached burnout values when another process (the rescore
+        job) rewrote scores in bulk; checked at most every READ_CACHE_EPOCH_CHECK s.
+        """
+        now = time.monotonic()
+        if now - self._burnout_epoch_checked < READ_CACHE_EPOCH_CHECK:
+            return
+        self._burnout_epoch_checked = now
+        try:
+            epoch = self.get_version("burnout")
+        except Exception as e:
+            print(f"⚠️ Burnout cache epoch check failed: {e}")
+            return
+        if self._burnout_epoch is not None and epoch != self._burnout_epoch:
+            self.cache.local.clear()
+        self._burnout_epoch = epoch
+
     # Making getter functions
     def get_latest_burnout(self, user_id: str) -> Tuple[float, str]:
-        """Get user's latest burnout score + risk level"""
-        latest = self.burnout_collection.find_one(
-            {"user_id": user_id}, 
-            sort=[("date", -1)]
+        """Get user's latest burnout score + risk level (cached)"""
+        self._check_burnout_epoch()
+        def load():
+            latest = self.burnout_collection.find_one(
+                {"user_id": user_id},
+                sort=[("date", -1)]
+            )
+            if latest:
+                return latest["burnout_score"], latest["risk_level"]
+            return 0.0, "low"
+        return tuple(self.cache.get_or_load(f"burnout:{user_id}", load))
+
+    def get_latest_burnouts(self, user_ids: List[str]) -> Dict[str, Tuple[float, str]]:
+        """Latest burnout score + risk level for many users in one aggregation"""
+        pipeline = [
+            {"$match": {"user_id": {"$in": list(user_ids)}}},
+            {"$sort": {"user_id": 1, "date": -1}},
+            {"$group": {
+                "_id": "$user_id",
+                "burnout_score": {"$first": "$burnout_score"},
+                "risk_level": {"$first": "$risk_level"}
+            }}
+        ]
+        return {
+            doc["_id"]: (doc["burnout_score"], doc["risk_level"])
+            for doc in self.burnout_collection.aggregate(pipeline)
+        }
+
+    def get_burnout_trend(self, user_id: str, days: int = 30, bucket: str = "day") -> List[Dict]:
+        """Average / min / max burnout per day, week or month over the last `days` days"""
+        pipeline = [
+            {"$match": {"user_id": user_id, "date": {"$gte": datetime.now() - timedelta(days=days)}}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$date", "unit": bucket}},
+                "average": {"$avg": "$burnout_score"},
+                "min": {"$min": "$burnout_score"},
+                "max": {"$max": "$burnout_score"},
+                "count": {"$sum": 1}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        return [
+            {
+                "period_start": doc["_id"],
+                "average": round(doc["average"], 2),
+                "min": doc["min"],
+                "max": doc["max"],
+                "count": doc["count"]
+            }
+            for doc in self.burnout_collection.aggregate(pipeline)
+        ]
+
+    def get_user_assessments(self, user_id: str, limit: int = 10, before: datetime = None,
+                             include_transcripts: bool = False) -> List[Dict]:
+        """
+        Newest first; pages into the archive once live (non-archived) history
+        runs out. Transcripts (life_questions) are only loaded when asked for.
+        """
+        assessments = self._assessment_page(user_id, limit, before, include_transcripts)
+        if include_transcripts:
+            ids = [a["transcript_id"] for a in assessments if a.get("transcript_id")]
+            transcripts = self.get_transcripts(ids) if ids else {}
+            for a in assessments:
+                if a.get("transcript_id") in transcripts:
+                    a["life_questions"] = transcripts[a["transcript_id"]]
+        return assessments
+
+    def _assessment_page(self, user_id: str, limit: int, before: datetime = None,
+                         include_transcripts: bool = False) -> List[Dict]:
+        query = {"user_id": user_id, "archived": {"$ne": True}}
+        if before is not None:
+            query["timestamp"] = {"$lt": before}
+        # documents written before the transcript split still embed life_questions
+        projection = None if include_transcripts else {"life_questions": 0}
+        live = [
+            questionnaire.decode_answers(doc)
+            for doc in self.assessment_collection.find(query, projection, sort=[("timestamp", -1)], limit=limit)
+        ]
+        if len(live) == limit:
+            return live
+        older_than = live[-1]["timestamp"] if live else before
+        # only open archive chunks if archived stubs exist below this point
+        stub_query = {"user_id": user_id, "archived": True}
+        if older_than is not None:
+            stub_query["timestamp"] = {"$lt": older_than}
+        if not self.assessment_collection.find_one(stub_query, {"_id": 1}):
+            return live
+        archived = archive.read_archived(
+            self.archive, user_id, limit - len(live), older_than, exclude_ids=[d["_id"] for d in live]
         )
-        if latest:
-            return latest["burnout_score"], latest["risk_level"]
-        return 0.0, "low"
-
-    def get_user_assessments(self, user_id: str, limit: int = 10) -> List[Dict]:
-        return list(self.assessment_collection.find(
-            {"user_id": user_id}, 
-            sort=[("timestamp", -1)], 
-            limit=limit
+        for doc in archived:
+            questionnaire.decode_answers(doc)
+            if not include_transcripts:
+                doc.pop("life_questions", None)
+        return live + archived
+
+    def get_recent_assessments(self, user_id: str, limit: int = 3) -> List[Dict]:
+        """Newest live assessments as {assessment_id, timestamp, burnout_score, risk_level} (no answers)"""
+        docs = list(self.assessment_collection.find(
+            {"user_id": user_id, "archived": {"$ne": True}}, {"timestamp": 1},
+            sort=[("timestamp", -1)], limit=limit
         ))
+        ids = [str(doc["_id"]) for doc in docs]
+        scores = {
+            b["assessment_id"]: b
+            for b in self.burnout_collection.find(
+                {"assessment_id": {"$in": ids}}, {"assessment_id": 1, "burnout_score": 1, "risk_level": 1}
+            )
+        }
+        return [
+            {
+                "assessment_id": assessment_id,
+                "timestamp": doc["timestamp"],
+                "burnout_score": scores.get(assessment_id, {}).get("burnout_score"),
+                "risk_level": scores.get(assessment_id, {}).get("risk_level"),
+            }
+            for assessment_id, doc in zip(ids, docs)
+        ]
+
+    def get_latest_assessment_time(self, user_id: str):
+        """Timestamp of the user's newest assessment (cheap, index-only lookup)"""
+        latest = self.assessment_collection.find_one(
+            {"user_id": user_id},
+            {"timestamp": 1, "_id": 0},
+            sort=[("timestamp", -1)]
+        )
+        return latest["timestamp"] if latest else None
+
+    def get_plan(self, user_id: str) -> Dict:
+        return self.plan_collection.find_one({"user_id": user_id}, {"_id": 0})
+
+    def get_todo_list(self, user_id: str, cached: bool = True) -> Dict:
+        """
+        Latest todo list and its version (cached; callers must not modify it).
+        cached=False reads Mongo directly, e.g. to explain a failed conditional update.
+        """
+        def load():
+            latest = self.todo_collection.find_one(
+                {"user_id": user_id}, {"todos": 1, "version": 1}, sort=[("created_at", -1)]
+            )
+            if latest is None:
+                return {"todos": [], "version": 0}
+            latest = self._ensure_todo_ids(latest)
+            return {"todos": latest["todos"], "version": latest.get("version", 0)}
+        if not cached:
+            return load()
+        return self.cache.get_or_load(f"todos:{user_id}", load)
 
     def get_user_todos(self, user_id: str) -> List[Dict]:
-        latest = self.todo_collection.find_one({"user_id": user_id}, sort=[("created_at", -1)])
-        return latest["todos"] if latest else []
+        return self.get_todo_list(user_id)["todos"]
     
     def get_therapists(self, city: str = None, category: str = None, limit: int = 10) -> List[Dict]:
         query = {"state": "IN"}
@@ -195,6 +668,62 @@ class InnovateHerDB:
         if category:
             query["category"] = category
         return list(self.therapist_collection.find(query, limit=limit))
+
+    def find_nearby_therapists(self, lat: float, lon: float, radius_miles: float,
+                               category: str = None, limit: int = 10) -> List[Dict]:
+        """
+        Closest therapists first, each with `distance_miles`. Uses $geoNear on
+        the 2dsphere index, falling back to an in-memory k-d tree.
+        """
+        query = {"state": "IN"}
+        if category:
+            query["category"] = category
+        if self._geo_near_supported:
+            try:
+                return list(self.therapist_collection.aggregate([
+                    {"$geoNear": {
+                        "near": geo.geojson_point(lat, lon),
+                        "distanceField": "distance_miles",
+                        "distanceMultiplier": 1 / geo.METERS_PER_MILE,
+                        "maxDistance": radius_miles * geo.METERS_PER_MILE,
+                        "spherical": True,
+                        "query": query
+                    }},
+                    {"$limit": limit}
+                ]))
+            except OperationFailure as e:
+                # no 2dsphere index / $geoNear support: stop trying
+                print(f"⚠️ $geoNear unavailable, using in-memory index: {e}")
+                self._geo_near_supported = False
+            except Exception as e:
+                print(f"⚠️ $geoNear failed, using in-memory index: {e}")
+
+        index = self._therapist_geo_index()
+        matches = index.nearest(
+            lat, lon, k=limit, radius_miles=radius_miles,
+            predicate=(lambda t: t.get("category") == category) if category else None
+        )
+        return [{**t, "distance_miles": dist} for dist, t in matches]
+
+    def _therapist_geo_index(self) -> geo.GeoIndex:
+        """
+        k-d tree over all located therapists, rebuilt when the collection
+        version changes; the last snapshot keeps serving if MongoDB is down.
+        """
+        try:
+            version = self.get_version("therapists")
+        except Exception:
+            if self._geo_index is not None:
+                return self._geo_index
+            raise
+        if self._geo_index is None or self._geo_index_version != version:
+            points = []
+            for t in self.therapist_collection.find({"state": "IN", "location": {"$exists": True}}):
+                lon, lat = t["location"]["coordinates"]
+                points.append((lat, lon, t))
+            self._geo_index = geo.GeoIndex(points)
+            self._geo_index_version = version
+        return self._geo_index
     
 
 db = InnovateHerDB()
@@ -0,0 +1,165 @@
+"""
+Per-user data export as NDJSON.
+
+Every record is one line: {"type": "<kind>", "data": {...}}. Records are read
+from server-side cursors in batches of EXPORT_BATCH_SIZE (archived assessments
+one chunk at a time) and written out as they arrive, so memory stays constant
+however long a user's history is.
+
+Bulk export of every user (operators only):
+    python export.py --out-dir exports/ --workers 8 [--gzip]
+"""
+import argparse
+import json
+import os
+import re
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from bson import ObjectId, json_util
+
+import archive
+import questionnaire
+
+EXPORT_BATCH_SIZE = 500
+# Lines are buffered into chunks of about this size before being sent / written
+FLUSH_BYTES = 64 * 1024
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return str(value)
+
+
+def iter_user_records(db, user_id: str, chat_history: List[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+    """(kind, document) pairs for everything stored about a user, oldest first"""
+    user = db.user_collection.find_one({"user_id": user_id})
+    if user:
+        yield "user", user
+
+    # archived assessments are older than any live one; chunks are read one at a time
+    for meta in reversed(list(db.archive.chunks(user_id))):
+        docs = archive.decode_chunk(db.archive.read(meta), meta["codec"])
+        docs.sort(key=lambda d: d["timestamp"])
+        for doc in docs:
+            yield "assessment", questionnaire.decode_answers(doc)
+    for doc in db.assessment_collection.find(
+        {"user_id": user_id, "archived": {"$ne": True}},
+        sort=[("timestamp", 1)], batch_size=EXPORT_BATCH_SIZE
+    ):
+        yield "assessment", questionnaire.decode_answers(doc)
+
+    for doc in db.transcript_collection.find({"user_id": user_id}, batch_size=EXPORT_BATCH_SIZE):
+        yield "transcript", {
+            "assessment_id": doc["_id"],
+            "life_questions": json_util.loads(archive.decompress(bytes(doc["data"]), doc["codec"]))
+        }
+
+    for doc in db.burnout_collection.find(
+        {"user_id": user_id}, sort=[("date", 1)], batch_size=EXPORT_BATCH_SIZE
+    ):
+        yield "burnout", doc
+
+    for doc in db.todo_collection.find({"user_id": user_id}, batch_size=EXPORT_BATCH_SIZE):
+        yield "todos", doc
+
+    plan = db.plan_collection.find_one({"user_id": user_id})
+    if plan:
+        yield "wellness_plan", plan
+
+    for message in chat_history or []:
+        yield "chat_message", message
+
+
+def iter_ndjson(records: Iterable[Tuple[str, Dict]], compress: bool = False) -> Iterator[bytes]:
+    """Encode records as NDJSON byte chunks, gzip-compressed on the fly if requested"""
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+    for kind, doc in records:
+        line = json.dumps({"type": kind, "data": doc}, default=_default, ensure_ascii=False) + "\n"
+        buffer.append(line.encode("utf-8"))
+        size += len(buffer[-1])
+        if size >= FLUSH_BYTES:
+            chunk = b"".join(buffer)
+            buffer.clear()
+            size = 0
+            chunk = gzipper.compress(chunk) if gzipper else chunk
+            if chunk:
+                yield chunk
+    tail = b"".join(buffer)
+    if gzipper:
+        tail = gzipper.compress(tail) + gzipper.flush()
+    if tail:
+        yield tail
+
+
+def export_filename(user_id: str, compress: bool = False) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.@-]", "_", user_id)
+    return f"{safe}.ndjson" + (".gz" if compress else "")
+
+
+def iter_all_user_ids(db) -> Iterator[str]:
+    """Every user id that has a profile or assessments, each once"""
+    seen = set()
+    sources = (
+        db.user_collection.find({}, {"user_id": 1}, batch_size=5000),
+        db.assessment_collection.aggregate([{"$group": {"_id": "$user_id"}}], allowDiskUse=True),
+    )
+    for cursor in sources:
+        for doc in cursor:
+            user_id = doc.get("user_id", doc.get("_id"))
+            if isinstance(user_id, str) and user_id not in seen:
+                seen.add(user_id)
+                yield user_id
+
+
+def export_all(db, out_dir: str, workers: int = 8, compress: bool = False) -> int:
+    """Write one export file per user, `workers` users at a time; returns the user count"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    def export_one(user_id: str):
+        path = os.path.join(out_dir, export_filename(user_id, compress))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            for chunk in iter_ndjson(iter_user_records(db, user_id), compress):
+                f.write(chunk)
+        os.replace(tmp, path)
+
+    count = 0
+    pending = set()
+    # threads: the work is waiting on MongoDB and zlib, both of which release the GIL
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for user_id in iter_all_user_ids(db):
+            # bounded queue, so memory does not grow with the number of users
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    count += 1
+            pending.add(pool.submit(export_one, user_id))
+        for future in pending:
+            future.result()
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every user's data as NDJSON files")
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--gzip", action="store_true", help="write .ndjson.gz files")
+    args = parser.parse_args(argv)
+
+    from db_help import db
+    count = export_all(db, args.out_dir, args.workers, args.gzip)
+    print(f"✅ Exported {count} users to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
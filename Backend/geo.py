@@ -0,0 +1,119 @@
+"""
+Offline geo helpers for therapist search.
+
+ZIP centroids come from a bundled table (data/in_zip_centroids.csv, Indiana
+ZIP codes; derived from the MIT-licensed `zipcodes` dataset), so no geocoding
+API is called. `GeoIndex` is a small k-d tree used when MongoDB's $geoNear is
+not available: points are stored as 3D unit vectors, where straight-line
+distance grows monotonically with great-circle distance, so nearest-neighbour
+results are exact.
+"""
+import csv
+import heapq
+import math
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ZIP_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "in_zip_centroids.csv")
+EARTH_RADIUS_MILES = 3958.8
+METERS_PER_MILE = 1609.344
+
+
+@lru_cache(maxsize=1)
+def _zip_table() -> Dict[str, Tuple[float, float, str]]:
+    table = {}
+    with open(ZIP_TABLE, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            table[row["zip"]] = (float(row["lat"]), float(row["lon"]), row["city"])
+    return table
+
+
+def zip_centroid(zip_code: str) -> Optional[Tuple[float, float, str]]:
+    """(lat, lon, city) for a 5-digit ZIP, or None if it is not in the table"""
+    return _zip_table().get((zip_code or "").strip()[:5])
+
+
+def geojson_point(lat: float, lon: float) -> dict:
+    # GeoJSON order is [longitude, latitude]
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    p, l = math.radians(lat), math.radians(lon)
+    return (math.cos(p) * math.cos(l), math.cos(p) * math.sin(l), math.sin(p))
+
+
+def _chord(miles: float) -> float:
+    """Straight-line distance between unit vectors for a great-circle distance"""
+    return 2 * math.sin(min(math.pi, miles / EARTH_RADIUS_MILES) / 2)
+
+
+class GeoIndex:
+    """In-memory k-d tree over (lat, lon, item) points"""
+
+    def __init__(self, points: Sequence[Tuple[float, float, dict]]):
+        self._items = [(_unit_vector(lat, lon), lat, lon, item) for lat, lon, item in points]
+        # nodes: (item index, axis, left, right); built over index lists
+        self._nodes: List[Tuple[int, int, int, int]] = []
+        self._root = self._build(list(range(len(self._items))), 0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, indexes: List[int], depth: int) -> int:
+        if not indexes:
+            return -1
+        axis = depth % 3
+        indexes.sort(key=lambda i: self._items[i][0][axis])
+        mid = len(indexes) // 2
+        node = len(self._nodes)
+        self._nodes.append(None)
+        left = self._build(indexes[:mid], depth + 1)
+        right = self._build(indexes[mid + 1:], depth + 1)
+        self._nodes[node] = (indexes[mid], axis, left, right)
+        return node
+
+    def nearest(self, lat: float, lon: float, k: int = 10, radius_miles: float = None,
+                predicate=None) -> List[Tuple[float, dict]]:
+        """Up to k (distance_miles, item) pairs, closest first"""
+        if k <= 0 or self._root == -1:
+            return []
+        target = _unit_vector(lat, lon)
+        limit = _chord(radius_miles) if radius_miles is not None else float("inf")
+        best: List[Tuple[float, int]] = []  # max-heap of (-dist, item index)
+
+        def bound() -> float:
+            return -best[0][0] if len(best) == k else limit
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node == -1:
+                continue
+            index, axis, left, right = self._nodes[node]
+            vec = self._items[index][0]
+            dist = math.dist(vec, target)
+            if dist <= bound() and (predicate is None or predicate(self._items[index][3])):
+                heapq.heappush(best, (-dist, index))
+                if len(best) > k:
+                    heapq.heappop(best)
+            diff = target[axis] - vec[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # far side only if the splitting plane is within the current bound
+            if abs(diff) <= bound():
+                stack.append(far)
+            stack.append(near)
+
+        results = []
+        for _, index in sorted(best, key=lambda b: -b[0]):
+            _, p_lat, p_lon, item = self._items[index]
+            results.append((haversine_miles(lat, lon, p_lat, p_lon), item))
+        return results
@@ -0,0 +1,153 @@
+"""
+HTTP response helpers: compression middleware and conditional GET support.
+
+Brotli is used when the optional `brotli` package is installed and the client
+accepts it; otherwise responses fall back to gzip. Streaming responses are
+passed through untouched so they keep their constant-memory behaviour.
+"""
+import gzip
+import hashlib
+from typing import Any, Callable, Dict
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Cache-Control policies per kind of resource
+CACHE_STATIC = "public, max-age=86400"            # e.g. therapist categories
+CACHE_SHARED = "public, max-age=3600, must-revalidate"  # e.g. therapist search
+CACHE_PRIVATE = "private, no-cache"               # per-user data, always revalidate
+CACHE_NONE = "no-store"                           # generated, non-repeatable output
+
+
+# ============= COMPRESSION =============
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    codings = {}
+    for part in header.split(","):
+        pieces = [p.strip() for p in part.split(";")]
+        if not pieces[0]:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        codings[pieces[0].lower()] = q
+    return codings
+
+
+def choose_encoding(accept_encoding: str):
+    """Pick the best supported content coding for a client, or None"""
+    codings = _parse_accept_encoding(accept_encoding or "")
+    if brotli is not None and codings.get("br", 0) > 0:
+        return "br"
+    if codings.get("gzip", codings.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing single-chunk responses above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        forwarded = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, forwarded
+            if forwarded:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            forwarded = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start_message)
+            skip = (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or start_message["status"] in (204, 304)
+            )
+            if skip:
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ============= CONDITIONAL GET =============
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from cheap version inputs (counters, timestamps, params)"""
+    key = "|".join(str(p) for p in parts).encode("utf-8")
+    return f'"{hashlib.blake2b(key, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match covers the given ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def conditional_json(request: Request, etag: str, cache_control: str, build: Callable[[], Any]) -> Response:
+    """
+    Return 304 when the client already holds `etag`, otherwise call `build`
+    and return its JSON. `build` is only invoked on a miss so the expensive
+    query is skipped entirely for revalidations.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(build()), headers=headers)
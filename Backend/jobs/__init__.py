@@ -0,0 +1,2 @@
+# jobs/__init__.py
+# Background jobs: queue.py (leases, retries, priorities), tasks.py (task registry), worker.py (process pool)
@@ -0,0 +1,47 @@
+"""
+Enqueue or inspect background jobs.
+
+    python -m jobs enqueue rescore_assessments [--params '{"user_id": "u1"}'] [--priority 5]
+    python -m jobs status <job_id>
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+
+from jobs.queue import DEFAULT_MAX_ATTEMPTS, get_queue, public_view
+from jobs.tasks import TASKS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m jobs", description="Background jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="queue a task")
+    enqueue.add_argument("task", choices=sorted(TASKS))
+    enqueue.add_argument("--params", default="{}", help="task parameters as JSON")
+    enqueue.add_argument("--priority", type=int, default=0, help="higher runs first")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    enqueue.add_argument("--dedupe-key", help="skip if a job with this key is already queued/running")
+
+    status = commands.add_parser("status", help="show a job")
+    status.add_argument("job_id")
+    args = parser.parse_args(argv)
+
+    queue = get_queue()
+    if args.command == "enqueue":
+        job_id = queue.enqueue(args.task, json.loads(args.params), args.priority,
+                               args.max_attempts, args.dedupe_key)
+        print(f"✅ Queued {args.task}: {job_id}")
+    else:
+        job = queue.get(args.job_id)
+        if job is None:
+            print("❌ Job not found")
+            sys.exit(1)
+        print(json.dumps(public_view(job), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Job queue with leases, retries and priorities.
+
+A worker claims the highest-priority due job and holds a lease on it; the
+lease is renewed by heartbeats and progress reports. A job whose lease runs
+out (worker crashed) becomes claimable again, and a failed job is retried
+with exponential backoff until max_attempts is reached. Jobs enqueued with a
+dedupe_key are not duplicated while an identical job is queued or running.
+
+MongoJobQueue (the `jobs` collection) is the default; SqliteJobQueue is a
+single-machine stand-in with the same interface (JOB_STORE=sqlite).
+"""
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Seconds a claimed job stays leased without a heartbeat
+LEASE_SECONDS = 60
+# Retry delay: RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+RETRY_BASE_SECONDS = 30
+DEFAULT_MAX_ATTEMPTS = 3
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def _retry_at(attempts: int, now: datetime) -> datetime:
+    return now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def public_view(job: Dict) -> Dict:
+    """Job fields safe to return from the API"""
+    return {
+        "job_id": str(job["_id"]),
+        "task": job["task"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "progress": job.get("progress") or {},
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+class MongoJobQueue:
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection.create_index([("status", 1), ("priority", -1), ("run_at", 1)])
+        self.collection.create_index([("status", 1), ("lease_until", 1)])
+        # at most one queued/running job per dedupe_key
+        self.collection.create_index(
+            "dedupe_key", unique=True, partialFilterExpression={"active": True}
+        )
+
+    def enqueue(self, task: str, params: Dict = None, priority: int = 0,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, dedupe_key: str = None) -> str:
+        now = datetime.now()
+        job = {
+            "task": task,
+            "params": params or {},
+            "priority": priority,
+            "status": "queued",
+            "active": True,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now,
+            "progress": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+        if dedupe_key:
+            job["dedupe_key"] = dedupe_key
+        try:
+            return str(self.collection.insert_one(job).inserted_id)
+        except DuplicateKeyError:
+            existing = self.collection.find_one({"dedupe_key": dedupe_key, "active": True}, {"_id": 1})
+            if existing is None:
+                # the other job finished in between; try once more
+                return self.enqueue(task, params, priority, max_attempts, dedupe_key)
+            return str(existing["_id"])
+
+    def claim(self, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> Optional[Dict]:
+        now = datetime.now()
+        # jobs whose worker vanished after their last attempt are failed, not reclaimed
+        self.collection.update_many(
+            {"status": "running", "lease_until": {"$lt": now},
+             "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+            {"$set": {"status": "failed", "error": "lease expired", "finished_at": now, "updated_at": now},
+             "$unset": {"active": ""}}
+        )
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "running", "worker": worker_id, "started_at": now, "updated_at": now,
+                      "lease_until": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"attempts": 1}},
+            sort=[("priority", -1), ("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat(self, job_id, worker_id: str, progress: Dict = None,
+                  lease_seconds: int = LEASE_SECONDS) -> bool:
+        """Extend the lease (and record progress); False if the lease was lost"""
+        now = datetime.now()
+        fields = {"lease_until": now + timedelta(seconds=lease_seconds), "updated_at": now}
+        if progress is not None:
+            fields["progress"] = progress
+        result = self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": "running", "worker": worker_id}, {"$set": fields}
+        )
+        return result.matched_count == 1
+
+    def complete(self, job_id, worker_id: str, result=None):
+        now = datetime.now()
+        self.collection.update_one(
+            {"_id": ObjectId(job_id), "worker": worker_id},
+            {"$set": {"status": "succeeded", "result": result, "finished_at": now, "updated_at": now},
+             "$unset": {"active": "", "lease_until": ""}}
+        )
+
+    def fail(self, job_id, worker_id: str, error: str):
+        """Schedule a retry with backoff, or mark the job failed after max_attempts"""
+        now = datetime.now()
+        job = self.collection.find_one({"_id": ObjectId(job_id), "worker": worker_id})
+        if job is None:
+            return
+        if job["attempts"] < job["max_attempts"]:
+            update = {"$set": {"status": "queued", "error": error, "run_at": _retry_at(job["attempts"], now),
+                               "updated_at": now},
+                      "$unset": {"lease_until": ""}}
+        else:
+            update = {"$set": {"status": "failed", "error": error, "finished_at": now, "updated_at": now},
+                      "$unset": {"active": "", "lease_until": ""}}
+        self.collection.update_one({"_id": job["_id"], "worker": worker_id}, update)
+
+    def get(self, job_id) -> Optional[Dict]:
+        try:
+            return self.collection.find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            return None
+
+
+class SqliteJobQueue:
+    """Same interface as MongoJobQueue on a local SQLite file (one machine only)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    max_attempts INTEGER NOT NULL,
+                    run_at TEXT NOT NULL,
+                    lease_until TEXT,
+                    worker TEXT,
+                    dedupe_key TEXT,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, run_at)")
+            conn.execute("""CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key)
+                            WHERE status IN ('queued', 'running')""")
+
+    def _connect(self):
+        # autocommit mode; claims take an explicit write lock with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def _row(cursor, row) -> Dict:
+        job = {col[0]: value for col, value in zip(cursor.description, row)}
+        job["_id"] = job.pop("id")
+        for key in ("params", "progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] is not None else None
+        for key in ("run_at", "lease_until", "created_at", "started_at", "finished_at"):
+            job[key] = datetime.fromisoformat(job[key]) if job[key] else None
+        return job
+
+    def _fetch(self, conn, job_id) -> Optional[Dict]:
+        cursor = conn.execute("SELECT * FROM jobs WHERE id = ?", (str(job_id),))
+        row = cursor.fetchone()
+        return self._row(cursor, row) if row else None
+
+    def enqueue(self, task: str, params: Dict = None, priority: int = 0,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, dedupe_key: str = None) -> str:
+        now = datetime.now().isoformat()
+        job_id = str(ObjectId())
+        with closing(self._connect()) as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, task, params, priority, status, attempts, max_attempts, run_at,"
+                    " dedupe_key, progress, created_at) VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, '{}', ?)",
+                    (job_id, task, json.dumps(params or {}), priority, max_attempts, now, dedupe_key, now)
+                )
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')", (dedupe_key,)
+                ).fetchone()
+                if row is None:
+                    return self.enqueue(task, params, priority, max_attempts, dedupe_key)
+                return row[0]
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> Optional[Dict]:
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', finished_at = ?"
+                " WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now.isoformat(), now.isoformat())
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE (status = 'queued' AND run_at <= ?)"
+                " OR (status = 'running' AND lease_until < ?)"
+                " ORDER BY priority DESC, run_at LIMIT 1",
+                (now.isoformat(), now.isoformat())
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, lease_until = ?,"
+                " attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now.isoformat(), (now + timedelta(seconds=lease_seconds)).isoformat(), row[0])
+            )
+            job = self._fetch(conn, row[0])
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id, worker_id: str, progress: Dict = None,
+                  lease_seconds: int = LEASE_SECONDS) -> bool:
+        lease_until = (datetime.now() + timedelta(seconds=lease_seconds)).isoformat()
+        with closing(self._connect()) as conn:
+            if progress is not None:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_until = ?, progress = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                    (lease_until, json.dumps(progress), str(job_id), worker_id)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                    (lease_until, str(job_id), worker_id)
+                )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id: str, result=None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ?, lease_until = NULL"
+                " WHERE id = ? AND worker = ?",
+                (json.dumps(result, default=str), datetime.now().isoformat(), str(job_id), worker_id)
+            )
+
+    def fail(self, job_id, worker_id: str, error: str):
+        now = datetime.now()
+        with closing(self._connect()) as conn:
+            job = self._fetch(conn, job_id)
+            if job is None or job["worker"] != worker_id:
+                return
+            if job["attempts"] < job["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, run_at = ?, lease_until = NULL WHERE id = ?",
+                    (error, _retry_at(job["attempts"], now).isoformat(), str(job_id))
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                    (error, now.isoformat(), str(job_id))
+                )
+
+    def get(self, job_id) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            return self._fetch(conn, job_id)
+
+
+def get_queue():
+    """Process-wide queue for the configured JOB_STORE"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            from config import JOB_STORE, JOB_SQLITE_PATH
+            if JOB_STORE == "sqlite":
+                _queue = SqliteJobQueue(JOB_SQLITE_PATH)
+            else:
+                from db_help import db
+                _queue = MongoJobQueue(db.db['jobs'])
+        return _queue
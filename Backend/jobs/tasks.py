@@ -0,0 +1,139 @@
+"""
+Tasks the job worker can run.
+
+Each task is called as task(params, progress) in a worker process and returns
+a JSON-serialisable result; progress(done, total, message) reports progress
+(and keeps the job's lease alive).
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from pymongo import UpdateMany
+
+# Assessments / users handled between progress reports
+TASK_BATCH = 500
+
+
+def rescore_assessments(params: Dict, progress: Callable) -> Dict:
+    """
+    Recompute burnout score and risk level for every live assessment (after a
+    scoring change), update the matching burnout records, drop the affected
+    users' cached latest burnout and rebuild rollups. API processes notice the
+    bumped "burnout" version within READ_CACHE_EPOCH_CHECK seconds and drop
+    their local copies too.
+    With BURNOUT_LAYOUT=timeseries this needs MongoDB 7.0+ (earlier servers
+    can't update time-series measurements by a non-meta field).
+    params: user_id (optional, limit to one user)
+    """
+    from config import BURNOUT_LAYOUT
+    from db_help import db
+    from scoring import score_document
+
+    if BURNOUT_LAYOUT == "timeseries" and db.server_version() < (7, 0):
+        raise RuntimeError("rescoring time-series burnout records needs MongoDB 7.0+")
+    query = {"archived": {"$ne": True},
+             "$or": [{"answers": {"$exists": True}}, {"emotional_answers": {"$exists": True}}]}
+    if params.get("user_id"):
+        query["user_id"] = params["user_id"]
+    total = db.assessment_collection.count_documents(query)
+    done, updated, ops, users = 0, 0, [], set()
+
+    def flush():
+        nonlocal updated
+        if ops:
+            updated += db.burnout_collection.bulk_write(ops, ordered=False).modified_count
+            ops.clear()
+        for user_id in users:
+            db.cache.invalidate(f"burnout:{user_id}")
+        if users:
+            # other processes only hold local copies: tell them to drop them
+            db.bump_version("burnout")
+        users.clear()
+        progress(done, total, "rescoring assessments")
+
+    projection = {"user_id": 1, "answers": 1, "emotional_answers": 1}
+    for doc in db.assessment_collection.find(query, projection, batch_size=TASK_BATCH):
+        score, risk = score_document(doc)
+        ops.append(UpdateMany(
+            {"assessment_id": str(doc["_id"])},
+            {"$set": {"burnout_score": score, "risk_level": risk}}
+        ))
+        users.add(doc.get("user_id"))
+        done += 1
+        if len(ops) >= TASK_BATCH:
+            flush()
+    flush()
+    # safe while new scores are being stored: days are replaced only if unchanged
+    db.rebuild_burnout_rollups()
+    return {"assessments": done, "burnout_records_updated": updated}
+
+
+def rebuild_rollups(params: Dict, progress: Callable) -> Dict:
+    """Recompute the daily burnout rollups (backfill, or repair after failed $inc updates)"""
+    from db_help import db
+
+    progress(0, 1, "rebuilding burnout rollups")
+    days = db.rebuild_burnout_rollups()
+    progress(1, 1, "rebuilding burnout rollups")
+    return {"days": days}
+
+
+def reseed_therapists(params: Dict, progress: Callable) -> Dict:
+    """
+    Fetch therapists from the NPI registry.
+    params: force (default true; false only seeds when fewer than 100 exist)
+    """
+    from db_help import db
+
+    db._populate_therapists(force=params.get("force", True), progress=progress)
+    db._backfill_therapist_locations()
+    return {"therapists": db.therapist_collection.count_documents({})}
+
+
+def generate_plans(params: Dict, progress: Callable) -> Dict:
+    """
+    Batch wellness plan generation.
+    params: requests (ScheduleRequest dicts) - or next_week=true to regenerate
+    every stored plan for next Monday-Sunday with the user's saved preferences;
+    use_stored_burnout, store, workers (processes, default 1).
+    """
+    from db_help import db
+    from mental_planner.batch import run_batch
+    from mental_planner.models import ScheduleRequest
+
+    if params.get("next_week"):
+        today = datetime.now().date()
+        monday = today + timedelta(days=7 - today.weekday())
+        requests = [
+            ScheduleRequest(
+                start_date=monday.isoformat(),
+                end_date=(monday + timedelta(days=6)).isoformat(),
+                preferences=plan["request"].get("preferences", ""),
+                burnout_level=plan.get("burnout_level", 3.0),
+                user_id=plan["user_id"],
+            )
+            for plan in db.plan_collection.find({}, {"user_id": 1, "request": 1, "burnout_level": 1})
+        ]
+    else:
+        requests = [ScheduleRequest(**r) for r in params.get("requests", [])]
+
+    generated, failed = 0, 0
+    for start in range(0, len(requests), TASK_BATCH):
+        summaries = run_batch(
+            requests[start:start + TASK_BATCH], db,
+            use_stored_burnout=params.get("use_stored_burnout", True),
+            store=params.get("store", True),
+            workers=params.get("workers", 1),
+        )
+        failed += sum(1 for s in summaries if not s["success"])
+        generated += sum(1 for s in summaries if s["success"])
+        progress(generated + failed, len(requests), "generating plans")
+    return {"generated": generated, "failed": failed}
+
+
+TASKS = {
+    "rescore_assessments": rescore_assessments,
+    "rebuild_rollups": rebuild_rollups,
+    "reseed_therapists": reseed_therapists,
+    "generate_plans": generate_plans,
+}
@@ -0,0 +1,101 @@
+"""
+Job worker: claims jobs from the queue and runs them in a process pool.
+
+    python -m jobs.worker [--processes 4] [--poll 2]
+
+Run one or more of these next to the API. SIGINT/SIGTERM stop claiming new
+jobs and wait for the running ones to finish.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import multiprocessing
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from jobs.queue import LEASE_SECONDS, get_queue
+from jobs.tasks import TASKS
+
+# Minimum seconds between progress writes from one task
+PROGRESS_INTERVAL = 1.0
+
+
+def _run_task(job_id: str, task: str, params: dict, worker_id: str):
+    """Runs in a pool process (fresh interpreter: it opens its own DB connection)"""
+    queue = get_queue()
+    last_report = 0.0
+
+    def progress(done, total, message=None):
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < PROGRESS_INTERVAL and done < total:
+            return
+        last_report = now
+        queue.heartbeat(job_id, worker_id, {"done": done, "total": total, "message": message})
+
+    return TASKS[task](params, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--poll", type=float, default=2.0, help="seconds between queue polls when idle")
+    args = parser.parse_args(argv)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    queue = get_queue()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        print("🛑 Stopping: finishing running jobs")
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"👷 Worker {worker_id} running with {args.processes} processes")
+    running = {}
+    last_heartbeat = time.monotonic()
+    # spawn, not fork: a forked MongoClient is not safe to use
+    with ProcessPoolExecutor(args.processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while running or not stopping:
+            for future in [f for f in running if f.done()]:
+                job = running.pop(future)
+                try:
+                    queue.complete(job["_id"], worker_id, future.result())
+                    print(f"✅ {job['task']} {job['_id']} done")
+                except Exception as e:
+                    queue.fail(job["_id"], worker_id, f"{type(e).__name__}: {e}")
+                    print(f"❌ {job['task']} {job['_id']} failed (attempt {job['attempts']}): {e}")
+
+            # keep leases alive for tasks that report progress rarely
+            if time.monotonic() - last_heartbeat > LEASE_SECONDS / 3:
+                for job in running.values():
+                    if not queue.heartbeat(job["_id"], worker_id):
+                        print(f"⚠️ Lost lease on {job['task']} {job['_id']}")
+                last_heartbeat = time.monotonic()
+
+            while not stopping and len(running) < args.processes:
+                job = queue.claim(worker_id)
+                if job is None:
+                    break
+                if job["task"] not in TASKS:
+                    queue.fail(job["_id"], worker_id, f"Unknown task: {job['task']}")
+                    continue
+                print(f"▶️ {job['task']} {job['_id']} (attempt {job['attempts']})")
+                future = pool.submit(_run_task, str(job["_id"]), job["task"], job["params"], worker_id)
+                running[future] = job
+
+            if running:
+                wait(running, timeout=args.poll, return_when=FIRST_COMPLETED)
+            elif not stopping:
+                time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()
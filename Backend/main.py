@@ -3,12 +3,28 @@
 
 
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
+from datetime import datetime, timedelta
 from bson import ObjectId
-from config import CORS_ORIGINS
+from fastapi.concurrency import run_in_threadpool
+from config import (
+    CORS_ORIGINS, COMPRESSION_MIN_SIZE, RATE_LIMIT_STORE,
+    CHAT_RATE_CAPACITY, CHAT_RATE_PER_MINUTE, DASHBOARD_SOURCE_TIMEOUT
+)
+from http_cache import (
+    CompressionMiddleware, conditional_json, make_etag,
+    CACHE_STATIC, CACHE_SHARED, CACHE_PRIVATE, CACHE_NONE
+)
+import rate_limit
+from rate_limit import RateLimiter, SingleFlight
+import geo
+import rollups
+from scoring import score_assessment
 
 print("🚀 Starting InnovateHer API...")
 
@@ -19,6 +35,9 @@ except Exception as e:
     print(f"❌ Database connection failed: {e}")
     db = None
 
+if db is not None and RATE_LIMIT_STORE == "mongo":
+    rate_limit.use_mongo_store(db.db['rate_limits'])
+
 app = FastAPI(
     title="InnovateHer Mental Health API",
     description="API for mental health assessments, burnout tracking, and therapist discovery",
@@ -32,8 +51,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Compress JSON/ICS payloads above the size threshold (gzip, or brotli if installed)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # ============= REQUEST MODELS =============
 class AssessmentRequest(BaseModel):
     user_id: str
@@ -51,6 +74,20 @@ class TodoRequest(BaseModel):
     todos: List[Dict]
     burnout_score: float = 0
 
+class TodoPatch(BaseModel):
+    # fields to change, e.g. {"completed": true}
+    fields: Dict
+    # reject the change if the list moved past this version
+    version: Optional[int] = None
+
+class TodoItemPatch(BaseModel):
+    id: str
+    fields: Dict
+
+class TodoBatchPatch(BaseModel):
+    updates: List[TodoItemPatch]
+    version: Optional[int] = None
+
 # ============= HELPER FUNCTION =============
 def serialize_mongo_doc(doc):
     """Convert MongoDB ObjectId to string"""
@@ -146,23 +183,7 @@ def store_assessment(data: AssessmentRequest):
         assessment_id = db.store_assessment(data.user_id, data.emotional, data.life)
 
         # Compute burnout score server-side: average of provided ranking values
-        try:
-            values = [float(v) for v in (data.emotional or {}).values() if v is not None]
-            burnout_score = round(sum(values) / len(values), 2) if values else 0.0
-        except Exception:
-            burnout_score = 0.0
-
-        # Interpret risk level
-        def interpret_burnout(score: float) -> str:
-            if score < 2.0:
-                return "low"
-            if 2.0 <= score < 3.0:
-                return "moderate"
-            if 3.0 <= score < 4.0:
-                return "high"
-            return "critical"
-
-        risk = interpret_burnout(burnout_score)
+        burnout_score, risk = score_assessment(data.emotional)
 
         # Store burnout record alongside assessment
         try:
@@ -205,10 +226,11 @@ def store_todos(data: TodoRequest):
         raise HTTPException(status_code=503, detail="Database unavailable")
     
     try:
-        db.store_todo(data.user_id, data.todos, data.burnout_score)
+        version = db.store_todo(data.user_id, data.todos, data.burnout_score)
         return {
             "success": True,
             "todo_count": len(data.todos),
+            "version": version,
             "message": "Todos stored successfully"
         }
     except Exception as e:
@@ -231,21 +253,72 @@ def get_burnout(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch burnout: {str(e)}")
 
-@app.get("/assessments/{user_id}", tags=["Assessments"])
-def get_assessments(user_id: str, limit: int = 10):
-    """Get user's assessment history"""
+@app.get("/burnout/{user_id}/trend", tags=["Burnout"])
+def get_burnout_trend(user_id: str, days: int = 30, bucket: str = "day"):
+    """
+    Get user's burnout trend
+    
+    - **days**: How far back to look (default: 30)
+    - **bucket**: Group scores by day, week or month (default: day)
+    """
     if db is None:
         raise HTTPException(status_code=503, detail="Database unavailable")
+    if bucket not in ("day", "week", "month"):
+        raise HTTPException(status_code=400, detail="bucket must be day, week or month")
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="days must be positive")
     
     try:
-        assessments = db.get_user_assessments(user_id, limit)
-        # Serialize MongoDB documents
-        assessments = serialize_mongo_doc(assessments)
+        points = db.get_burnout_trend(user_id, days, bucket)
         return {
             "user_id": user_id,
-            "count": len(assessments),
-            "assessments": assessments
+            "days": days,
+            "bucket": bucket,
+            "points": points
         }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch burnout trend: {str(e)}")
+
+@app.get("/assessments/{user_id}", tags=["Assessments"])
+def get_assessments(user_id: str, request: Request, limit: int = 10, before: str = None, include: str = None):
+    """
+    Get user's assessment history, newest first
+    
+    - **limit**: Maximum number of results (default: 10)
+    - **before**: Only assessments older than this ISO timestamp; pass the
+      previous page's `next_before` to page back into archived history
+    - **include**: `transcripts` to also return the life-question answers
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    try:
+        before_dt = datetime.fromisoformat(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="before must be an ISO timestamp")
+    includes = {part.strip() for part in (include or "").split(",") if part.strip()}
+    if includes - {"transcripts"}:
+        raise HTTPException(status_code=400, detail="include supports: transcripts")
+    include_transcripts = "transcripts" in includes
+    
+    try:
+        # ETag from the newest assessment timestamp; no body query on a 304
+        etag = make_etag("assessments", user_id, db.get_latest_assessment_time(user_id), limit, before,
+                         include_transcripts)
+
+        def build():
+            assessments = db.get_user_assessments(user_id, limit, before_dt, include_transcripts)
+            next_before = assessments[-1]["timestamp"].isoformat() if len(assessments) == limit else None
+            # Serialize MongoDB documents
+            assessments = serialize_mongo_doc(assessments)
+            return {
+                "user_id": user_id,
+                "count": len(assessments),
+                "assessments": assessments,
+                "next_before": next_before
+            }
+
+        return conditional_json(request, etag, CACHE_PRIVATE, build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch assessments: {str(e)}")
 
@@ -256,17 +329,64 @@ def get_todos(user_id: str):
         raise HTTPException(status_code=503, detail="Database unavailable")
     
     try:
-        todos = db.get_user_todos(user_id)
+        todo_list = db.get_todo_list(user_id)
         return {
             "user_id": user_id,
-            "count": len(todos),
-            "todos": todos
+            "count": len(todo_list["todos"]),
+            "version": todo_list["version"],
+            "todos": todo_list["todos"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch todos: {str(e)}")
 
+def _apply_todo_updates(user_id: str, updates: Dict[str, Dict], version: Optional[int]):
+    for changes in updates.values():
+        bad = [f for f in changes if f == "id" or f == "_id" or not f.isidentifier()]
+        if bad or not changes:
+            raise HTTPException(status_code=400, detail=f"Invalid todo fields: {bad or 'none given'}")
+    try:
+        result = db.update_todos(user_id, updates, version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update todos: {str(e)}")
+    if result is None:
+        # the cache may still hold the list from before a concurrent write
+        current = db.get_todo_list(user_id, cached=False)
+        known = {todo["id"] for todo in current["todos"]}
+        missing = [todo_id for todo_id in updates if todo_id not in known]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Todos not found: {missing}")
+        raise HTTPException(status_code=409, detail=f"Todos are at version {current['version']}")
+    return result
+
+@app.patch("/todos/{user_id}/{todo_id}", tags=["Todos"])
+def patch_todo(user_id: str, todo_id: str, data: TodoPatch):
+    """
+    Change fields of one todo (e.g. tick it off) without resending the list
+    
+    - **version**: Optional; 409 if the list changed since that version
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    todos, version = _apply_todo_updates(user_id, {todo_id: data.fields}, data.version)
+    return {"success": True, "user_id": user_id, "todo": todos[0], "version": version}
+
+@app.patch("/todos/{user_id}", tags=["Todos"])
+def patch_todos(user_id: str, data: TodoBatchPatch):
+    """Change fields of several todos in one atomic update"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    if not data.updates:
+        raise HTTPException(status_code=400, detail="No updates given")
+
+    updates = {}
+    for item in data.updates:
+        updates.setdefault(item.id, {}).update(item.fields)
+    todos, version = _apply_todo_updates(user_id, updates, data.version)
+    return {"success": True, "user_id": user_id, "todos": todos, "version": version}
+
 @app.get("/therapists", tags=["Therapists"])
-def get_therapists(city: str = None, category: str = None, limit: int = 10):
+def get_therapists(request: Request, city: str = None, category: str = None, limit: int = 10):
     """
     Search for therapists in Indiana
     
@@ -278,30 +398,86 @@ def get_therapists(city: str = None, category: str = None, limit: int = 10):
         raise HTTPException(status_code=503, detail="Database unavailable")
     
     try:
-        therapists = db.get_therapists(city, category, limit)
-        
-        # Serialize MongoDB ObjectIds
-        therapists = serialize_mongo_doc(therapists)
-        
-        return {
-            "count": len(therapists),
-            "filters": {
-                "city": city,
-                "category": category,
-                "limit": limit
-            },
-            "therapists": therapists
-        }
+        # ETag from the therapist collection version counter (bumped on re-seed)
+        etag = make_etag("therapists", db.get_version("therapists"), city, category, limit)
+
+        def build():
+            therapists = db.get_therapists(city, category, limit)
+            
+            # Serialize MongoDB ObjectIds
+            therapists = serialize_mongo_doc(therapists)
+            
+            return {
+                "count": len(therapists),
+                "filters": {
+                    "city": city,
+                    "category": category,
+                    "limit": limit
+                },
+                "therapists": therapists
+            }
+
+        return conditional_json(request, etag, CACHE_SHARED, build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch therapists: {str(e)}")
 
+@app.get("/therapists/nearby", tags=["Therapists"])
+def get_nearby_therapists(request: Request, zip: str, radius: float = 25, category: str = None, limit: int = 10):
+    """
+    Find the closest therapists to an Indiana ZIP code
+    
+    - **zip**: 5-digit ZIP code to search from
+    - **radius**: Search radius in miles (default: 25)
+    - **category**: Filter by type (Psychiatrist, Psychologist, Social Worker, Counselor, Marriage Therapist)
+    - **limit**: Maximum number of results (default: 10)
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    centroid = geo.zip_centroid(zip)
+    if centroid is None:
+        raise HTTPException(status_code=404, detail=f"Unknown Indiana ZIP code: {zip}")
+    if radius <= 0 or limit <= 0:
+        raise HTTPException(status_code=400, detail="radius and limit must be positive")
+    lat, lon, city = centroid
+
+    try:
+        etag = make_etag("therapists-nearby", db.get_version("therapists"), zip, radius, category, limit)
+
+        def build():
+            therapists = db.find_nearby_therapists(lat, lon, radius, category, limit)
+            for t in therapists:
+                t["distance_miles"] = round(t["distance_miles"], 1)
+            therapists = serialize_mongo_doc(therapists)
+
+            return {
+                "count": len(therapists),
+                "origin": {"zip": zip, "city": city, "lat": lat, "lon": lon},
+                "filters": {
+                    "radius_miles": radius,
+                    "category": category,
+                    "limit": limit
+                },
+                "therapists": therapists
+            }
+
+        return conditional_json(request, etag, CACHE_SHARED, build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch nearby therapists: {str(e)}")
+
 @app.get("/therapist-categories", tags=["Therapists"])
-def get_therapist_categories():
+def get_therapist_categories(request: Request):
     """Get list of available therapist categories"""
-    return {
-        "categories": list(db.CATEGORIES.keys()) if db else [],
-        "description": "Use these categories to filter therapist searches"
-    }
+    categories = list(db.CATEGORIES.keys()) if db else []
+    return conditional_json(
+        request,
+        make_etag("therapist-categories", *categories),
+        CACHE_STATIC,
+        lambda: {
+            "categories": categories,
+            "description": "Use these categories to filter therapist searches"
+        }
+    )
 
 @app.get("/stats", tags=["Statistics"])
 def get_statistics():
@@ -315,7 +491,8 @@ def get_statistics():
             "total_assessments": db.assessment_collection.count_documents({}),
             "total_burnout_records": db.burnout_collection.count_documents({}),
             "total_therapists": db.therapist_collection.count_documents({}),
-            "therapists_by_category": {}
+            "therapists_by_category": {},
+            "read_cache": db.cache.stats()
         }
         
         # Count therapists by category
@@ -327,6 +504,39 @@ def get_statistics():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch statistics: {str(e)}")
 
+@app.get("/stats/burnout", tags=["Statistics"])
+def get_burnout_statistics(start: str = Query(None, alias="from"), end: str = Query(None, alias="to"),
+                           granularity: str = "day"):
+    """
+    Population burnout statistics from the daily rollups
+    
+    - **from** / **to**: Date range (YYYY-MM-DD, inclusive; default: last 30 days)
+    - **granularity**: Group days by day, week or month (default: day)
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    if granularity not in ("day", "week", "month"):
+        raise HTTPException(status_code=400, detail="granularity must be day, week or month")
+
+    try:
+        end_day = datetime.strptime(end, rollups.DAY_FORMAT) if end else datetime.now()
+        start_day = datetime.strptime(start, rollups.DAY_FORMAT) if start else end_day - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from and to must be YYYY-MM-DD")
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+
+    try:
+        merged = rollups.merge_rollups(db.get_burnout_rollups(start_day, end_day), granularity)
+        return {
+            "start": start_day.strftime(rollups.DAY_FORMAT),
+            "end": end_day.strftime(rollups.DAY_FORMAT),
+            "granularity": granularity,
+            **merged
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch burnout statistics: {str(e)}")
+
 
 #Mental Planner MAIN
         
@@ -338,29 +548,192 @@ app.include_router(mental_planner_router)
 #CHATBOT MAIN
 # --- Chatbot integration ---
 from chatbot.gemini_client import generate_supportive_reply
-from chatbot.resources import CRISIS_RESPONSE
-from chatbot.safety import assess_risk
-from chatbot.models import ChatRequest, ChatResponse, conversation_history, MAX_HISTORY
+from chatbot.resources import CRISIS_RESPONSE, CRISIS_RESOURCES
+from chatbot.safety import ConversationRisk
+from chatbot.intents import router as intent_router
+from chatbot.models import ChatRequest, ChatResponse, conversation_history, conversation_risk, MAX_HISTORY
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chatbot"])
-def chat(req: ChatRequest):
-    risk = assess_risk(req.message)
+chat_limiter = RateLimiter("chat", CHAT_RATE_CAPACITY, CHAT_RATE_PER_MINUTE)
+chat_flight = SingleFlight()
 
-    if risk == "high":
-        return ChatResponse(reply=CRISIS_RESPONSE, risk_level="high")
+def _remember(req: ChatRequest, reply: str, risk: str) -> ChatResponse:
+    history = conversation_history.get(req.user_id, [])
+    history.append({"role": "user", "text": req.message})
+    history.append({"role": "bot", "text": reply})
+    conversation_history[req.user_id] = history[-MAX_HISTORY:]
+    return ChatResponse(reply=reply, risk_level=risk)
 
+def _chat_reply(req: ChatRequest, risk: str) -> ChatResponse:
     # Conversation memory
     history = conversation_history.get(req.user_id, [])
 
     # Generate AI response
     reply = generate_supportive_reply(req.message, conversation_history=history)
+    if risk == "elevated":
+        # risk has been building up over several messages: surface support options
+        reply = f"{reply}\n{CRISIS_RESOURCES}"
+
+    return _remember(req, reply, risk)
+
+@app.post("/chat", response_model=ChatResponse, tags=["Chatbot"])
+async def chat(req: ChatRequest):
+    # Risk is tracked across the whole conversation, updated once per message
+    state = conversation_risk.setdefault(req.user_id, ConversationRisk())
+    risk = state.update(req.message)
+
+    # Crisis replies are never rate limited
+    if risk == "high":
+        return ChatResponse(reply=CRISIS_RESPONSE, risk_level="high")
+
+    # Greetings and resource lookups (low risk only) are answered locally, without Gemini
+    local_reply = intent_router.route(req.message, risk)
+    if local_reply is not None:
+        return _remember(req, local_reply, risk)
+
+    await chat_limiter.check(req.user_id)
+
+    # Identical concurrent messages (double submits) share one Gemini call
+    return await chat_flight.do(
+        f"{req.user_id}\x00{req.message}",
+        lambda: run_in_threadpool(_chat_reply, req, risk)
+    )
+
+
+@app.get("/chat/stats", tags=["Chatbot"])
+def chat_stats():
+    """How many chat messages were answered locally vs sent to Gemini (this process)"""
+    return intent_router.stats()
 
-    # Update memory
-    history.append({"role": "user", "text": req.message})
-    history.append({"role": "bot", "text": reply})
-    conversation_history[req.user_id] = history[-MAX_HISTORY:]
 
-    return ChatResponse(reply=reply, risk_level="low")
+#DATA EXPORT
+import export
+
+@app.get("/users/{user_id}/export", tags=["Users"])
+def export_user_data(user_id: str, gzip: bool = False):
+    """
+    Download everything stored about a user as NDJSON, one record per line
+    
+    - **gzip**: Return a gzip-compressed .ndjson.gz file
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    records = export.iter_user_records(db, user_id, conversation_history.get(user_id))
+    return StreamingResponse(
+        export.iter_ndjson(records, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.export_filename(user_id, gzip)}"',
+            "Cache-Control": CACHE_NONE
+        }
+    )
+
+
+#DASHBOARD
+# therapist type suggested for each risk level
+SUGGESTED_CATEGORIES = {
+    "low": "Counselor",
+    "moderate": "Counselor",
+    "high": "Psychologist",
+    "critical": "Psychiatrist",
+}
+
+@app.get("/dashboard/{user_id}", tags=["Users"])
+async def get_dashboard(user_id: str, zip: str = None, assessments: int = 3, therapists: int = 3):
+    """
+    Everything the post-login view needs in one request: latest burnout,
+    todos, recent assessments and therapist suggestions for the user's risk level.
+    Sources are fetched concurrently; one that is slow or failing is left out
+    (null, named in "missing") instead of failing the page.
+    
+    - **zip**: Suggest the nearest therapists to this Indiana ZIP code
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    centroid = geo.zip_centroid(zip) if zip else None
+    if zip and centroid is None:
+        raise HTTPException(status_code=404, detail=f"Unknown Indiana ZIP code: {zip}")
+
+    async def fetch(fn, *args):
+        return await asyncio.wait_for(run_in_threadpool(fn, *args), DASHBOARD_SOURCE_TIMEOUT)
+
+    burnout_task = asyncio.ensure_future(fetch(db.get_latest_burnout, user_id))
+
+    # one deadline for the whole chain (burnout, then therapists), so the
+    # page never waits longer than DASHBOARD_SOURCE_TIMEOUT for suggestions
+    async def suggestions():
+        # suggestions depend on the risk level: wait for burnout (low risk if it's missing)
+        try:
+            _, risk = await asyncio.shield(burnout_task)
+        except Exception:
+            risk = "low"
+        category = SUGGESTED_CATEGORIES.get(risk, "Counselor")
+        if centroid:
+            found = await run_in_threadpool(db.find_nearby_therapists, centroid[0], centroid[1], 25, category, therapists)
+            for t in found:
+                t["distance_miles"] = round(t["distance_miles"], 1)
+        else:
+            found = await run_in_threadpool(db.get_therapists, None, category, therapists)
+        return {"category": category, "therapists": serialize_mongo_doc(found)}
+
+    names = ["burnout", "todos", "assessments", "suggestions"]
+    results = await asyncio.gather(
+        burnout_task,
+        fetch(db.get_todo_list, user_id),
+        fetch(db.get_recent_assessments, user_id, assessments),
+        asyncio.wait_for(suggestions(), DASHBOARD_SOURCE_TIMEOUT),
+        return_exceptions=True
+    )
+    data, missing = {}, {}
+    for i, result in enumerate(results):
+        name = names[i]
+        if isinstance(result, Exception):
+            missing[name] = "timeout" if isinstance(result, asyncio.TimeoutError) else "error"
+            print(f"⚠️ Dashboard {name} for {user_id} unavailable: {result!r}")
+            data[name] = None
+        else:
+            data[name] = result
+
+    burnout = data["burnout"]
+    return {
+        "user_id": user_id,
+        "burnout": {"burnout_score": burnout[0], "risk_level": burnout[1]} if burnout else None,
+        "todos": data["todos"],
+        "recent_assessments": data["assessments"],
+        "suggestions": data["suggestions"],
+        "missing": missing
+    }
+
+
+#BACKGROUND JOBS
+# run workers with: python -m jobs.worker
+from jobs.queue import get_queue, public_view
+
+if db is not None and db.needs_therapist_seed():
+    try:
+        get_queue().enqueue("reseed_therapists", {"force": False}, priority=10,
+                            dedupe_key="reseed_therapists")
+        print("📥 Therapist seeding queued (needs a running job worker)")
+    except Exception as e:
+        print(f"⚠️ Could not queue therapist seeding: {e}")
+
+if db is not None and db.needs_rollup_backfill():
+    try:
+        get_queue().enqueue("rebuild_rollups", {}, priority=5, dedupe_key="rebuild_rollups")
+        print("📥 Burnout rollup backfill queued (needs a running job worker)")
+    except Exception as e:
+        print(f"⚠️ Could not queue burnout rollup backfill: {e}")
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+def get_job(job_id: str):
+    """Status, progress and result of a background job"""
+    try:
+        job = get_queue().get(job_id)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_view(job)
 
 
 print("✅ FastAPI routes registered successfully")
@@ -0,0 +1,154 @@
+"""
+Batch wellness plan generation for many users (e.g. the weekly coaching run).
+
+Each user's latest burnout score is read from `burnout_scores` in a single
+aggregation, the deterministic planner runs across a process pool, and plans
+are written to `wellness_plans` (and optionally .ics files) in bulk.
+
+CLI:
+    python -m mental_planner.batch requests.json --out-dir plans/ --workers 8
+where requests.json is a JSON list (or NDJSON) of ScheduleRequest objects.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List
+
+from config import PLANNER_BATCH_WORKERS
+from .models import ScheduleRequest
+from .plans import plan_document
+from .schedule import plan_heuristic
+
+# Plans are flushed to MongoDB in groups of this size
+WRITE_CHUNK = 500
+
+
+def _plan_worker(item) -> dict:
+    """Runs in a worker process: (request dict, burnout override) -> plan or error"""
+    payload, burnout_level = item
+    try:
+        request = ScheduleRequest(**payload)
+        plan = plan_heuristic(request, burnout_level)
+        calendar_events = [e.model_dump() for e in request.calendar_events or []]
+        plan["plan"] = plan_document(request, plan["schedule"], calendar_events)
+    except Exception as e:
+        return {"user_id": payload.get("user_id"), "error": str(e)}
+    return {"user_id": request.user_id, **plan}
+
+
+def _summary(result: dict) -> dict:
+    if "error" in result:
+        return {"user_id": result["user_id"], "success": False, "error": result["error"]}
+    summary = result["schedule"]["schedule_summary"]
+    return {
+        "user_id": result["user_id"],
+        "success": True,
+        "burnout_level": summary["burnout_level"],
+        "interpreted_burnout_category": summary["interpreted_burnout_category"],
+        "total_events_created": summary["total_events_created"]
+    }
+
+
+def _ics_filename(user_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.@-]", "_", user_id) + ".ics"
+
+
+def run_batch(requests: List[ScheduleRequest], db=None, use_stored_burnout: bool = True,
+              store: bool = True, workers: int = None, out_dir: str = None) -> List[dict]:
+    """
+    Generate plans for many users. Returns one summary per request (plans
+    themselves go to the database / out_dir, not the return value).
+    """
+    burnouts = {}
+    if db is not None and use_stored_burnout:
+        burnouts = db.get_latest_burnouts([r.user_id for r in requests if r.user_id])
+
+    items = []
+    for r in requests:
+        stored = burnouts.get(r.user_id)
+        # stored scores are averages of 1-5 answers; clamp into the planner's range
+        level = min(5.0, max(1.0, float(stored[0]))) if stored else None
+        items.append((r.model_dump(), level))
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    summaries, pending = [], []
+
+    def flush():
+        if store and db is not None and pending:
+            db.store_plans(pending)
+        pending.clear()
+
+    def consume(results: Iterable[dict]):
+        for result in results:
+            summaries.append(_summary(result))
+            if "error" in result or not result["user_id"]:
+                continue
+            if out_dir:
+                with open(os.path.join(out_dir, _ics_filename(result["user_id"])), "w", encoding="utf-8") as f:
+                    f.write(result["ics_content"])
+            pending.append(result["plan"])
+            if len(pending) >= WRITE_CHUNK:
+                flush()
+
+    workers = workers or PLANNER_BATCH_WORKERS
+    if workers <= 1 or len(items) < 2:
+        consume(_plan_worker(item) for item in items)
+    else:
+        chunksize = max(1, len(items) // (workers * 4))
+        # spawn: forked children would inherit the parent's MongoClient and threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            consume(pool.map(_plan_worker, items, chunksize=chunksize))
+    flush()
+    return summaries
+
+
+def _load_requests(path: str) -> List[ScheduleRequest]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [ScheduleRequest(**row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate wellness plans for many users")
+    parser.add_argument("requests", help="JSON list or NDJSON file of ScheduleRequest objects")
+    parser.add_argument("--out-dir", help="write one .ics file per user here")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-store", action="store_true", help="do not write plans to MongoDB")
+    parser.add_argument("--client-burnout", action="store_true",
+                        help="use burnout_level from the requests instead of stored scores")
+    args = parser.parse_args(argv)
+
+    try:
+        from db_help import db
+    except Exception as e:
+        print(f"⚠️ Database unavailable, continuing without it: {e}")
+        db = None
+
+    summaries = run_batch(
+        _load_requests(args.requests),
+        db=db,
+        use_stored_burnout=not args.client_burnout,
+        store=not args.no_store,
+        workers=args.workers,
+        out_dir=args.out_dir,
+    )
+    failed = [s for s in summaries if not s["success"]]
+    print(f"✅ Generated {len(summaries) - len(failed)} plans, {len(failed)} failed")
+    for s in failed:
+        print(f"❌ {s['user_id']}: {s['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Gemini-backed schedule generation with structured output, validation and a
+deterministic fallback.
+
+The model is asked for JSON matching RESPONSE_SCHEMA; every returned event is
+then checked against the requested date range and the user's existing
+calendar before it is accepted. If the model is not configured, errors, runs
+past the latency budget, or returns nothing usable, the heuristic plan is
+returned instead, so the endpoint's latency stays bounded by the budget.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import google.generativeai as genai
+from fastapi.concurrency import run_in_threadpool
+
+from config import GEMINI_API_KEY, PLANNER_LLM_BUDGET_SECONDS
+from .preferences import PlannerConstraints
+from .prompts import build_gemini_prompt
+from .schedule import BusyTimes, build_heuristic_events, parse_wall_time, TIME_FORMAT
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Event types the planner may create, with accepted aliases
+ALLOWED_TYPES = {
+    "meditation": "meditation",
+    "journaling": "journaling",
+    "affirmations": "affirmations",
+    "affirmation": "affirmations",
+    "rest": "rest",
+}
+MAX_EVENT_MINUTES = 120
+# Keep a small gap between wellness events and existing meetings
+MEETING_GAP = timedelta(minutes=10)
+
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "schedule_summary": {
+            "type": "object",
+            "properties": {
+                "interpreted_burnout_category": {"type": "string"},
+                "reason": {"type": "string"},
+            },
+        },
+        "events": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "type": {"type": "string"},
+                    "start": {"type": "string"},
+                    "end": {"type": "string"},
+                    "notes": {"type": "string"},
+                },
+                "required": ["title", "type", "start", "end"],
+            },
+        },
+    },
+    "required": ["events"],
+}
+
+_model = None
+
+
+def get_model():
+    """Lazily build the structured-output model (None when no API key)"""
+    global _model
+    if _model is None and GEMINI_API_KEY:
+        try:
+            genai.configure(api_key=GEMINI_API_KEY)
+            _model = genai.GenerativeModel(
+                MODEL_NAME,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=RESPONSE_SCHEMA,
+                ),
+            )
+        except Exception as e:
+            print(f"⚠️ Gemini planner initialization failed: {e}")
+            _model = None
+    return _model
+
+
+async def request_gemini_plan(request, calendar_events: List[dict]) -> dict:
+    """Call Gemini asynchronously and return the parsed JSON payload"""
+    prompt = build_gemini_prompt(
+        request.start_date,
+        request.end_date,
+        request.preferences,
+        calendar_events,
+        request.burnout_level,
+    )
+    response = await get_model().generate_content_async(prompt)
+    return json.loads(response.text)
+
+
+def validate_events(raw_events, start: datetime, end: datetime, busy: BusyTimes,
+                    constraints: PlannerConstraints) -> List[dict]:
+    """
+    Keep only events that parse, fall inside [start, end], have a sane
+    duration and allowed type, respect the locally parsed preference
+    constraints, and overlap neither the existing calendar nor each other.
+    Accepted events are normalized to the heuristic shape.
+    """
+    busy = busy.copy()
+    range_end = end + timedelta(days=1)
+    accepted = []
+    for evt in raw_events or []:
+        try:
+            evt_start = parse_wall_time(evt["start"])
+            evt_end = parse_wall_time(evt["end"])
+            etype = ALLOWED_TYPES.get(str(evt["type"]).strip().lower())
+            title = str(evt["title"]).strip()
+        except Exception:
+            continue
+        if etype is None or not title:
+            continue
+        if not (start <= evt_start and evt_end <= range_end):
+            continue
+        if not (timedelta(0) < evt_end - evt_start <= timedelta(minutes=MAX_EVENT_MINUTES)):
+            continue
+        if not constraints.allows_day(evt_start) or constraints.dislikes(etype):
+            continue
+        if not constraints.allows(evt_start, evt_end):
+            continue
+        if busy.overlaps(evt_start - MEETING_GAP, evt_end + MEETING_GAP):
+            continue
+
+        busy.add(evt_start, evt_end)
+        accepted.append({
+            "title": title,
+            "type": etype,
+            "start": evt_start.strftime(TIME_FORMAT),
+            "end": evt_end.strftime(TIME_FORMAT),
+            "notes": str(evt.get("notes") or "")
+        })
+    accepted.sort(key=lambda e: e["start"])
+    return accepted
+
+
+async def plan_with_fallback(request, start: datetime, end: datetime, category: str,
+                             constraints: PlannerConstraints, busy: BusyTimes, calendar_events: List[dict],
+                             budget: float = PLANNER_LLM_BUDGET_SECONDS) -> Tuple[List[dict], str, Optional[str]]:
+    """
+    Hedged planning: start the Gemini call, build the heuristic plan while it
+    runs, and wait for the model only for what is left of `budget`.
+    Gemini is skipped when the rule parser understood all of the preferences.
+    Returns (events, source, reason) where source is "gemini" or "heuristic".
+    """
+    if not constraints.needs_llm:
+        return build_heuristic_events(start, end, category, constraints, busy), "heuristic", None
+    if get_model() is None:
+        return build_heuristic_events(start, end, category, constraints, busy), "heuristic", "model not configured"
+
+    began = time.monotonic()
+    llm_task = asyncio.ensure_future(request_gemini_plan(request, calendar_events))
+    # in a thread, so the event loop sends the model request while the fallback is built
+    fallback = await run_in_threadpool(build_heuristic_events, start, end, category, constraints, busy)
+
+    remaining = max(0.0, budget - (time.monotonic() - began))
+    try:
+        # wait_for cancels the model call once the budget is spent
+        data = await asyncio.wait_for(llm_task, timeout=remaining)
+    except asyncio.TimeoutError:
+        return fallback, "heuristic", "model exceeded latency budget"
+    except Exception as e:
+        print(f"Gemini planner failed: {e}")
+        return fallback, "heuristic", "model error"
+
+    raw_events = data.get("events") if isinstance(data, dict) else None
+    if not isinstance(raw_events, list):
+        return fallback, "heuristic", "model returned invalid JSON"
+
+    events = validate_events(raw_events, start, end, busy, constraints)
+    if not events:
+        return fallback, "heuristic", "no model events passed validation" if raw_events else "model returned no events"
+
+    reason = (data.get("schedule_summary") or {}).get("reason")
+    return events, "gemini", reason
@@ -0,0 +1,150 @@
+"""
+ICS calendar export for wellness plans.
+
+The planner's slot tables produce the same activity at the same time on a
+regular rhythm (daily, every N days, or on fixed weekdays). Such events are
+collapsed into one VEVENT with an RRULE, and days skipped because of
+calendar conflicts become EXDATEs, instead of one VEVENT per occurrence.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import reduce
+from math import gcd
+from typing import Dict, List, Optional, Tuple
+from icalendar import Calendar, Event
+import uuid
+
+_CAL_FOOTER = "END:VCALENDAR\r\n"
+
+
+def _calendar_header() -> str:
+    cal = Calendar()
+    cal.add('prodid', '-//CalmHer Mental Planner//EN')
+    cal.add('version', '2.0')
+    cal.add('calscale', 'GREGORIAN')
+    cal.add('method', 'PUBLISH')
+    cal.add('x-wr-calname', 'CalmHer Wellness Plan')
+    cal.add('x-wr-timezone', 'UTC')
+    cal.add('x-wr-caldesc', 'Your personalized wellness schedule with activities and original calendar events')
+    return cal.to_ical().decode('utf-8')[:-len(_CAL_FOOTER)]
+
+
+# The VCALENDAR header is identical for every plan; serialize it once per process
+_CAL_HEADER = _calendar_header()
+
+
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def find_recurrence(dates: List[date]) -> Optional[Tuple[dict, List[date]]]:
+    """
+    Best recurrence rule for sorted, unique dates: (rrule, exdates), or None
+    when a series would not be smaller than listing the dates.
+
+    Candidates are DAILY with INTERVAL = gcd of the gaps, and WEEKLY on the
+    weekdays that occur; the one needing fewest EXDATEs wins.
+    """
+    if len(dates) < 2:
+        return None
+    first, last = dates[0], dates[-1]
+    actual = set(dates)
+    span = (last - first).days
+    candidates = []
+
+    step = reduce(gcd, ((d - first).days for d in dates[1:]))
+    expected = [first + timedelta(days=i) for i in range(0, span + 1, step)]
+    rule = {"freq": "daily", "count": len(expected)}
+    if step > 1:
+        rule["interval"] = step
+    candidates.append((rule, [d for d in expected if d not in actual]))
+
+    weekdays = sorted({d.weekday() for d in dates})
+    if 1 < len(weekdays) < 7:
+        expected = [first + timedelta(days=i) for i in range(span + 1)
+                    if (first + timedelta(days=i)).weekday() in weekdays]
+        rule = {"freq": "weekly", "byday": [WEEKDAY_CODES[w] for w in weekdays], "count": len(expected)}
+        candidates.append((rule, [d for d in expected if d not in actual]))
+
+    rule, exdates = min(candidates, key=lambda c: len(c[1]))
+    if len(exdates) >= len(dates) - 1:
+        return None
+    return rule, exdates
+
+
+def group_recurring(events: List[dict]) -> List[Tuple[dict, List[date]]]:
+    """
+    Group events that differ only by date: [(template event, dates)].
+    Template fields other than the date are shared by every occurrence.
+    """
+    groups: Dict[tuple, List[date]] = defaultdict(list)
+    templates = {}
+    for evt in events:
+        start = datetime.fromisoformat(evt['start'])
+        end = datetime.fromisoformat(evt['end'])
+        key = (evt['title'], evt.get('notes', ''), start.time(), end - start)
+        groups[key].append(start.date())
+        templates.setdefault(key, evt)
+    return [(templates[key], sorted(set(dates))) for key, dates in groups.items()]
+
+
+def _wellness_event(evt: dict, dtstamp: datetime, start: datetime = None, end: datetime = None) -> Event:
+    event = Event()
+    event.add('summary', evt['title'])
+    event.add('description', evt.get('notes', ''))
+    event.add('dtstart', start or datetime.fromisoformat(evt['start']))
+    event.add('dtend', end or datetime.fromisoformat(evt['end']))
+    event.add('uid', f"{uuid.uuid4()}@calmher.local")
+    event.add('dtstamp', dtstamp)
+    # Add color category for wellness events
+    event.add('categories', 'Wellness')
+    return event
+
+
+def generate_ics_content(events: List[dict], existing_events: List[dict] = None,
+                         compress_recurring: bool = True) -> str:
+    """Generate ICS calendar file content with all events"""
+    parts = [_CAL_HEADER]
+    dtstamp = datetime.now()
+
+    # Add new wellness events, collapsing regular repeats into RRULE series
+    if compress_recurring:
+        for template, dates in group_recurring(events):
+            t_start = datetime.fromisoformat(template['start'])
+            duration = datetime.fromisoformat(template['end']) - t_start
+            recurrence = find_recurrence(dates)
+            if recurrence is None:
+                for d in dates:
+                    start = datetime.combine(d, t_start.time())
+                    parts.append(_wellness_event(template, dtstamp, start, start + duration).to_ical().decode('utf-8'))
+                continue
+            rule, exdates = recurrence
+            start = datetime.combine(dates[0], t_start.time())
+            event = _wellness_event(template, dtstamp, start, start + duration)
+            event.add('rrule', rule)
+            if exdates:
+                event.add('exdate', [datetime.combine(d, t_start.time()) for d in exdates])
+            parts.append(event.to_ical().decode('utf-8'))
+    else:
+        for evt in events:
+            parts.append(_wellness_event(evt, dtstamp).to_ical().decode('utf-8'))
+
+    # Add original calendar events if provided
+    if existing_events:
+        for evt in existing_events:
+            try:
+                event = Event()
+                event.add('summary', evt.get('title', 'Event'))
+                event.add('description', evt.get('description', ''))
+                if 'start' in evt:
+                    event.add('dtstart', datetime.fromisoformat(evt['start']))
+                if 'end' in evt:
+                    event.add('dtend', datetime.fromisoformat(evt['end']))
+                event.add('uid', f"{uuid.uuid4()}@calmher.local")
+                event.add('dtstamp', dtstamp)
+                event.add('categories', 'Original')
+                parts.append(event.to_ical().decode('utf-8'))
+            except Exception:
+                continue
+
+    parts.append(_CAL_FOOTER)
+    return "".join(parts)
@@ -0,0 +1,254 @@
+"""
+Streaming ICS import for existing calendars.
+
+Parses raw .ics text incrementally, line by line, without building an
+icalendar tree: only the VEVENT currently being read and the (small) set of
+recurring master events are held in memory. Recurring events are expanded
+only inside the requested window, honouring EXDATE and RECURRENCE-ID
+overrides. The result is a list of CalendarEvent-shaped dicts ready for the
+planner's conflict check.
+
+Times are kept as naive wall-clock times, like the rest of the planner. When
+`tz` is given, UTC and TZID-qualified times are converted into that zone
+first. Recurring events are expanded in their own zone (UTC or TZID, with
+UNTIL in UTC as RFC 5545 requires) and each occurrence is converted after,
+so a 09:00 Europe/London series stays at 09:00 London time across DST.
+All-day events are ignored unless explicitly marked TRANSP:OPAQUE,
+and TRANSP:TRANSPARENT / STATUS:CANCELLED events never block time.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rrulestr
+from icalendar.prop import vDuration
+
+from .schedule import TIME_FORMAT
+
+# Properties of a VEVENT the importer needs; everything else is skipped
+_WANTED = {"DTSTART", "DTEND", "DURATION", "SUMMARY", "RRULE", "EXDATE",
+           "RECURRENCE-ID", "UID", "STATUS", "TRANSP"}
+_NAME = re.compile(r"[A-Za-z0-9-]*")
+_UNTIL = re.compile(r"UNTIL=(\d{8})(T\d{6})?(Z?)")
+_TEXT_ESCAPES = re.compile(r"\\([\\;,nN])")
+
+
+def _unescape(text: str) -> str:
+    return _TEXT_ESCAPES.sub(lambda m: " " if m.group(1) in "nN" else m.group(1), text)
+
+
+def _until_for(rule_text: str, start: datetime) -> str:
+    """
+    Rewrite UNTIL the way dateutil needs it for `start`: UTC when start is
+    zoned (local UNTIL values are read in start's zone, dates as end of day),
+    wall-clock when start is floating.
+    """
+    def rewrite(m):
+        day, time, utc = m.group(1), m.group(2), m.group(3)
+        if start.tzinfo is None:
+            return f"UNTIL={day}{time or ''}"
+        if utc:
+            return m.group(0)
+        local = datetime.strptime(day + (time or "T235959"), "%Y%m%dT%H%M%S").replace(tzinfo=start.tzinfo)
+        return "UNTIL=" + local.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _UNTIL.sub(rewrite, rule_text)
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """'DTSTART;TZID=Europe/London:20260105T090000' -> (name, params, value)"""
+    colon = line.find(":")
+    if colon != -1 and '"' not in line[:colon]:
+        head, value = line[:colon], line[colon + 1:]
+        name, *raw_params = head.split(";")
+        params = {}
+        for p in raw_params:
+            key, _, val = p.partition("=")
+            params[key.upper()] = val
+        return name.upper(), params, value
+
+    # quoted parameter values may contain ':'
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ":" and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return line.upper(), {}, ""
+    name, *raw_params = head.split(";")
+    params = {}
+    for p in raw_params:
+        key, _, val = p.partition("=")
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+class IcsEventStream:
+    """Incremental VEVENT parser: feed() text chunks, then close() for events"""
+
+    def __init__(self, window_start: datetime, window_end: datetime, tz: str = None):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.tz = ZoneInfo(tz) if tz else None
+        self._partial = ""
+        self._logical: Optional[str] = None
+        self._stack: List[str] = []
+        self._event: Optional[Dict[str, list]] = None
+        self._masters: List[tuple] = []
+        self._overrides: Dict[str, Set[datetime]] = defaultdict(set)
+        self.events: List[dict] = []
+
+    # ---- line handling ----
+    def feed(self, text: str):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line.rstrip("\r"))
+
+    def _line(self, line: str):
+        # RFC 5545 folding: continuation lines start with a space or tab
+        if line[:1] in (" ", "\t"):
+            if self._logical is not None:
+                self._logical += line[1:]
+            return
+        if self._logical is not None:
+            self._handle(self._logical)
+        self._logical = line
+
+    def _handle(self, line: str):
+        if not line:
+            return
+        # cheap name check first: most lines (descriptions, alarms, attendees) are skipped
+        name = _NAME.match(line).group(0).upper()
+        in_event = self._event is not None and self._stack and self._stack[-1] == "VEVENT"
+        if name not in ("BEGIN", "END") and not (in_event and name in _WANTED):
+            return
+        name, params, value = _split_property(line)
+        if name == "BEGIN":
+            self._stack.append(value.upper())
+            if self._stack[-1] == "VEVENT":
+                self._event = defaultdict(list)
+        elif name == "END":
+            closed = self._stack.pop() if self._stack else None
+            if closed == "VEVENT" and self._event is not None:
+                self._finish_event(self._event)
+                self._event = None
+        else:
+            self._event[name].append((params, value))
+
+    # ---- value parsing ----
+    def _parse_zoned(self, params: Dict[str, str], value: str) -> Tuple[datetime, bool]:
+        """Returns (datetime in its own zone - aware for UTC / TZID, naive if floating, is_all_day)"""
+        value = value.strip()
+        # slicing is several times faster than strptime on large calendars
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8])), True
+        dt = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                      int(value[9:11]), int(value[11:13]), int(value[13:15]))
+        if value.endswith("Z"):
+            dt = dt.replace(tzinfo=timezone.utc)
+        elif params.get("TZID"):
+            try:
+                dt = dt.replace(tzinfo=ZoneInfo(params["TZID"]))
+            except Exception:
+                pass
+        return dt, False
+
+    def _local(self, dt: datetime) -> datetime:
+        """Naive wall-clock time in `tz` (in dt's own zone when no tz is set)"""
+        if dt.tzinfo is not None and self.tz is not None:
+            dt = dt.astimezone(self.tz)
+        return dt.replace(tzinfo=None)
+
+    def _parse_dt(self, params: Dict[str, str], value: str) -> Tuple[datetime, bool]:
+        """Returns (naive wall-clock datetime, is_all_day)"""
+        dt, all_day = self._parse_zoned(params, value)
+        return self._local(dt), all_day
+
+    def _first(self, event, name) -> Optional[Tuple[Dict[str, str], str]]:
+        values = event.get(name)
+        return values[0] if values else None
+
+    def _in_window(self, start: datetime, end: datetime) -> bool:
+        return start < self.window_end and end > self.window_start
+
+    def _emit(self, title: str, start: datetime, end: datetime):
+        self.events.append({
+            "title": title,
+            "start": start.strftime(TIME_FORMAT),
+            "end": end.strftime(TIME_FORMAT)
+        })
+
+    def _finish_event(self, event):
+        try:
+            dtstart = self._first(event, "DTSTART")
+            if dtstart is None:
+                return
+            zoned_start, all_day = self._parse_zoned(*dtstart)
+            start = self._local(zoned_start)
+            uid = (self._first(event, "UID") or ({}, ""))[1]
+            recurrence_id = self._first(event, "RECURRENCE-ID")
+            if recurrence_id is not None:
+                # this instance replaces (or cancels) one occurrence of the series
+                self._overrides[uid].add(self._parse_dt(*recurrence_id)[0])
+
+            status = (self._first(event, "STATUS") or ({}, ""))[1].upper()
+            transp = (self._first(event, "TRANSP") or ({}, ""))[1].upper()
+            if status == "CANCELLED" or transp == "TRANSPARENT":
+                return
+            if all_day and transp != "OPAQUE":
+                return
+
+            dtend = self._first(event, "DTEND")
+            duration = self._first(event, "DURATION")
+            if dtend is not None:
+                end = self._parse_dt(*dtend)[0]
+            elif duration is not None:
+                end = start + vDuration.from_ical(duration[1])
+            else:
+                end = start + (timedelta(days=1) if all_day else timedelta(0))
+            if end <= start:
+                return
+
+            title = _unescape((self._first(event, "SUMMARY") or ({}, ""))[1]) or "Busy"
+            rrule = self._first(event, "RRULE")
+            if rrule is not None and recurrence_id is None:
+                exdates = set()
+                for params, value in event.get("EXDATE", []):
+                    for part in value.split(","):
+                        exdates.add(self._parse_dt(params, part)[0])
+                self._masters.append((uid, title, zoned_start, end - start, rrule[1], exdates))
+            elif self._in_window(start, end):
+                self._emit(title, start, end)
+        except Exception:
+            # malformed event: skip it rather than failing the whole import
+            return
+
+    # ---- finish ----
+    def close(self) -> List[dict]:
+        if self._partial:
+            self._line(self._partial.rstrip("\r"))
+            self._partial = ""
+        if self._logical is not None:
+            self._handle(self._logical)
+            self._logical = None
+
+        for uid, title, start, duration, rule_text, exdates in self._masters:
+            try:
+                rule = rrulestr(_until_for(rule_text, start), dtstart=start)
+                # the window is wall-clock time in tz (or in the event's own zone)
+                zone = (self.tz or start.tzinfo) if start.tzinfo else None
+                occurrences = rule.between(self.window_start.replace(tzinfo=zone) - duration,
+                                           self.window_end.replace(tzinfo=zone), inc=True)
+            except Exception:
+                continue
+            skipped = exdates | self._overrides.get(uid, set())
+            for occ in map(self._local, occurrences):
+                if occ not in skipped and self._in_window(occ, occ + duration):
+                    self._emit(title, occ, occ + duration)
+
+        self.events.sort(key=lambda e: e["start"])
+        return self.events
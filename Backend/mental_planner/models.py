@@ -0,0 +1,33 @@
+# mental_planner/models.py
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+# Pydantic request models
+class CalendarEvent(BaseModel):
+    title: str
+    start: str
+    end: str
+
+class ScheduleRequest(BaseModel):
+    start_date: str
+    end_date: str
+    preferences: str
+    calendar_events: Optional[List[CalendarEvent]] = []
+    burnout_level: float
+    user_id: Optional[str] = None
+    # "heuristic" (default) or "gemini" (LLM with heuristic fallback)
+    mode: str = "heuristic"
+
+class BatchScheduleRequest(BaseModel):
+    requests: List[ScheduleRequest]
+    # Use each user's latest stored burnout score instead of the client value
+    use_stored_burnout: bool = True
+    # Persist plans to the wellness_plans collection
+    store: bool = True
+
+class CalendarDelta(BaseModel):
+    added: List[CalendarEvent] = []
+    removed: List[CalendarEvent] = []
+    # Reject the change if the stored plan moved past this version
+    base_version: Optional[int] = None
@@ -0,0 +1,112 @@
+"""
+Persisted wellness plans and incremental regeneration on calendar changes.
+
+Plans are stored one document per user with events grouped by day
+(`days: {"YYYY-MM-DD": [events]}`), so a calendar change only recomputes -
+and only rewrites - the days it touches.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from .preferences import parse_preferences
+from .schedule import (
+    BusyTimes, build_heuristic_events, daterange, parse_calendar_events, parse_date, parse_wall_time
+)
+
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def _event_key(evt: dict) -> Tuple[str, str, str]:
+    return evt.get("title"), evt.get("start"), evt.get("end")
+
+
+def group_by_day(events: List[dict], start: datetime, end: datetime) -> Dict[str, List[dict]]:
+    """Events keyed by day, with an (possibly empty) entry for every day in range"""
+    days = {d.strftime(DAY_FORMAT): [] for d in daterange(start, end)}
+    for evt in events:
+        days.setdefault(evt["start"][:10], []).append(evt)
+    return days
+
+
+def flatten_days(days: Dict[str, List[dict]]) -> List[dict]:
+    return [evt for day in sorted(days) for evt in days[day]]
+
+
+def plan_document(request, schedule: dict, calendar_events: List[dict]) -> dict:
+    """Plan document stored in `wellness_plans` (version is managed by the DB layer)"""
+    summary = schedule["schedule_summary"]
+    start, end = parse_date(request.start_date), parse_date(request.end_date)
+    return {
+        "user_id": request.user_id,
+        "request": {
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "preferences": request.preferences,
+            "mode": request.mode,
+        },
+        "burnout_level": summary["burnout_level"],
+        "category": summary["interpreted_burnout_category"],
+        "source": summary["source"],
+        "calendar_events": calendar_events,
+        "days": group_by_day(schedule["events"], start, end),
+    }
+
+
+def affected_days(events: List[dict], start: datetime, end: datetime) -> List[datetime]:
+    """Plan days touched by any of the given calendar events"""
+    days = set()
+    for ev_start, ev_end in parse_calendar_events(events):
+        last = ev_end.date()
+        # an event ending exactly at midnight does not touch the next day
+        if ev_end.time() == datetime.min.time() and ev_end > ev_start:
+            last -= timedelta(days=1)
+        day = max(ev_start.date(), start.date())
+        while day <= min(last, end.date()):
+            days.add(datetime.combine(day, datetime.min.time()))
+            day += timedelta(days=1)
+    return sorted(days)
+
+
+def apply_calendar_delta(plan: dict, added: List[dict], removed: List[dict]):
+    """
+    Recompute only the plan days touched by added/removed calendar events.
+
+    Heuristic plans regenerate those days deterministically; Gemini plans
+    cannot be re-asked per day, so their events on affected days are kept
+    unless they now conflict with the calendar.
+
+    Returns (calendar_events, day_updates, removed_events, added_events).
+    """
+    removed_keys = {_event_key(e) for e in removed}
+    calendar_events = [e for e in plan["calendar_events"] if _event_key(e) not in removed_keys]
+    calendar_events.extend(added)
+
+    start = parse_date(plan["request"]["start_date"])
+    end = parse_date(plan["request"]["end_date"])
+    days = affected_days(added + removed, start, end)
+    if not days:
+        return calendar_events, {}, [], []
+
+    busy = BusyTimes(parse_calendar_events(calendar_events))
+    constraints = parse_preferences(plan["request"]["preferences"])
+
+    day_updates, removed_events, added_events = {}, [], []
+    for day in days:
+        key = day.strftime(DAY_FORMAT)
+        old = plan["days"].get(key, [])
+        if plan.get("source") == "heuristic":
+            new = build_heuristic_events(day, day, plan["category"], constraints, busy, origin=start)
+        else:
+            new = [
+                evt for evt in old
+                if not busy.overlaps(parse_wall_time(evt["start"]), parse_wall_time(evt["end"]))
+            ]
+        old_keys = {_event_key(e) for e in old}
+        new_keys = {_event_key(e) for e in new}
+        if old_keys == new_keys:
+            continue
+        day_updates[key] = new
+        removed_events.extend(e for e in old if _event_key(e) not in new_keys)
+        added_events.extend(e for e in new if _event_key(e) not in old_keys)
+
+    return calendar_events, day_updates, removed_events, added_events
@@ -0,0 +1,339 @@
+"""
+Fast rule-based parser for planner preference text.
+
+Turns free text such as "no Fridays, mornings only, not after 6pm, I don't
+like journaling, 10 minute sessions" into a PlannerConstraints object that
+the slot loop applies directly. Results are cached per preference string.
+
+Rules run in priority order over a working copy of the text; each match
+blanks its span so lower-priority rules cannot re-read it (e.g. "not before
+9am" is never also read as "before 9am"). Clauses no rule touched are kept
+in `unmatched_clauses` - when there are none, Gemini is not needed.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+
+HOBBY_KEYWORDS = ["yoga", "painting", "reading", "gardening", "music", "dance", "run", "jog", "cycling"]
+
+DAY_INDEX = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+# Minute-of-day windows for named periods
+PERIODS = {
+    "early morning": (5 * 60, 9 * 60),
+    "morning": (5 * 60, 12 * 60),
+    "midday": (11 * 60, 14 * 60),
+    "lunch": (11 * 60, 14 * 60),
+    "afternoon": (12 * 60, 17 * 60),
+    "evening": (17 * 60, 24 * 60),
+    "night": (20 * 60, 24 * 60),
+}
+
+# Activity words -> planner event types (hobbies map to themselves)
+ACTIVITY_TYPES = {
+    "meditat": "meditation",
+    "journal": "journaling",
+    "affirmation": "affirmations",
+    "rest": "rest",
+    "nap": "rest",
+    "exercis": "light_exercise",
+    "workout": "light_exercise",
+    "walk": "light_exercise",
+}
+
+FILLER_WORDS = {
+    "i", "i'm", "im", "i'd", "me", "my", "we", "a", "an", "the", "to", "on", "in", "at", "of", "for",
+    "and", "or", "but", "so", "please", "would", "like", "prefer", "want", "love", "enjoy", "really",
+    "be", "is", "are", "it", "that", "this", "any", "some", "schedule", "scheduling", "sessions",
+    "session", "events", "event", "activities", "activity", "things", "only", "also", "just", "do",
+    "have", "time", "with", "if", "possible", "ok", "okay", "thanks", "thank", "you",
+}
+
+_NEG = (r"(?:no|not|never|avoid|avoiding|skip|except|without|nothing\s+on|hate|dislike"
+        r"|(?:don'?t|do\s+not|doesn'?t)\s+(?:like|want|enjoy|do|need)|not\s+(?:into|a\s+fan\s+of)"
+        r"|can'?t\s+(?:stand|do)|cannot\s+do)")
+_DAY = (r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|weekend|weekday"
+        r"|mon|tues?|wed|thu(?:rs?)?|fri|sat|sun)s?")
+_DAYS = rf"{_DAY}(?:\s*(?:,|/|&|and|or|nor)\s*{_DAY})*"
+_PERIOD = r"(?:early\s+morning|morning|midday|lunch(?:time)?|afternoon|evening|night)s?"
+_PERIODS = rf"{_PERIOD}(?:\s*(?:,|/|&|and|or|nor)\s*{_PERIOD})*"
+_TIME = r"(noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)"
+_ACT = (r"(?:meditat\w*|journal\w*|affirmations?|rest(?:ing)?|naps?|exercis\w*|workouts?|walk\w*"
+        r"|yoga|painting|reading|gardening|music|danc\w*|run\w*|jog\w*|cycling)")
+_ACTS = rf"{_ACT}(?:\s*(?:,|/|&|and|or|nor)\s*{_ACT})*"
+_UNIT = r"(min(?:ute)?s?|m|hours?|hrs?|h)\b"
+_RANGE_SEP = r"\s*(?:-|–|to|until|till|and)\s*"
+# "9-5" is a time range, "10-15 minutes" / "2-3 times" are not
+_NOT_AMOUNT = r"(?![\d:])(?!\s*-?\s*(?:min|hour|hr|h\b|m\b|times|days|weeks|x\b))"
+
+RE_ONLY_DAYS = re.compile(rf"\b(?:only\s+(?:on\s+)?({_DAYS})|({_DAYS})\s+only)\b")
+RE_NO_DAYS = re.compile(rf"\b{_NEG}(?:\s+(?:on|any|during|the|work|working|schedule|scheduling|anything|events?))*\s+({_DAYS})\b")
+RE_DAYS_OFF = re.compile(rf"\b({_DAYS})\s+(?:are|is)\s+(?:off|busy|out|bad|no\s+good)\b")
+RE_ONLY_PERIODS = re.compile(rf"\b(?:only\s+(?:in\s+the\s+|during\s+the\s+|at\s+)?({_PERIODS})|({_PERIODS})\s+only)\b")
+RE_NO_PERIODS = re.compile(rf"\b{_NEG}(?:\s+(?:in\s+the|during\s+the|at|on|any|late))*\s+({_PERIODS})\b")
+RE_NOT_PERSON = re.compile(rf"\bnot\s+an?\s+({_PERIOD})\s+person\b")
+RE_NO_RANGE = re.compile(rf"\b(?:no|not|never|nothing|avoid)(?:\s+[a-z']+){{0,3}}?\s+(?:from|between)\s+{_TIME}{_RANGE_SEP}{_TIME}{_NOT_AMOUNT}")
+RE_RANGE = re.compile(rf"\b(?:(?:from|between)\s+)?{_TIME}{_RANGE_SEP}{_TIME}{_NOT_AMOUNT}")
+RE_NOT_BEFORE = re.compile(rf"\b(?:(?:not|nothing|never|no(?:\s+[a-z']+){{0,3}}?)\s+(?:before|earlier\s+than)|no\s+earlier\s+than)\s+{_TIME}")
+RE_NOT_AFTER = re.compile(rf"\b(?:(?:not|nothing|never|no(?:\s+[a-z']+){{0,3}}?)\s+(?:after|past|later\s+than)|no\s+later\s+than)\s+{_TIME}")
+RE_BEFORE = re.compile(rf"\b(?:before|by|until|till|finish(?:ed)?\s+by|done\s+by)\s+{_TIME}")
+RE_AFTER = re.compile(rf"\b(?:after|from|starting(?:\s+at)?|not\s+until)\s+{_TIME}")
+RE_NO_ACTS = re.compile(rf"\b{_NEG}(?:\s+(?:any|more|doing|the|to))*\s+({_ACTS})\b")
+RE_MAX_LEN = re.compile(rf"\b(?:max(?:imum)?|at\s+most|up\s+to|under|less\s+than|no\s+(?:longer|more)\s+than|shorter\s+than|within)\s+(\d{{1,3}})\s*-?\s*{_UNIT}")
+RE_LEN = re.compile(rf"\b(?:\d{{1,3}}\s*(?:-|–|to)\s*)?(\d{{1,3}})\s*-?\s*{_UNIT}")
+RE_SHORT = re.compile(r"\b(?:short|quick|brief)(?:er)?\b")
+RE_LONG = re.compile(r"\blong(?:er)?\s+(?:sessions?|blocks?|activities)\b")
+RE_CLAUSE = re.compile(r"[.;!?\n]+|,\s*|\bbut\b")
+
+
+@dataclass(frozen=True)
+class PlannerConstraints:
+    """Structured planner constraints. Times are minutes since midnight."""
+    excluded_weekdays: FrozenSet[int] = frozenset()
+    earliest: Optional[int] = None
+    latest: Optional[int] = None
+    blocked_windows: Tuple[Tuple[int, int], ...] = ()
+    disliked_types: FrozenSet[str] = frozenset()
+    hobbies: Tuple[str, ...] = ()
+    max_minutes: Optional[int] = None
+    preferred_minutes: Optional[int] = None
+    unmatched_clauses: Tuple[str, ...] = field(default=(), compare=False)
+
+    @property
+    def needs_llm(self) -> bool:
+        """True when some of the text could not be interpreted locally"""
+        return bool(self.unmatched_clauses)
+
+    def allows_day(self, day) -> bool:
+        return day.weekday() not in self.excluded_weekdays
+
+    def dislikes(self, etype: str) -> bool:
+        base = etype.split(":")[0].strip().lower()
+        if base == "affirmation":
+            base = "affirmations"
+        return base in self.disliked_types
+
+    def duration_for(self, default_minutes: int) -> int:
+        minutes = self.preferred_minutes or default_minutes
+        if self.max_minutes:
+            minutes = min(minutes, self.max_minutes)
+        return minutes
+
+    def _window(self) -> Tuple[int, int]:
+        return (self.earliest or 0), (self.latest if self.latest is not None else 24 * 60)
+
+    def allows(self, start: datetime, end: datetime) -> bool:
+        """True when [start, end) lies inside the allowed window and no blocked window"""
+        lo, hi = self._window()
+        s = start.hour * 60 + start.minute
+        e = s + int((end - start).total_seconds() // 60)
+        if s < lo or e > hi:
+            return False
+        return not any(s < be and bs < e for bs, be in self.blocked_windows)
+
+    def fit_slot(self, start: datetime, minutes: int) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Move a slot the least amount needed to satisfy the time window and
+        blocked windows; None when it cannot fit on that day.
+        """
+        lo, hi = self._window()
+        s = start.hour * 60 + start.minute
+        s = max(s, lo)
+        s = min(s, hi - minutes)
+        for bs, be in sorted(self.blocked_windows):
+            if s < be and bs < s + minutes:
+                s = be if be + minutes <= hi else bs - minutes
+        if s < lo or s + minutes > hi:
+            return None
+        if any(s < be and bs < s + minutes for bs, be in self.blocked_windows):
+            return None
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        new_start = day + timedelta(minutes=s)
+        return new_start, new_start + timedelta(minutes=minutes)
+
+
+NO_CONSTRAINTS = PlannerConstraints()
+
+
+def _days(text: str) -> set:
+    days = set()
+    for word in re.findall(_DAY, text):
+        if word.startswith("weekend"):
+            days |= {5, 6}
+        elif word.startswith("weekday"):
+            days |= {0, 1, 2, 3, 4}
+        else:
+            days.add(DAY_INDEX[word[:3]])
+    return days
+
+
+def _periods(text: str) -> List[Tuple[int, int]]:
+    windows = []
+    for word in re.findall(_PERIOD, text):
+        word = re.sub(r"\s+", " ", word).rstrip("s").replace("lunchtime", "lunch")
+        windows.append(PERIODS[word])
+    return windows
+
+
+def _clock(raw: str, assume_pm: bool = True, upper_bound: bool = False) -> Optional[int]:
+    """
+    '6pm' / '18:30' / 'noon' -> minutes since midnight. A bare hour is read as
+    pm for 1-7, or for 1-11 when it is an upper bound ("nothing after 9").
+    """
+    raw = raw.strip().replace(".", "")
+    if raw == "noon":
+        return 12 * 60
+    if raw == "midnight":
+        return 24 * 60
+    m = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", raw)
+    hour, minute, suffix = int(m.group(1)), int(m.group(2) or 0), m.group(3)
+    if suffix == "pm" and hour < 12:
+        hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+    elif suffix is None and assume_pm and 1 <= hour <= (11 if upper_bound else 7):
+        # "not after 6" almost always means 6pm
+        hour += 12
+    if hour > 24 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def _clock_range(raw_start: str, raw_end: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    'from 9 to 5' -> (9:00, 17:00). A bare end is the first reading after the
+    start ('9-11' is morning, '9-5' ends at 17:00); a bare start of 1-6 is pm
+    ('from 2 to 4') unless the end says otherwise.
+    """
+    start, end = _clock(raw_start, assume_pm=False), _clock(raw_end, assume_pm=False)
+    if start is None or end is None:
+        return None, None
+    start_bare, end_bare = (not re.search(r"[ap]\.?m|noon|midnight", raw) for raw in (raw_start, raw_end))
+    if start_bare and 60 <= start < 7 * 60 and (end_bare or start + 12 * 60 < end):
+        start += 12 * 60
+    if end_bare and end <= start and end + 12 * 60 <= 24 * 60:
+        end += 12 * 60
+    return start, end
+
+
+def _minutes(amount: str, unit: str) -> int:
+    return int(amount) * (60 if unit.startswith("h") else 1)
+
+
+@lru_cache(maxsize=2048)
+def _parse(text: str) -> PlannerConstraints:
+    work = text
+    spans = []
+    excluded, blocked, disliked = set(), [], set()
+    earliest, latest, max_minutes, preferred = None, None, None, None
+
+    def consume(regex):
+        nonlocal work
+        matches = list(regex.finditer(work))
+        for m in matches:
+            spans.append((m.start(), m.end()))
+            work = work[:m.start()] + " " * (m.end() - m.start()) + work[m.end():]
+        return matches
+
+    def tighten(lo=None, hi=None):
+        nonlocal earliest, latest
+        if lo is not None:
+            earliest = lo if earliest is None else max(earliest, lo)
+        if hi is not None:
+            latest = hi if latest is None else min(latest, hi)
+
+    for m in consume(RE_ONLY_DAYS):
+        excluded |= set(range(7)) - _days(m.group(1) or m.group(2))
+    for regex in (RE_NO_DAYS, RE_DAYS_OFF):
+        for m in consume(regex):
+            excluded |= _days(m.group(1))
+
+    for m in consume(RE_ONLY_PERIODS):
+        windows = _periods(m.group(1) or m.group(2))
+        tighten(min(w[0] for w in windows), max(w[1] for w in windows))
+    for regex in (RE_NOT_PERSON, RE_NO_PERIODS):
+        for m in consume(regex):
+            blocked.extend(_periods(m.group(1)))
+
+    for m in consume(RE_NO_RANGE):
+        lo, hi = _clock_range(m.group(1), m.group(2))
+        if lo is not None and hi is not None and lo < hi:
+            blocked.append((lo, hi))
+    # range rules must see "X to Y" and "from X" before the single-bound rules
+    for m in consume(RE_RANGE):
+        lo, hi = _clock_range(m.group(1), m.group(2))
+        if lo is not None and hi is not None and lo < hi:
+            tighten(lo, hi)
+    for m in consume(RE_NOT_BEFORE):
+        tighten(lo=_clock(m.group(1), assume_pm=False))
+    for m in consume(RE_NOT_AFTER):
+        tighten(hi=_clock(m.group(1), upper_bound=True))
+    for m in consume(RE_BEFORE):
+        tighten(hi=_clock(m.group(1), upper_bound=True))
+    for m in consume(RE_AFTER):
+        tighten(lo=_clock(m.group(1), assume_pm=False))
+
+    disliked_words = []
+    for m in consume(RE_NO_ACTS):
+        disliked_words.extend(re.findall(_ACT, m.group(1)))
+    for word in disliked_words:
+        for prefix, etype in ACTIVITY_TYPES.items():
+            if word.startswith(prefix):
+                disliked.add(etype)
+        for hk in HOBBY_KEYWORDS:
+            if word.startswith(hk):
+                disliked.add(hk)
+
+    for m in consume(RE_MAX_LEN):
+        max_minutes = _minutes(m.group(1), m.group(2))
+    for m in consume(RE_LEN):
+        preferred = _minutes(m.group(1), m.group(2))
+    if consume(RE_SHORT):
+        max_minutes = min(max_minutes or 15, 15)
+    if consume(RE_LONG) and preferred is None:
+        preferred = 45
+
+    hobbies = []
+    for hk in HOBBY_KEYWORDS:
+        for m in re.finditer(rf"\b{hk}", text):
+            spans.append((m.start(), m.end()))
+            if hk not in disliked and hk not in hobbies:
+                hobbies.append(hk)
+
+    # Clauses with any meaningful word no rule covered need the LLM to be understood
+    unmatched = []
+    pos = 0
+    for sep in list(RE_CLAUSE.finditer(text)) + [None]:
+        end = sep.start() if sep else len(text)
+        for word in re.finditer(r"[a-z0-9']+", text[pos:end]):
+            ws, we = pos + word.start(), pos + word.end()
+            if word.group() not in FILLER_WORDS and not any(s <= ws and we <= e for s, e in spans):
+                unmatched.append(text[pos:end].strip())
+                break
+        pos = sep.end() if sep else len(text)
+
+    if earliest is not None and latest is not None and earliest >= latest:
+        # contradictory window - ignore it rather than schedule nothing
+        earliest = latest = None
+
+    return PlannerConstraints(
+        excluded_weekdays=frozenset(excluded),
+        earliest=earliest,
+        latest=latest,
+        blocked_windows=tuple(sorted(set(blocked))),
+        disliked_types=frozenset(disliked),
+        hobbies=tuple(hobbies),
+        max_minutes=max_minutes,
+        preferred_minutes=preferred,
+        unmatched_clauses=tuple(unmatched),
+    )
+
+
+def parse_preferences(preferences: str) -> PlannerConstraints:
+    """Parse free-text preferences into constraints (cached per normalized string)"""
+    text = re.sub(r"\s+", " ", (preferences or "").lower().replace("’", "'")).strip()
+    if not text:
+        return NO_CONSTRAINTS
+    return _parse(text)
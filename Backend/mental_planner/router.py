@@ -2,260 +2,269 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-import json
-import google.generativeai as genai
-from datetime import datetime, timedelta
-from icalendar import Calendar, Event
-import uuid
-
-from config import GEMINI_API_KEY
-from .prompts import build_gemini_prompt
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from datetime import timedelta
+import codecs
+
+from config import ICS_MAX_UPLOAD_BYTES, PLANNER_RATE_CAPACITY, PLANNER_RATE_PER_MINUTE
+from http_cache import CACHE_NONE, CACHE_PRIVATE, conditional_json, make_etag
+from rate_limit import RateLimiter, SingleFlight
+from .batch import run_batch
+from .ics import generate_ics_content
+from .ics_import import IcsEventStream
+from .models import BatchScheduleRequest, CalendarDelta, CalendarEvent, ScheduleRequest
+from .plans import apply_calendar_delta, flatten_days, plan_document
+from .schedule import (
+    BusyTimes, build_heuristic_events, interpret_burnout, make_schedule,
+    parse_calendar_events, parse_date, parse_wall_time
+)
+from .gemini_planner import plan_with_fallback
+from .preferences import parse_preferences
+
+try:
+    from db_help import db
+except Exception as e:
+    print(f"⚠️ Mental planner running without database: {e}")
+    db = None
 
 router = APIRouter(prefix="/mental-planner", tags=["Mental Planner"])
 
-# Configure Gemini API
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-def generate_ics_content(events: List[dict], existing_events: List[dict] = None) -> str:
-    """Generate ICS calendar file content with all events"""
-    cal = Calendar()
-    cal.add('prodid', '-//CalmHer Mental Planner//EN')
-    cal.add('version', '2.0')
-    cal.add('calscale', 'GREGORIAN')
-    cal.add('method', 'PUBLISH')
-    cal.add('x-wr-calname', 'CalmHer Wellness Plan')
-    cal.add('x-wr-timezone', 'UTC')
-    cal.add('x-wr-caldesc', 'Your personalized wellness schedule with activities and original calendar events')
-    
-    # Add new wellness events
-    for evt in events:
-        event = Event()
-        event.add('summary', evt['title'])
-        event.add('description', evt.get('notes', ''))
-        event.add('dtstart', datetime.fromisoformat(evt['start']))
-        event.add('dtend', datetime.fromisoformat(evt['end']))
-        event.add('uid', f"{uuid.uuid4()}@calmher.local")
-        event.add('dtstamp', datetime.now())
-        # Add color category for wellness events
-        event.add('categories', 'Wellness')
-        cal.add_component(event)
-    
-    # Add original calendar events if provided
-    if existing_events:
-        for evt in existing_events:
-            try:
-                event = Event()
-                event.add('summary', evt.get('title', 'Event'))
-                event.add('description', evt.get('description', ''))
-                if 'start' in evt:
-                    event.add('dtstart', datetime.fromisoformat(evt['start']))
-                if 'end' in evt:
-                    event.add('dtend', datetime.fromisoformat(evt['end']))
-                event.add('uid', f"{uuid.uuid4()}@calmher.local")
-                event.add('dtstamp', datetime.now())
-                event.add('categories', 'Original')
-                cal.add_component(event)
-            except Exception:
-                continue
-    
-    return cal.to_ical().decode('utf-8')
-
-class CalendarEvent(BaseModel):
-    title: str
-    start: str
-    end: str
-
-class ScheduleRequest(BaseModel):
-    start_date: str
-    end_date: str
-    preferences: str
-    calendar_events: Optional[List[CalendarEvent]] = []
-    burnout_level: float
+planner_limiter = RateLimiter("planner", PLANNER_RATE_CAPACITY, PLANNER_RATE_PER_MINUTE)
+planner_flight = SingleFlight()
 
 @router.post("/generate-schedule")
-async def generate_schedule(request: ScheduleRequest):
-    try:
-        if not (1 <= request.burnout_level <= 5):
-            raise HTTPException(status_code=400, detail="Burnout level must be 1-5")
+async def generate_schedule(request: ScheduleRequest, http_request: Request, response: Response):
+    # Generated plans are never revalidated; the ICS body is compressed by middleware
+    response.headers["Cache-Control"] = CACHE_NONE
 
-        # Parse existing calendar events into simple ranges
-        existing = []
-        for e in request.calendar_events or []:
-            try:
-                existing.append({
-                    "start": e["start"],
-                    "end": e["end"]
-                })
-            except Exception:
-                continue
+    # Rate limit per user (client address when no user_id is sent)
+    user_key = request.user_id or (http_request.client.host if http_request.client else "anonymous")
+    await planner_limiter.check(user_key)
 
-        from datetime import datetime, timedelta
+    # Identical concurrent requests from the same user share one computation
+    return await planner_flight.do(
+        f"{user_key}\x00{request.model_dump_json()}",
+        lambda: _generate_schedule(request)
+    )
 
-        def daterange(start_date, end_date):
-            for n in range(int((end_date - start_date).days) + 1):
-                yield start_date + timedelta(n)
-
-        def parse_date(d: str):
-            return datetime.strptime(d, "%Y-%m-%d")
-
-        def make_dt(date_obj, hhmm: str):
-            return datetime.combine(date_obj, datetime.strptime(hhmm, "%H:%M").time())
-
-        def overlaps(a_start, a_end, b_start, b_end):
-            return max(a_start, b_start) < min(a_end, b_end)
+async def _generate_schedule(request: ScheduleRequest):
+    try:
+        if not (1 <= request.burnout_level <= 5):
+            raise HTTPException(status_code=400, detail="Burnout level must be 1-5")
+        if request.mode not in ("heuristic", "gemini"):
+            raise HTTPException(status_code=400, detail="mode must be 'heuristic' or 'gemini'")
 
         start = parse_date(request.start_date)
         end = parse_date(request.end_date)
 
+        # Existing calendar events as a sorted interval set for conflict checks
+        calendar_events = [e.model_dump() for e in request.calendar_events or []]
+        busy = BusyTimes(parse_calendar_events(calendar_events))
+
         # Interpret burnout
         bl = float(request.burnout_level)
-        if bl < 2.0:
-            category = "low"
-        elif 2.0 <= bl < 3.0:
-            category = "moderate"
-        elif 3.0 <= bl < 4.0:
-            category = "high"
+        category = interpret_burnout(bl)
+
+        # Rule-parsed preferences (cached); Gemini is only consulted for what rules miss
+        constraints = parse_preferences(request.preferences)
+
+        reason = None
+        if request.mode == "gemini":
+            events, source, reason = await plan_with_fallback(
+                request, start, end, category, constraints, busy, calendar_events
+            )
         else:
-            category = "critical"
-
-        # Determine schedule density based on category
-        # low: 2 events/day + daily affirmation
-        # moderate: 1 event/day + affirmation every other day
-        # high: 3 events/week
-        # critical: 1-2 events/week (rest and affirmations)
-
-        events = []
-        affirmation_messages = [
-            "Have a great day!",
-            "Smile — you are pretty",
-            "You are enough",
-            "Breathe. You are doing your best"
-        ]
-
-        # detect hobby keywords
-        hobby_keywords = ["yoga", "painting", "reading", "gardening", "music", "dance", "run", "jog", "cycling"]
-        hobbies = []
-        prefs = (request.preferences or "").lower()
-        for hk in hobby_keywords:
-            if hk in prefs:
-                hobbies.append(hk)
-
-        # times to try for scheduling (HH:MM)
-        morning = "08:00"
-        midday = "12:30"
-        afternoon = "16:00"
-        evening = "19:00"
-
-        for single_date in daterange(start, end):
-            day_events = []
-
-            if category == "low":
-                slots = [(morning, 20, "meditation"), (evening, 20, "journaling")]
-                aff_every = 1
-            elif category == "moderate":
-                slots = [(morning, 20, "meditation")]
-                aff_every = 2
-            elif category == "high":
-                # schedule only on Mon/Wed/Fri
-                weekday = single_date.weekday()
-                if weekday in (0, 2, 4):
-                    slots = [(morning, 15, "meditation"), (afternoon, 30, "light_exercise"), (evening, 15, "journaling")]
-                else:
-                    slots = []
-                aff_every = 3
-            else:  # critical
-                weekday = single_date.weekday()
-                # choose Tue and Thu for minimal events
-                if weekday in (1, 3):
-                    slots = [(midday, 15, "rest"), (evening, 10, "affirmations")]
-                else:
-                    slots = []
-                aff_every = 7
-
-            # if user has hobbies, prefer one slot for hobby once every few days
-            if hobbies and category in ("low", "moderate"):
-                slots.append((afternoon, 45, f"hobby: {hobbies[0]}"))
-
-            # build events for the day avoiding overlaps
-            for hhmm, duration_min, etype in slots:
-                start_dt = make_dt(single_date, hhmm)
-                end_dt = start_dt + timedelta(minutes=duration_min)
-
-                # check against existing calendar events
-                conflict = False
-                for ex in existing:
-                    try:
-                        ex_start = datetime.fromisoformat(ex["start"])
-                        ex_end = datetime.fromisoformat(ex["end"])
-                        if overlaps(start_dt, end_dt, ex_start, ex_end):
-                            conflict = True
-                            break
-                    except Exception:
-                        continue
-
-                if conflict:
-                    continue
-
-                title = {
-                    "meditation": "Meditation",
-                    "journaling": "Journaling",
-                    "light_exercise": "Light Exercise",
-                    "rest": "Rest / Recovery",
-                }.get(etype.split(":")[0], etype.title())
-
-                note = "A gentle wellbeing activity"
-                if etype.startswith("hobby"):
-                    note = f"Time for your hobby: {etype.split(':',1)[1].strip()}"
-                if title.lower().find("affirm") != -1 or etype == "affirmations":
-                    # positive affirmation event
-                    title = "Affirmation"
-                    note = affirmation_messages[hash(single_date) % len(affirmation_messages)]
-
-                events.append({
-                    "title": title,
-                    "type": etype.replace(" ", "_").lower(),
-                    "start": start_dt.strftime("%Y-%m-%dT%H:%M"),
-                    "end": end_dt.strftime("%Y-%m-%dT%H:%M"),
-                    "notes": note
-                })
-
-            # add daily affirmation according to frequency
-            try:
-                day_index = (single_date - start).days
-                if day_index % aff_every == 0:
-                    aff_dt = make_dt(single_date, morning)
-                    events.append({
-                        "title": "Affirmation",
-                        "type": "affirmation",
-                        "start": aff_dt.strftime("%Y-%m-%dT%H:%M"),
-                        "end": (aff_dt + timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M"),
-                        "notes": affirmation_messages[day_index % len(affirmation_messages)]
-                    })
-            except Exception:
-                pass
-
-        schedule = {
-            "schedule_summary": {
-                "burnout_level": bl,
-                "interpreted_burnout_category": category,
-                "date_range": {"start": request.start_date, "end": request.end_date},
-                "total_events_created": len(events)
-            },
-            "events": events
-        }
+            events, source = build_heuristic_events(start, end, category, constraints, busy), "heuristic"
+
+        schedule = make_schedule(request, bl, category, events, source, reason)
 
         # Generate ICS file content with new events + original calendar events
-        ics_content = generate_ics_content(events, request.calendar_events)
+        ics_content = generate_ics_content(events, calendar_events)
+
+        # Persist per user so calendar changes can be applied incrementally
+        plan_version = None
+        if request.user_id and db is not None:
+            try:
+                plan_version = db.save_plan(plan_document(request, schedule, calendar_events))
+            except Exception as e:
+                print(f"⚠️ Failed to store plan for {request.user_id}: {e}")
 
-        return {"success": True, "schedule": schedule, "ics_content": ics_content}
+        return {"success": True, "schedule": schedule, "ics_content": ics_content, "plan_version": plan_version}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-schedule-from-ics")
+async def generate_schedule_from_ics(
+    http_request: Request,
+    response: Response,
+    start_date: str,
+    end_date: str,
+    burnout_level: float,
+    preferences: str = "",
+    user_id: Optional[str] = None,
+    mode: str = "heuristic",
+    tz: Optional[str] = None
+):
+    """
+    Generate a schedule from a raw .ics upload (request body, text/calendar).
+    The calendar is parsed as it streams in; recurring events are expanded
+    only within start_date..end_date and fed into the conflict check.
+    Uploads over ICS_MAX_UPLOAD_BYTES get 413.
+    """
+    response.headers["Cache-Control"] = CACHE_NONE
+
+    user_key = user_id or (http_request.client.host if http_request.client else "anonymous")
+    await planner_limiter.check(user_key)
+
+    try:
+        window_start = parse_date(start_date)
+        window_end = parse_date(end_date) + timedelta(days=1)
+        parser = IcsEventStream(window_start, window_end, tz)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date range or timezone: {str(e)}")
+
+    too_large = HTTPException(status_code=413, detail=f"Calendar larger than {ICS_MAX_UPLOAD_BYTES} bytes")
+    if int(http_request.headers.get("content-length") or 0) > ICS_MAX_UPLOAD_BYTES:
+        raise too_large
+
+    # parsing is CPU-bound: run it in the threadpool so other requests keep being served
+    def parse(text: str, final: bool = False):
+        parser.feed(text)
+        return parser.close() if final else None
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    received = 0
+    async for chunk in http_request.stream():
+        received += len(chunk)
+        if received > ICS_MAX_UPLOAD_BYTES:
+            raise too_large
+        await run_in_threadpool(parse, decoder.decode(chunk))
+    imported = await run_in_threadpool(parse, decoder.decode(b"", final=True), True)
+
+    request = ScheduleRequest(
+        start_date=start_date,
+        end_date=end_date,
+        preferences=preferences,
+        calendar_events=imported,
+        burnout_level=burnout_level,
+        user_id=user_id,
+        mode=mode
+    )
+    result = await _generate_schedule(request)
+    result["imported_events"] = len(imported)
+    return result
+
+@router.post("/generate-batch")
+async def generate_batch(batch: BatchScheduleRequest, response: Response, background: bool = False):
+    """
+    Generate plans for many users at once (deterministic planner only).
+    Burnout comes from each user's latest stored score unless
+    use_stored_burnout is false; plans are stored in bulk.
+    With background=true the batch runs as a job (202 + job_id, poll GET /jobs/{job_id}).
+    """
+    if any(not r.user_id for r in batch.requests):
+        raise HTTPException(status_code=400, detail="Every batch request needs a user_id")
+    if (batch.store or batch.use_stored_burnout) and db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    if background:
+        from jobs.queue import get_queue
+        job_id = get_queue().enqueue("generate_plans", {
+            "requests": [r.model_dump() for r in batch.requests],
+            "use_stored_burnout": batch.use_stored_burnout,
+            "store": batch.store,
+        })
+        response.status_code = 202
+        return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+    try:
+        results = await run_in_threadpool(
+            run_batch, batch.requests, db, batch.use_stored_burnout, batch.store
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch generation failed: {str(e)}")
+
+    failed = sum(1 for r in results if not r["success"])
+    return {"success": failed == 0, "generated": len(results) - failed, "failed": failed, "results": results}
+
+@router.get("/plans/{user_id}")
+def get_plan(user_id: str, request: Request, include_ics: bool = False):
+    """Get the user's stored wellness plan (ETag = plan version)"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    plan = db.get_plan(user_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="No plan stored for this user")
+
+    def build():
+        events = flatten_days(plan["days"])
+        body = {
+            "user_id": user_id,
+            "plan_version": plan["version"],
+            "request": plan["request"],
+            "burnout_level": plan["burnout_level"],
+            "interpreted_burnout_category": plan["category"],
+            "source": plan["source"],
+            "events": events
+        }
+        if include_ics:
+            body["ics_content"] = generate_ics_content(events, plan["calendar_events"])
+        return body
+
+    return conditional_json(request, make_etag("plan", user_id, plan["version"], include_ics), CACHE_PRIVATE, build)
+
+@router.patch("/plans/{user_id}")
+def patch_plan(user_id: str, delta: CalendarDelta):
+    """
+    Apply calendar changes to a stored plan. Only the days touched by the
+    added/removed events are recomputed; the response carries just the
+    changed wellness events and the new plan version.
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    for e in delta.added:
+        try:
+            start, end = parse_wall_time(e.start), parse_wall_time(e.end)
+        except (TypeError, ValueError) as err:
+            raise HTTPException(status_code=400, detail=f"Invalid event times for '{e.title}': {str(err)}")
+        if end <= start:
+            raise HTTPException(status_code=400, detail=f"Event '{e.title}' ends before it starts")
+
+    try:
+        plan = db.get_plan(user_id)
+        if plan is None:
+            raise HTTPException(status_code=404, detail="No plan stored for this user")
+        if delta.base_version is not None and delta.base_version != plan["version"]:
+            raise HTTPException(status_code=409, detail=f"Plan is at version {plan['version']}")
+
+        calendar_events, day_updates, removed_events, added_events = apply_calendar_delta(
+            plan,
+            [e.model_dump() for e in delta.added],
+            [e.model_dump() for e in delta.removed]
+        )
+        if not db.update_plan_days(user_id, plan["version"], day_updates, calendar_events):
+            raise HTTPException(status_code=409, detail="Plan changed concurrently - fetch it and retry")
+
+        return {
+            "success": True,
+            "user_id": user_id,
+            "plan_version": plan["version"] + 1,
+            "changed_days": sorted(day_updates),
+            "removed_events": removed_events,
+            "added_events": added_events
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update plan: {str(e)}")
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
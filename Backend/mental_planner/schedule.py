@@ -0,0 +1,277 @@
+"""
+Deterministic (heuristic) wellness schedule builder - no network calls.
+
+Also used as the fallback when the Gemini planner is slow or returns
+nothing usable.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from .ics import generate_ics_content
+from .preferences import PlannerConstraints, parse_preferences
+
+AFFIRMATION_MESSAGES = [
+    "Have a great day!",
+    "Smile — you are pretty",
+    "You are enough",
+    "Breathe. You are doing your best"
+]
+
+# times to try for scheduling (HH:MM)
+MORNING = "08:00"
+MIDDAY = "12:30"
+AFTERNOON = "16:00"
+EVENING = "19:00"
+
+EVENT_TITLES = {
+    "meditation": "Meditation",
+    "journaling": "Journaling",
+    "light_exercise": "Light Exercise",
+    "rest": "Rest / Recovery",
+}
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+def daterange(start_date, end_date):
+    for n in range(int((end_date - start_date).days) + 1):
+        yield start_date + timedelta(n)
+
+
+def parse_date(d: str):
+    return datetime.strptime(d, "%Y-%m-%d")
+
+
+def make_dt(date_obj, hhmm: str):
+    return datetime.combine(date_obj, datetime.strptime(hhmm, "%H:%M").time())
+
+
+def interpret_burnout(level: float) -> str:
+    """Map a 1-5 burnout level to low / moderate / high / critical"""
+    if level < 2.0:
+        return "low"
+    if level < 3.0:
+        return "moderate"
+    if level < 4.0:
+        return "high"
+    return "critical"
+
+
+def parse_wall_time(value: str) -> datetime:
+    """
+    ISO timestamp -> naive wall-clock datetime. Times with an offset ('Z',
+    '+01:00', as in Google Calendar exports) are converted to local time, so
+    they compare with the planner's naive slot times.
+    """
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+def parse_calendar_events(calendar_events) -> List[Tuple[datetime, datetime]]:
+    """Existing calendar events (models or dicts) -> [(start, end)], skipping malformed ones"""
+    intervals = []
+    for e in calendar_events or []:
+        try:
+            if isinstance(e, dict):
+                start, end = e["start"], e["end"]
+            else:
+                start, end = e.start, e.end
+            intervals.append((parse_wall_time(start), parse_wall_time(end)))
+        except Exception:
+            continue
+    return intervals
+
+
+class BusyTimes:
+    """Sorted, merged busy intervals with O(log n) overlap checks"""
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self._ends and start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def copy(self) -> "BusyTimes":
+        other = BusyTimes()
+        other._starts = list(self._starts)
+        other._ends = list(self._ends)
+        return other
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] > start:
+            return True
+        return i + 1 < len(self._starts) and self._starts[i + 1] < end
+
+    def add(self, start: datetime, end: datetime):
+        i = bisect_right(self._starts, start)
+        # merge with neighbours that touch the new interval
+        lo = i - 1 if i > 0 and self._ends[i - 1] >= start else i
+        hi = i
+        while hi < len(self._starts) and self._starts[hi] <= end:
+            hi += 1
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+
+@lru_cache(maxsize=256)
+def day_slots(weekday: int, category: str, hobbies: Tuple[str, ...]):
+    """Slots ((HH:MM, minutes, type), ...) and affirmation frequency for one weekday"""
+    if category == "low":
+        slots = [(MORNING, 20, "meditation"), (EVENING, 20, "journaling")]
+        aff_every = 1
+    elif category == "moderate":
+        slots = [(MORNING, 20, "meditation")]
+        aff_every = 2
+    elif category == "high":
+        # schedule only on Mon/Wed/Fri
+        if weekday in (0, 2, 4):
+            slots = [(MORNING, 15, "meditation"), (AFTERNOON, 30, "light_exercise"), (EVENING, 15, "journaling")]
+        else:
+            slots = []
+        aff_every = 3
+    else:  # critical
+        # choose Tue and Thu for minimal events
+        if weekday in (1, 3):
+            slots = [(MIDDAY, 15, "rest"), (EVENING, 10, "affirmations")]
+        else:
+            slots = []
+        aff_every = 7
+
+    # if user has hobbies, prefer one slot for hobby once every few days
+    if hobbies and category in ("low", "moderate"):
+        slots.append((AFTERNOON, 45, f"hobby: {hobbies[0]}"))
+    return tuple(slots), aff_every
+
+
+def build_heuristic_events(start: datetime, end: datetime, category: str,
+                           constraints: PlannerConstraints, busy: BusyTimes,
+                           origin: datetime = None) -> List[dict]:
+    """
+    Build wellness events for every day in [start, end], honouring the
+    parsed preference constraints (excluded days, time windows, disliked
+    activities, durations). `origin` is the first day of the whole plan
+    (defaults to `start`) so regenerating a single day keeps the same
+    affirmation rhythm.
+
+    Density by category:
+    low: 2 events/day + daily affirmation
+    moderate: 1 event/day + affirmation every other day
+    high: 3 events/week
+    critical: 1-2 events/week (rest and affirmations)
+    """
+    events = []
+    origin = origin or start
+    # existing calendar plus slots placed so far (slots may be shifted by constraints)
+    placed = busy.copy()
+
+    for single_date in daterange(start, end):
+        if not constraints.allows_day(single_date):
+            continue
+        slots, aff_every = day_slots(single_date.weekday(), category, constraints.hobbies)
+
+        # build events for the day avoiding overlaps
+        for hhmm, duration_min, etype in slots:
+            if constraints.dislikes(etype):
+                continue
+            fitted = constraints.fit_slot(make_dt(single_date, hhmm), constraints.duration_for(duration_min))
+            if fitted is None:
+                continue
+            start_dt, end_dt = fitted
+
+            # check against existing calendar events
+            if placed.overlaps(start_dt, end_dt):
+                continue
+            placed.add(start_dt, end_dt)
+
+            title = EVENT_TITLES.get(etype.split(":")[0], etype.title())
+
+            note = "A gentle wellbeing activity"
+            if etype.startswith("hobby"):
+                note = f"Time for your hobby: {etype.split(':',1)[1].strip()}"
+            if title.lower().find("affirm") != -1 or etype == "affirmations":
+                # positive affirmation event
+                title = "Affirmation"
+                note = AFFIRMATION_MESSAGES[single_date.toordinal() % len(AFFIRMATION_MESSAGES)]
+
+            events.append({
+                "title": title,
+                "type": etype.replace(" ", "_").lower(),
+                "start": start_dt.strftime(TIME_FORMAT),
+                "end": end_dt.strftime(TIME_FORMAT),
+                "notes": note
+            })
+
+        # add daily affirmation according to frequency
+        day_index = (single_date - origin).days
+        if day_index % aff_every == 0 and not constraints.dislikes("affirmation"):
+            fitted = constraints.fit_slot(make_dt(single_date, MORNING), 5)
+            if fitted is None:
+                continue
+            aff_start, aff_end = fitted
+            events.append({
+                "title": "Affirmation",
+                "type": "affirmation",
+                "start": aff_start.strftime(TIME_FORMAT),
+                "end": aff_end.strftime(TIME_FORMAT),
+                "notes": AFFIRMATION_MESSAGES[day_index % len(AFFIRMATION_MESSAGES)]
+            })
+
+    return events
+
+
+def make_schedule(request, burnout_level: float, category: str, events: List[dict],
+                  source: str, reason: str = None) -> dict:
+    """Wrap events in the schedule payload returned to clients"""
+    schedule = {
+        "schedule_summary": {
+            "burnout_level": burnout_level,
+            "interpreted_burnout_category": category,
+            "date_range": {"start": request.start_date, "end": request.end_date},
+            "total_events_created": len(events),
+            "source": source
+        },
+        "events": events
+    }
+    if reason:
+        schedule["schedule_summary"]["reason"] = reason
+    return schedule
+
+
+def plan_heuristic(request, burnout_level: float = None) -> dict:
+    """
+    Deterministic plan + ICS for one request (no network). Used by the batch
+    workers; `burnout_level` overrides the client-supplied value.
+    Raises ValueError on invalid input.
+    """
+    bl = float(request.burnout_level if burnout_level is None else burnout_level)
+    if not (1 <= bl <= 5):
+        raise ValueError("Burnout level must be 1-5")
+    start = parse_date(request.start_date)
+    end = parse_date(request.end_date)
+
+    calendar_events = [e.model_dump() for e in request.calendar_events or []]
+    busy = BusyTimes(parse_calendar_events(calendar_events))
+    category = interpret_burnout(bl)
+    events = build_heuristic_events(start, end, category, parse_preferences(request.preferences), busy)
+
+    return {
+        "schedule": make_schedule(request, bl, category, events, "heuristic"),
+        "ics_content": generate_ics_content(events, calendar_events)
+    }
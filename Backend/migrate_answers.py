@@ -0,0 +1,72 @@
+"""
+Re-encode stored `emotional_answers` dicts as packed, versioned answer arrays
+(see questionnaire.py).
+
+    python migrate_answers.py [--batch-size 1000] [--dry-run]
+
+Safe to re-run: only documents still holding a dict are touched. Answers that
+don't match the registry (unknown questions, values off the scale) are left
+as they are and counted. Prints the collection size before and after.
+"""
+import argparse
+
+from pymongo import UpdateOne
+
+import questionnaire
+from db_help import db
+from migrate_transcripts import collection_size
+
+
+def report(label: str):
+    size = collection_size()
+    print(f"{label}: {size['count']} assessments, avg {size['avg_bytes']} B, "
+          f"total {size['total_bytes'] / 1e6:.1f} MB")
+
+
+def migrate(batch_size: int = 1000, dry_run: bool = False) -> dict:
+    stats = {"packed": 0, "kept": 0}
+    updates = []
+
+    def flush():
+        if updates and not dry_run:
+            db.assessment_collection.bulk_write(updates, ordered=False)
+        updates.clear()
+
+    cursor = db.assessment_collection.find(
+        {"emotional_answers": {"$exists": True}, "answers": {"$exists": False}},
+        {"emotional_answers": 1},
+        batch_size=batch_size
+    )
+    for doc in cursor:
+        packed = questionnaire.encode_answers(doc["emotional_answers"])
+        if packed is None:
+            stats["kept"] += 1
+            continue
+        updates.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": packed,
+             "$unset": {"emotional_answers": ""}}
+        ))
+        stats["packed"] += 1
+        if len(updates) >= batch_size:
+            flush()
+            print(f"  … {stats['packed']} assessments re-encoded")
+    flush()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack assessment answers into versioned arrays")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count only, write nothing")
+    args = parser.parse_args(argv)
+
+    report("Before")
+    stats = migrate(args.batch_size, args.dry_run)
+    print(f"✅ Packed {stats['packed']} assessments; {stats['kept']} kept as dicts (answers outside the registry)")
+    if not args.dry_run:
+        report("After")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Copy burnout_scores into the time-series collection burnout_series.
+
+    python migrate_burnout_timeseries.py [--batch-size 5000] [--resume | --drop-target]
+
+Stop the API (or anything calling store_burnout) while this runs, then set
+BURNOUT_LAYOUT=timeseries and restart. The source collection is left in place;
+drop it once the counts printed at the end match.
+
+Documents are copied in (user_id, date) order, which fills each time-series
+bucket with one user's scores and uses the existing (user_id, date) index.
+Progress is checkpointed in the `meta` collection at user boundaries, so
+--resume can continue an interrupted run without duplicates.
+"""
+import argparse
+from datetime import datetime
+
+from db_help import db
+
+CHECKPOINT_ID = "migration:burnout_series"
+
+
+def migrate(batch_size: int = 5000, resume: bool = False, drop_target: bool = False):
+    source = db.db['burnout_scores']
+    name = db.BURNOUT_SERIES
+
+    if drop_target:
+        db.db.drop_collection(name)
+        db.meta_collection.delete_one({"_id": CHECKPOINT_ID})
+    target = db.ensure_burnout_series(name)
+
+    query = {}
+    checkpoint = db.meta_collection.find_one({"_id": CHECKPOINT_ID})
+    if target.count_documents({}, limit=1):
+        if not resume or checkpoint is None:
+            raise SystemExit(f"❌ {name} is not empty; use --resume or --drop-target")
+        # drop anything written after the last completed user (metaField-only delete)
+        target.delete_many({"user_id": {"$gt": checkpoint["user_id"]}})
+        query = {"user_id": {"$gt": checkpoint["user_id"]}}
+        print(f"↪️ Resuming after user {checkpoint['user_id']}")
+
+    copied, skipped = 0, 0
+    batch, current_user = [], None
+
+    def flush(last_user):
+        nonlocal copied
+        if batch:
+            target.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch.clear()
+        db.meta_collection.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"user_id": last_user, "updated_at": datetime.now()}},
+            upsert=True
+        )
+        print(f"  … {copied} copied")
+
+    cursor = source.find(query, sort=[("user_id", 1), ("date", 1)], batch_size=batch_size)
+    for doc in cursor:
+        if doc.get("user_id") != current_user:
+            # only checkpoint between users so a resume never splits one
+            if len(batch) >= batch_size:
+                flush(current_user)
+            current_user = doc.get("user_id")
+        if not isinstance(doc.get("date"), datetime) or current_user is None:
+            skipped += 1  # time-series documents need a date and a user
+            continue
+        batch.append(doc)
+    if current_user is not None:
+        flush(current_user)
+
+    # compare whole collections: after --resume, copied/skipped only cover this run
+    source_count = source.count_documents({})
+    migratable = source.count_documents({"date": {"$type": "date"}, "user_id": {"$ne": None}})
+    target_count = target.count_documents({})
+    print(f"✅ Copied {copied} burnout records this run ({skipped} skipped)")
+    print(f"burnout_scores: {source_count} ({source_count - migratable} without a date or user)  "
+          f"{name}: {target_count}")
+    if migratable == target_count:
+        print("Counts match - set BURNOUT_LAYOUT=timeseries and restart the API")
+    else:
+        print("⚠️ Counts differ - were scores written during the migration?")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate burnout_scores to a time-series collection")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--resume", action="store_true", help="continue an interrupted migration")
+    group.add_argument("--drop-target", action="store_true", help="start over from an empty target")
+    args = parser.parse_args(argv)
+    migrate(args.batch_size, args.resume, args.drop_target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Move embedded life-question transcripts out of `assessments` into the
+compressed `transcripts` side collection.
+
+    python migrate_transcripts.py [--batch-size 1000] [--sample-users 200]
+
+Safe to re-run: a transcript's _id is its assessment's _id, so an interrupted
+batch is simply rewritten. Before and after the move it prints the size of
+the assessments collection and the latency of a typical history read
+(10 newest assessments for a sample of users), so the working-set and
+read-latency change can be checked on the real data.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from bson import BSON, Binary, json_util
+from pymongo import ReplaceOne, UpdateOne
+
+import archive
+from db_help import db
+
+
+def collection_size() -> dict:
+    """Document count, average and total size (bytes) of `assessments`"""
+    try:
+        stats = next(db.assessment_collection.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+        return {"count": stats["count"], "avg_bytes": stats.get("avgObjSize", 0), "total_bytes": stats["size"]}
+    except Exception:
+        # $collStats unavailable: estimate from a sample
+        sample = list(db.assessment_collection.aggregate([{"$sample": {"size": 1000}}]))
+        count = db.assessment_collection.count_documents({})
+        avg = statistics.fmean(len(BSON.encode(d)) for d in sample) if sample else 0
+        return {"count": count, "avg_bytes": round(avg), "total_bytes": round(avg * count)}
+
+
+def read_latency(user_ids) -> tuple:
+    """p50 / p95 milliseconds for a 10-assessment history read"""
+    samples = []
+    for user_id in user_ids:
+        began = time.perf_counter()
+        db.get_user_assessments(user_id, 10)
+        samples.append((time.perf_counter() - began) * 1000)
+    if not samples:
+        return 0.0, 0.0
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def report(label: str, user_ids):
+    size = collection_size()
+    p50, p95 = read_latency(user_ids)
+    print(f"{label}: {size['count']} assessments, avg {size['avg_bytes']} B, "
+          f"total {size['total_bytes'] / 1e6:.1f} MB; history read p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+
+def migrate(batch_size: int = 1000) -> int:
+    moved = 0
+    transcripts, updates = [], []
+
+    def flush():
+        if transcripts:
+            db.transcript_collection.bulk_write(transcripts, ordered=False)
+        if updates:
+            # only strip the embedded copy after its transcript is written
+            db.assessment_collection.bulk_write(updates, ordered=False)
+        transcripts.clear()
+        updates.clear()
+
+    cursor = db.assessment_collection.find(
+        {"life_questions": {"$exists": True}},
+        {"user_id": 1, "life_questions": 1},
+        batch_size=batch_size
+    )
+    for doc in cursor:
+        life = doc.get("life_questions")
+        if life:
+            blob, codec = archive.compress(json_util.dumps(life).encode("utf-8"))
+            transcripts.append(ReplaceOne(
+                {"_id": doc["_id"]},
+                {"_id": doc["_id"], "user_id": doc.get("user_id"), "codec": codec, "data": Binary(blob)},
+                upsert=True
+            ))
+            updates.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"transcript_id": doc["_id"]}, "$unset": {"life_questions": ""}}
+            ))
+            moved += 1
+        else:
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$unset": {"life_questions": ""}}))
+        if len(updates) >= batch_size:
+            flush()
+            print(f"  … {moved} transcripts moved")
+    flush()
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move assessment transcripts into a side collection")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sample-users", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    user_ids = [d["_id"] for d in db.assessment_collection.aggregate([
+        {"$group": {"_id": "$user_id"}}, {"$limit": 10000}
+    ])]
+    user_ids = random.sample(user_ids, min(args.sample_users, len(user_ids)))
+
+    report("Before", user_ids)
+    moved = migrate(args.batch_size)
+    print(f"✅ Moved {moved} transcripts")
+    report("After", user_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Questionnaire registry and the compact encoding of ranking answers.
+
+Answers are stored as one byte per question in the questionnaire's fixed
+order (0 = not answered) plus the questionnaire version, instead of a dict
+keyed by the full question texts:
+
+    {"questionnaire_version": 1, "answers": Binary(b"\\x04\\x03..."), "answer_keys": "number"}
+
+`answer_keys` records which key style was submitted (frontend number "1",
+id "ee1" or full text) so reads return the dict in the same shape. Packed
+documents without it (encoded before it existed) decode with question texts.
+
+Questions are only ever appended to a version; rewording or removing one
+means a new version, so old documents always decode with the texts they
+were answered with. Answers that don't fit the registry (unknown question,
+value off the scale) are stored as the plain `emotional_answers` dict.
+"""
+from typing import Dict, List, Optional
+
+from bson import Binary
+
+SCALE = (1, 5)
+
+# version -> questions in storage order: (id, text, frontend number)
+QUESTIONNAIRES = {
+    1: [
+        ("ee1", "I feel emotionally drained or depleted.", 1),
+        ("ee2", "Small problems feel harder to handle than usual.", 2),
+        ("ee3", "I need more time to recover after stressful days.", 3),
+        ("mc1", "My thoughts feel cluttered or scattered.", 4),
+        ("mc2", "I can concentrate and complete tasks effectively.", 5),
+        ("mc3", "I forget details or lose track due to stress.", 6),
+        ("pf1", "I wake up tired even after sleeping.", 7),
+        ("pf2", "My body feels tense, sore, or low on energy.", 8),
+        ("pf3", "I rely on caffeine or quick fixes to stay alert.", 9),
+        ("cs1", "I believe I can manage most challenges.", 10),
+        ("cs2", "I feel supported by people close to me.", 11),
+        ("cs3", "I feel like I'm handling everything alone.", 12),
+    ],
+}
+CURRENT_VERSION = max(QUESTIONNAIRES)
+
+# Key styles in the order of the registry tuples
+KEY_STYLES = ("id", "text", "number")
+
+# version -> key style -> question key in that style -> its position
+_POSITIONS = {
+    version: {
+        style: {str(question[i]).strip().lower(): position for position, question in enumerate(questions)}
+        for i, style in enumerate(KEY_STYLES)
+    }
+    for version, questions in QUESTIONNAIRES.items()
+}
+
+
+def _key_style(keys, version: int) -> Optional[str]:
+    """The one key style all keys are written in, or None (unknown or mixed keys)"""
+    keys = [str(key).strip().lower() for key in keys]
+    for style, positions in _POSITIONS[version].items():
+        if all(key in positions for key in keys):
+            return style
+    return None
+
+
+def encode_answers(emotional: Dict, version: int = CURRENT_VERSION) -> Optional[Dict]:
+    """
+    Fields to store for packed answers (version, one byte per question and the
+    submitted key style), or None if they don't fit the questionnaire
+    """
+    emotional = emotional or {}
+    style = _key_style(emotional, version)
+    if style is None:
+        return None
+    positions = _POSITIONS[version][style]
+    packed = bytearray(len(QUESTIONNAIRES[version]))
+    for key, value in emotional.items():
+        position = positions[str(key).strip().lower()]
+        if isinstance(value, bool):
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not SCALE[0] <= number <= SCALE[1] or number != int(number):
+            return None
+        packed[position] = int(number)
+    return {"questionnaire_version": version, "answers": Binary(bytes(packed)), "answer_keys": style}
+
+
+def emotional_values(emotional: Dict) -> List[float]:
+    """Answered values of a {question: value} dict (ValueError/TypeError if not numeric)"""
+    return [float(v) for v in (emotional or {}).values() if v is not None]
+
+
+def answer_values(doc: Dict) -> List[float]:
+    """Answered values of an assessment document, in either storage format"""
+    if doc.get("answers") is not None:
+        return [v for v in bytes(doc["answers"]) if v]
+    return emotional_values(doc.get("emotional_answers"))
+
+
+def decode_answers(doc: Dict) -> Dict:
+    """Replace packed answers with the {question: value} dict the API returns, keyed as submitted"""
+    if doc.get("answers") is None:
+        return doc
+    questions = QUESTIONNAIRES[doc["questionnaire_version"]]
+    key = KEY_STYLES.index(doc.pop("answer_keys", "text"))
+    doc["emotional_answers"] = {
+        str(questions[position][key]): value
+        for position, value in enumerate(bytes(doc.pop("answers")))
+        if value
+    }
+    return doc
@@ -0,0 +1,135 @@
+"""
+Per-user rate limiting (token bucket) and single-flight request coalescing
+for the expensive endpoints (/chat, /mental-planner/generate-schedule).
+
+Buckets live in process memory by default. Calling `use_mongo_store` with a
+collection switches every limiter to a shared MongoDB-backed store so several
+API workers enforce one budget per user.
+"""
+import asyncio
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
+
+
+class MemoryBucketStore:
+    """In-process token buckets: {key: (tokens, last_refill)}"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        """Consume one token. Returns (allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now, capacity / refill_rate)
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / refill_rate
+
+    def _prune(self, now: float, idle_seconds: float):
+        # Buckets idle long enough to be full again carry no state worth keeping
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < idle_seconds}
+
+
+class MongoBucketStore:
+    """Shared token buckets, refilled and consumed atomically with a pipeline update"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        # Idle buckets are dropped by MongoDB after an hour
+        self.collection.create_index("updated_at", expireAfterSeconds=3600)
+
+    def take(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        now = time.time()
+        refilled = {"$min": [
+            capacity,
+            {"$add": [
+                {"$ifNull": ["$tokens", capacity]},
+                {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, refill_rate]}
+            ]}
+        ]}
+        pipeline = [
+            {"$set": {"tokens": refilled, "ts": now, "updated_at": "$$NOW"}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+        ]
+        doc = self.collection.find_one_and_update(
+            {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / refill_rate
+
+
+_memory_store = MemoryBucketStore()
+_shared_store = None
+
+
+def use_mongo_store(collection):
+    """Share rate-limit buckets across workers through a MongoDB collection"""
+    global _shared_store
+    _shared_store = MongoBucketStore(collection)
+
+
+class RateLimiter:
+    """Token bucket limiter for one endpoint, keyed on user_id"""
+
+    def __init__(self, name: str, capacity: float, refill_per_minute: float):
+        self.name = name
+        self.capacity = capacity
+        self.refill_rate = refill_per_minute / 60.0
+
+    async def check(self, user_key: str):
+        """Consume a token for `user_key` or raise 429 with Retry-After"""
+        key = f"{self.name}:{user_key}"
+        allowed, retry_after = None, 0.0
+        if _shared_store is not None:
+            try:
+                # a database round trip: keep it off the event loop
+                allowed, retry_after = await run_in_threadpool(
+                    _shared_store.take, key, self.capacity, self.refill_rate
+                )
+            except Exception as e:
+                # Shared store unreachable: fall back to the local bucket rather than failing
+                print(f"⚠️ Shared rate-limit store failed: {e}")
+        if allowed is None:
+            allowed, retry_after = _memory_store.take(key, self.capacity, self.refill_rate)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests - please wait a moment and try again",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: while a computation for `key` is in
+    flight, later callers await the same result instead of starting another.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._inflight.pop(key, None) if self._inflight.get(key) is f else None)
+        # shield: one caller disconnecting must not cancel the shared work
+        return await asyncio.shield(fut)
@@ -0,0 +1,201 @@
+"""
+Read-through cache for small per-user values (latest burnout, todo list).
+
+The local tier is an in-process LRU with a TTL. Writers update or drop keys,
+so a process serves its own writes immediately; a generation counter per key
+stops a read that started before a write from caching the old value.
+
+With several API workers, set READ_CACHE_REDIS_URL (needs the optional
+`redis` package) to add a shared tier (values stored as extended JSON, so
+tuples come back as lists): writes replace the shared copy and bump a
+per-key write generation; a read-fill only lands if no write happened since
+it started, so a slow loader can never put an old value over a new one. The
+local TTL drops to READ_CACHE_LOCAL_TTL so other workers see a write
+within that many seconds. Writes made outside the API (jobs, scripts) are
+picked up when entries expire.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+from bson import json_util
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+_MISSING = object()
+
+# Shared-tier read-fill: set the value only if the key's write generation is
+# still the one seen before loading and no value was stored meanwhile
+_FILL_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3], 'NX')
+end
+return false
+"""
+
+
+class LRUTTLCache:
+    """Thread-safe LRU with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=_MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key: str, value, generation: int = None) -> bool:
+        """
+        Store a value. With `generation` (from generation() before loading),
+        the value is dropped if the key was written in the meantime.
+        """
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return False
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if len(self._generations) > self.max_entries * 2:
+                # generations only matter while a load is in flight
+                self._generations = {k: v for k, v in self._generations.items() if k in self._entries}
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+class ReadThroughCache:
+    """Local LRU/TTL tier plus an optional shared Redis tier"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300,
+                 redis_url: str = None, local_ttl: float = 5):
+        self.shared = None
+        self.shared_ttl = ttl
+        self.shared_hits = 0
+        self.shared_errors = 0
+        if redis_url:
+            if redis is None:
+                print("⚠️ READ_CACHE_REDIS_URL set but redis is not installed; using the local cache only")
+            else:
+                self.shared = redis.Redis.from_url(redis_url, socket_timeout=0.2)
+                self._fill = self.shared.register_script(_FILL_IF_UNCHANGED)
+                ttl = min(ttl, local_ttl)
+        self.local = LRUTTLCache(max_entries, ttl)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]):
+        """Cached value for key, calling loader() (and caching its result) on a miss"""
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+        generation = self.local.generation(key)
+        value, shared_generation = self._shared_get(key)
+        if value is _MISSING:
+            value = loader()
+            self._shared_fill(key, value, shared_generation)
+        else:
+            self.shared_hits += 1
+        self.local.set(key, value, generation)
+        return value
+
+    def put(self, key: str, value):
+        """Write path: the new value replaces any cached one"""
+        self.local.invalidate(key)
+        self.local.set(key, value)
+        self._shared_write(key, value)
+
+    def invalidate(self, key: str):
+        self.local.invalidate(key)
+        self._shared_write(key, _MISSING)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.local.stats()
+        if self.shared is not None:
+            stats["shared_hits"] = self.shared_hits
+            stats["shared_errors"] = self.shared_errors
+        return stats
+
+    # A failing shared tier only costs a database read
+    @staticmethod
+    def _generation_key(key: str) -> str:
+        return f"{key}:gen"
+
+    def _shared_get(self, key: str):
+        """(value or _MISSING, write generation seen)"""
+        if self.shared is None:
+            return _MISSING, None
+        try:
+            raw, generation = self.shared.mget([key, self._generation_key(key)])
+        except Exception:
+            self.shared_errors += 1
+            return _MISSING, None
+        return (_MISSING if raw is None else json_util.loads(raw)), generation or b"0"
+
+    def _shared_fill(self, key: str, value, generation):
+        if self.shared is None or generation is None:
+            return
+        try:
+            self._fill(keys=[key, self._generation_key(key)],
+                       args=[generation, json_util.dumps(value), int(self.shared_ttl)])
+        except Exception:
+            self.shared_errors += 1
+
+    def _shared_write(self, key: str, value):
+        """Replace (or with _MISSING, drop) the shared copy and bump its write generation"""
+        if self.shared is None:
+            return
+        try:
+            pipe = self.shared.pipeline(transaction=True)
+            pipe.incr(self._generation_key(key))
+            pipe.expire(self._generation_key(key), int(self.shared_ttl))
+            if value is _MISSING:
+                pipe.delete(key)
+            else:
+                pipe.set(key, json_util.dumps(value), ex=int(self.shared_ttl))
+            pipe.execute()
+        except Exception:
+            self.shared_errors += 1
@@ -0,0 +1,89 @@
+"""
+Daily burnout rollups for population-level dashboards.
+
+One document per day in `burnout_rollups` holds count, sum, sum of squares,
+a histogram of scores and a count per risk level. `store_burnout` keeps them
+current with a single $inc upsert, and `/stats/burnout` merges the days it
+needs in memory, so a dashboard query costs O(days) instead of O(records).
+"""
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+DAY_FORMAT = "%Y-%m-%d"
+# Histogram buckets of this width over the 0-5 score range
+BUCKET_WIDTH = 0.5
+BUCKETS = 10
+
+
+def bucket_index(score: float) -> int:
+    return min(BUCKETS - 1, max(0, int(score / BUCKET_WIDTH)))
+
+
+def risk_key(risk_level: str) -> str:
+    """Risk levels become field names, so keep them free of '.' and '$'"""
+    return re.sub(r"[.$]", "_", str(risk_level).strip().lower()) if risk_level else "unknown"
+
+
+def rollup_increment(score: float, risk_level: str) -> Dict[str, float]:
+    """$inc document recording one burnout score"""
+    return {
+        "count": 1,
+        "sum": score,
+        "sum_sq": score * score,
+        f"histogram.{bucket_index(score)}": 1,
+        f"risk.{risk_key(risk_level)}": 1,
+    }
+
+
+def _period_start(day: datetime, granularity: str) -> datetime:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _empty() -> dict:
+    return {"count": 0, "sum": 0.0, "sum_sq": 0.0, "histogram": [0] * BUCKETS, "risk": {}}
+
+
+def _add(total: dict, doc: dict):
+    total["count"] += doc.get("count", 0)
+    total["sum"] += doc.get("sum", 0.0)
+    total["sum_sq"] += doc.get("sum_sq", 0.0)
+    for index, n in (doc.get("histogram") or {}).items():
+        total["histogram"][int(index)] += n
+    for risk, n in (doc.get("risk") or {}).items():
+        total["risk"][risk] = total["risk"].get(risk, 0) + n
+
+
+def _summary(total: dict) -> dict:
+    count = total["count"]
+    mean = total["sum"] / count if count else None
+    # population standard deviation from the running sums
+    variance = max(0.0, total["sum_sq"] / count - mean * mean) if count else None
+    return {
+        "count": count,
+        "mean": round(mean, 3) if mean is not None else None,
+        "stddev": round(math.sqrt(variance), 3) if variance is not None else None,
+        "histogram": [
+            {"from": i * BUCKET_WIDTH, "to": (i + 1) * BUCKET_WIDTH, "count": n}
+            for i, n in enumerate(total["histogram"])
+        ],
+        "risk_levels": total["risk"],
+    }
+
+
+def merge_rollups(docs: Iterable[dict], granularity: str = "day") -> Dict[str, object]:
+    """Merge daily rollup documents into periods plus an overall total"""
+    periods: Dict[str, dict] = {}
+    overall = _empty()
+    for doc in docs:
+        day = datetime.strptime(doc["_id"], DAY_FORMAT)
+        key = _period_start(day, granularity).strftime(DAY_FORMAT)
+        _add(periods.setdefault(key, _empty()), doc)
+        _add(overall, doc)
+    series: List[dict] = [{"period_start": key, **_summary(periods[key])} for key in sorted(periods)]
+    return {"overall": _summary(overall), "periods": series}
@@ -0,0 +1,42 @@
+"""
+Burnout scoring for assessments, shared by the API and the re-scoring job.
+"""
+from typing import Dict, Sequence, Tuple
+
+from questionnaire import answer_values, emotional_values
+
+
+def burnout_score(values: Sequence[float]) -> float:
+    """Average of the answered ranking values (0.0 if there are none)"""
+    return round(sum(values) / len(values), 2) if values else 0.0
+
+
+def interpret_burnout(score: float) -> str:
+    if score < 2.0:
+        return "low"
+    if 2.0 <= score < 3.0:
+        return "moderate"
+    if 3.0 <= score < 4.0:
+        return "high"
+    return "critical"
+
+
+def score_values(values: Sequence[float]) -> Tuple[float, str]:
+    score = burnout_score(values)
+    return score, interpret_burnout(score)
+
+
+def score_assessment(emotional: Dict) -> Tuple[float, str]:
+    """(burnout score, risk level) for submitted {question: value} answers"""
+    try:
+        return score_values(emotional_values(emotional))
+    except Exception:
+        return score_values([])
+
+
+def score_document(doc: Dict) -> Tuple[float, str]:
+    """(burnout score, risk level) for a stored assessment in either answer format"""
+    try:
+        return score_values(answer_values(doc))
+    except Exception:
+        return score_values([])
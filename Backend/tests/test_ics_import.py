@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from mental_planner.ics_import import IcsEventStream
+
+# Daily 09:00-09:30 London time across the start of BST (2026-03-29);
+# UNTIL 08:00Z on 1 April is 09:00 BST, so 1 April is the last occurrence
+LONDON_SERIES = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:standup@example.com
+SUMMARY:Standup
+DTSTART;TZID=Europe/London:20260326T090000
+DTEND;TZID=Europe/London:20260326T093000
+RRULE:FREQ=DAILY;UNTIL=20260401T080000Z
+EXDATE;TZID=Europe/London:20260330T090000
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def _starts(text, tz=None):
+    stream = IcsEventStream(datetime(2026, 3, 23), datetime(2026, 4, 6), tz)
+    stream.feed(text)
+    return [event["start"] for event in stream.close()]
+
+
+def test_series_keeps_its_wall_clock_time_across_dst():
+    assert _starts(LONDON_SERIES, "Europe/London") == [
+        "2026-03-26T09:00", "2026-03-27T09:00", "2026-03-28T09:00", "2026-03-29T09:00",
+        "2026-03-31T09:00", "2026-04-01T09:00",
+    ]
+
+
+def test_occurrences_are_converted_to_tz_one_by_one():
+    assert _starts(LONDON_SERIES, "UTC") == [
+        "2026-03-26T09:00", "2026-03-27T09:00", "2026-03-28T09:00", "2026-03-29T08:00",
+        "2026-03-31T08:00", "2026-04-01T08:00",
+    ]
+
+
+def test_without_tz_times_stay_in_the_event_zone():
+    assert _starts(LONDON_SERIES)[-2:] == ["2026-03-31T09:00", "2026-04-01T09:00"]
+
+
+def test_local_until_is_read_in_the_event_zone():
+    text = LONDON_SERIES.replace("UNTIL=20260401T080000Z", "UNTIL=20260331")
+    assert _starts(text, "Europe/London")[-1] == "2026-03-31T09:00"
+
+
+def test_floating_series_reads_until_as_wall_clock_time():
+    text = LONDON_SERIES.replace(";TZID=Europe/London", "")
+    assert _starts(text, "UTC")[-1] == "2026-03-31T09:00"
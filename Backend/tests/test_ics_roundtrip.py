@@ -0,0 +1,85 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from dateutil.rrule import rruleset, rrulestr
+from icalendar import Calendar, vRecur
+
+from mental_planner.ics import find_recurrence, generate_ics_content
+
+START = date(2026, 3, 2)  # a Monday
+
+
+def _expand(ics: str):
+    """Every occurrence in an ICS calendar as (title, notes, start, end)"""
+    occurrences = []
+    for vevent in Calendar.from_ical(ics).walk("VEVENT"):
+        start = vevent.decoded("dtstart")
+        duration = vevent.decoded("dtend") - start
+        starts = [start]
+        if "rrule" in vevent:
+            rules = rruleset()
+            rules.rrule(rrulestr(vevent["rrule"].to_ical().decode(), dtstart=start))
+            exdates = vevent.get("exdate", [])
+            for exdate in exdates if isinstance(exdates, list) else [exdates]:
+                for d in exdate.dts:
+                    rules.exdate(d.dt)
+            starts = list(rules)
+        occurrences += [(str(vevent["summary"]), str(vevent["description"]), s, s + duration) for s in starts]
+    return sorted(occurrences)
+
+
+def _events(title, days, hour, minutes=30, notes=""):
+    events = []
+    for day in days:
+        start = datetime.combine(START + timedelta(days=day), datetime.min.time()).replace(hour=hour)
+        events.append({"title": title, "notes": notes, "start": start.isoformat(),
+                       "end": (start + timedelta(minutes=minutes)).isoformat()})
+    return events
+
+
+def _flat(events):
+    return sorted(
+        (e["title"], e["notes"], datetime.fromisoformat(e["start"]), datetime.fromisoformat(e["end"]))
+        for e in events
+    )
+
+
+PLANS = {
+    "daily": _events("Walk", range(14), 8),
+    "daily with conflicts": _events("Walk", [d for d in range(21) if d not in (3, 4, 10)], 8),
+    "every other day": _events("Yoga", range(0, 20, 2), 18, 45),
+    "weekdays": _events("Breathing", [d for d in range(28) if d % 7 < 5], 12, 10),
+    "fixed weekdays with conflicts": _events("Journal", [d for d in range(28) if d % 7 in (0, 2, 4) and d != 9], 21),
+    "singletons": _events("Call a friend", [1], 17) + _events("Stretch", [2, 9], 7, 15),
+    "mixed": (_events("Walk", range(10), 8) + _events("Walk", [0, 5], 19)
+              + _events("Read", range(0, 12, 3), 20, 60, "chapter a day")),
+}
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_rrule_export_expands_to_the_flat_event_list(name):
+    events = PLANS[name]
+    assert _expand(generate_ics_content(events)) == _flat(events)
+    assert _expand(generate_ics_content(events, compress_recurring=False)) == _flat(events)
+
+
+def test_random_plans_round_trip():
+    rng = random.Random(7)
+    for _ in range(200):
+        days = sorted(rng.sample(range(35), rng.randint(1, 25)))
+        events = _events("Walk", days, rng.randint(6, 21), rng.choice([10, 30, 60]))
+        assert _expand(generate_ics_content(events)) == _flat(events)
+
+
+def test_find_recurrence_rule_and_exdates_give_back_the_dates():
+    rng = random.Random(11)
+    for _ in range(500):
+        dates = sorted({START + timedelta(days=d) for d in rng.sample(range(60), rng.randint(2, 30))})
+        recurrence = find_recurrence(dates)
+        if recurrence is None:
+            continue
+        rule, exdates = recurrence
+        dtstart = datetime.combine(dates[0], datetime.min.time())
+        expanded = rrulestr(vRecur(rule).to_ical().decode(), dtstart=dtstart)
+        assert sorted(set(d.date() for d in expanded) - set(exdates)) == dates
@@ -0,0 +1,54 @@
+import pytest
+
+from chatbot.intents import IntentRouter, TEMPLATES
+
+
+@pytest.fixture
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("hi", "greeting"),
+    ("Hello there!", "greeting"),
+    ("good morning", "greeting"),
+    ("find a therapist", "therapy"),
+    ("therapists near me", "therapy"),
+    ("where can I find a counselor?", "therapy"),
+    ("what therapy options are there", "therapy"),
+    ("burnout quiz", "assessment"),
+    ("take the assessment", "assessment"),
+    ("plan my week", "plan"),
+    ("make a wellbeing plan", "plan"),
+])
+def test_greetings_and_resource_lookups_are_answered_locally(router, message, intent):
+    assert router.classify(message)[0] == intent
+    assert router.route(message) == TEMPLATES[intent]
+
+
+@pytest.mark.parametrize("message", [
+    "my burnout score is bad",
+    "hi, I feel awful",
+    "hello I'm so tired",
+    "good morning, I feel hopeless",
+    "I need a therapist, I'm struggling",
+    "plan my day, I'm overwhelmed",
+    "my therapist is bad",
+    "the burnout test sucks",
+    "I'm burned out and sad",
+    "my plan is making me anxious",
+])
+def test_near_miss_distress_goes_to_the_llm(router, message):
+    assert router.route(message) is None
+
+
+def test_only_low_risk_conversations_are_routed(router):
+    assert router.route("hi", risk="moderate") is None
+    assert router.route("find a therapist", risk="high") is None
+
+
+def test_stats_count_local_and_llm_answers(router):
+    router.route("hi")
+    router.route("I feel awful")
+    stats = router.stats()
+    assert (stats["answered_locally"], stats["sent_to_llm"], stats["offload_rate"]) == (1, 1, 0.5)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from mental_planner import gemini_planner
+from mental_planner.preferences import PlannerConstraints
+from mental_planner.schedule import BusyTimes, build_heuristic_events, parse_calendar_events, parse_wall_time
+
+START, END = datetime(2026, 1, 5), datetime(2026, 1, 7)
+
+
+def _local(value):
+    return datetime.fromisoformat(value).astimezone().replace(tzinfo=None)
+
+
+def test_offset_times_become_local_wall_clock_times():
+    assert parse_wall_time("2026-01-05T08:00:00Z") == _local("2026-01-05T08:00:00+00:00")
+    assert parse_wall_time("2026-01-05T08:00:00+05:30") == _local("2026-01-05T08:00:00+05:30")
+    assert parse_wall_time("2026-01-05T08:00") == datetime(2026, 1, 5, 8, 0)
+
+
+def test_calendar_with_offset_events_plans_without_errors():
+    calendar = [
+        {"title": "Standup", "start": "2026-01-05T08:00:00Z", "end": "2026-01-05T08:30:00Z"},
+        {"title": "Review", "start": "2026-01-06T12:00:00+01:00", "end": "2026-01-06T13:00:00+01:00"},
+        {"title": "Lunch", "start": "2026-01-06T12:30", "end": "2026-01-06T13:30"},
+    ]
+    busy = BusyTimes(parse_calendar_events(calendar))
+    assert len(busy) >= 2
+    events = build_heuristic_events(START, END, "moderate", PlannerConstraints(), busy)
+    # short affirmations are not conflict-checked
+    for evt in (e for e in events if e["type"] != "affirmation"):
+        assert not busy.overlaps(datetime.fromisoformat(evt["start"]), datetime.fromisoformat(evt["end"]))
+
+
+def test_model_events_with_offsets_are_validated():
+    start = datetime(2026, 1, 5, 9, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    raw = [{
+        "title": "Breathe", "type": "meditation",
+        "start": "2026-01-05T09:00:00Z", "end": "2026-01-05T09:15:00Z",
+    }]
+    events = gemini_planner.validate_events(raw, START, END, BusyTimes(), PlannerConstraints())
+    assert [e["start"] for e in events] == [start.strftime("%Y-%m-%dT%H:%M")]
+
+
+def _hedge(monkeypatch, payload):
+    marks = {}
+
+    async def model(request, calendar_events):
+        marks["model_started"] = time.monotonic()
+        return payload
+
+    def heuristic(*args):
+        time.sleep(0.2)
+        marks["heuristic_done"] = time.monotonic()
+        return [{"title": "Rest", "type": "rest", "start": "2026-01-05T19:00", "end": "2026-01-05T19:20"}]
+
+    monkeypatch.setattr(gemini_planner, "get_model", lambda: object())
+    monkeypatch.setattr(gemini_planner, "request_gemini_plan", model)
+    monkeypatch.setattr(gemini_planner, "build_heuristic_events", heuristic)
+    constraints = PlannerConstraints(unmatched_clauses=("something only the model understands",))
+    result = asyncio.run(gemini_planner.plan_with_fallback(
+        None, START, END, "moderate", constraints, BusyTimes(), [], budget=2
+    ))
+    return result, marks
+
+
+def test_model_call_overlaps_the_heuristic_fallback(monkeypatch):
+    _, marks = _hedge(monkeypatch, {"events": []})
+    assert marks["model_started"] < marks["heuristic_done"]
+
+
+def test_empty_model_plan_falls_back_to_heuristic(monkeypatch):
+    (events, source, reason), _ = _hedge(monkeypatch, {"events": []})
+    assert source == "heuristic" and events and reason == "model returned no events"
@@ -0,0 +1,63 @@
+import pytest
+
+from mental_planner.preferences import parse_preferences
+
+
+@pytest.mark.parametrize("text, latest", [
+    ("nothing after 8", 20 * 60),
+    ("not after 10", 22 * 60),
+    ("finish by 9", 21 * 60),
+    ("not after 6", 18 * 60),
+    ("not after 8am", 8 * 60),
+])
+def test_bare_upper_bound_hours_read_as_pm(text, latest):
+    assert parse_preferences(text).latest == latest
+
+
+def test_lower_bounds_keep_morning_hours():
+    assert parse_preferences("not before 9").earliest == 9 * 60
+
+
+def test_partly_matched_clause_is_unmatched():
+    constraints = parse_preferences("I enjoy reading at night")
+    assert constraints.hobbies == ("reading",)
+    assert constraints.unmatched_clauses == ("i enjoy reading at night",)
+
+
+def test_fully_matched_clauses_need_no_llm():
+    constraints = parse_preferences(
+        "no Fridays, mornings only, not after 6pm, I don't like journaling, 10 minute sessions"
+    )
+    assert constraints.unmatched_clauses == ()
+
+
+@pytest.mark.parametrize("text, earliest, latest", [
+    ("from 9 to 5", 9 * 60, 17 * 60),
+    ("9-5", 9 * 60, 17 * 60),
+    ("9am-5pm", 9 * 60, 17 * 60),
+    ("between 10 and 4", 10 * 60, 16 * 60),
+    ("from 1 to 3", 13 * 60, 15 * 60),
+    ("9:30-11:30", 9 * 60 + 30, 11 * 60 + 30),
+    ("no meetings before 10am", 10 * 60, None),
+    ("no calls after 7", None, 19 * 60),
+])
+def test_time_ranges_and_negated_bounds(text, earliest, latest):
+    constraints = parse_preferences(text)
+    assert (constraints.earliest, constraints.latest) == (earliest, latest)
+    assert constraints.unmatched_clauses == ()
+
+
+def test_negated_range_blocks_the_window():
+    constraints = parse_preferences("no meetings from 12 to 1")
+    assert constraints.blocked_windows == ((12 * 60, 13 * 60),)
+    assert constraints.earliest is None and constraints.latest is None
+
+
+def test_duration_ranges_are_not_time_ranges():
+    constraints = parse_preferences("10-15 minute sessions")
+    assert constraints.preferred_minutes == 15
+    assert constraints.earliest is None and constraints.unmatched_clauses == ()
+
+
+def test_unparsed_numbers_leave_the_clause_unmatched():
+    assert parse_preferences("2-3 times a week").unmatched_clauses == ("2-3 times a week",)
@@ -0,0 +1,31 @@
+import pytest
+
+import questionnaire
+
+
+@pytest.mark.parametrize("submitted, expected", [
+    ({"1": 4, "2": "3", "5": 2.0}, {"1": 4, "2": 3, "5": 2}),
+    ({"ee1": 4, "mc2": 2}, {"ee1": 4, "mc2": 2}),
+    ({"I feel emotionally drained or depleted.": 5}, {"I feel emotionally drained or depleted.": 5}),
+])
+def test_answers_decode_with_the_submitted_keys(submitted, expected):
+    doc = questionnaire.encode_answers(submitted)
+    assert doc["answer_keys"] in questionnaire.KEY_STYLES
+    assert questionnaire.decode_answers(doc)["emotional_answers"] == expected
+    assert "answer_keys" not in doc
+
+
+def test_packed_documents_without_key_style_decode_with_texts():
+    doc = questionnaire.encode_answers({"1": 4})
+    del doc["answer_keys"]
+    assert questionnaire.decode_answers(doc)["emotional_answers"] == {"I feel emotionally drained or depleted.": 4}
+
+
+@pytest.mark.parametrize("submitted", [
+    {"1": 4, "ee2": 3},
+    {"99": 4},
+    {"1": 6},
+    {"1": True},
+])
+def test_answers_outside_the_registry_are_not_packed(submitted):
+    assert questionnaire.encode_answers(submitted) is None
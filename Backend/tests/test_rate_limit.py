@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import rate_limit
+from rate_limit import RateLimiter
+
+
+def test_bucket_allows_capacity_then_raises_429():
+    limiter = RateLimiter("test-burst", capacity=2, refill_per_minute=1)
+
+    async def run():
+        await limiter.check("u1")
+        await limiter.check("u1")
+        with pytest.raises(HTTPException) as raised:
+            await limiter.check("u1")
+        return raised.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 429 and int(error.headers["Retry-After"]) >= 1
+
+
+def test_shared_store_is_called_off_the_event_loop(monkeypatch):
+    threads = []
+
+    class Store:
+        def take(self, key, capacity, refill_rate):
+            threads.append(threading.current_thread())
+            return True, 0.0
+
+    monkeypatch.setattr(rate_limit, "_shared_store", Store())
+    asyncio.run(RateLimiter("test-shared", 1, 1).check("u1"))
+    assert threads and threads[0] is not threading.main_thread()
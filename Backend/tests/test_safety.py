@@ -0,0 +1,33 @@
+import pytest
+
+from chatbot.safety import ConversationRisk, assess_risk
+
+
+@pytest.mark.parametrize("message", [
+    "I self-harmed last night",
+    "I keep self harming",
+    "I have been self-harming again",
+    "thinking about suicides",
+])
+def test_inflected_crisis_phrases_are_high(message):
+    assert ConversationRisk().update(message) == "high"
+
+
+@pytest.mark.parametrize("message", [
+    "I want to die",
+    "I've been feeling suicidal",
+    "sometimes I think about ending it, I want to end my life",
+])
+def test_crisis_phrases_are_high(message):
+    assert assess_risk(message) == "high"
+    assert ConversationRisk().update(message) == "high"
+
+
+def test_crisis_after_calm_turns_is_high():
+    state = ConversationRisk()
+    assert state.update("work was fine today") == "low"
+    assert state.update("but honestly I keep self harming") == "high"
+
+
+def test_everyday_message_is_low():
+    assert ConversationRisk().update("I had a nice walk and cooked dinner") == "low"